@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ClientesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'clientes'
+
+    def ready(self):
+        from inventario.cache import invalidar_al_guardar
+        from .models import Cliente
+
+        invalidar_al_guardar(Cliente, 'clientes')
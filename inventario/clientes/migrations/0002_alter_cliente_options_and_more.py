@@ -0,0 +1,21 @@
+# Generated by Django 4.2.11 on 2026-10-18 19:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='cliente',
+            options={'ordering': ['apellido', 'nombre', 'id']},
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['apellido', 'nombre', 'id'], name='cliente_apellido_nombre_idx'),
+        ),
+    ]
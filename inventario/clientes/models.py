@@ -8,5 +8,12 @@ class Cliente(models.Model):
     telefono = models.CharField(max_length=20)
     direccion = models.TextField()
 
+    class Meta:
+        ordering = ["apellido", "nombre", "id"]
+        indexes = [
+            # Orden del listado (paginación por número de página)
+            models.Index(fields=['apellido', 'nombre', 'id'], name='cliente_apellido_nombre_idx'),
+        ]
+
     def __str__(self):
         return f"{self.apellido}, {self.nombre} ({self.documento})"
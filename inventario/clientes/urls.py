@@ -5,6 +5,7 @@ from .views import (
     ClienteUpdateView,
     ClienteDeleteView,
     ClienteDetailView, 
+    clientes_autocompletar,
 )
 
 app_name = 'clientes'
@@ -15,4 +16,5 @@ urlpatterns = [
     path('<int:pk>/editar/', ClienteUpdateView.as_view(), name='cliente_update'),
     path('<int:pk>/eliminar/', ClienteDeleteView.as_view(), name='cliente_delete'),
     path('<int:pk>/', ClienteDetailView.as_view(), name='cliente_detail'),  # 👈 Esta línea es clave
+    path('buscar/', clientes_autocompletar, name='autocompletar'),
 ]
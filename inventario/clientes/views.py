@@ -1,4 +1,7 @@
+from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
+from django.db.models import Q
+from django.http import JsonResponse
 from django.urls import reverse_lazy
 from django.views.generic import CreateView, UpdateView, DeleteView, DetailView
 from django_filters.views import FilterView
@@ -6,14 +9,17 @@ from django_filters.views import FilterView
 from .models import Cliente
 from .forms import ClienteForm
 from .filters import ClienteFilter
+from inventario import cache
+from inventario.paginacion import PaginacionEconomicaMixin
 
 
-class ClienteListView(LoginRequiredMixin, FilterView):
+class ClienteListView(LoginRequiredMixin, PaginacionEconomicaMixin, FilterView):
     model = Cliente
     filterset_class = ClienteFilter
     template_name = 'clientes/cliente_list.html'
     context_object_name = 'clientes'
     paginate_by = 10
+    grupos_cache = ('clientes',)
 
 
 class ClienteCreateView(LoginRequiredMixin, PermissionRequiredMixin, CreateView):
@@ -42,3 +48,27 @@ class ClienteDeleteView(LoginRequiredMixin, PermissionRequiredMixin, DeleteView)
 class ClienteDetailView(LoginRequiredMixin, DetailView):
     model = Cliente
     template_name = 'clientes/cliente_detail.html'
+
+
+LIMITE_AUTOCOMPLETAR = 20
+
+
+# Búsqueda de clientes por documento o apellido para el formulario de ventas
+@login_required
+def clientes_autocompletar(request):
+    consulta = ' '.join((request.GET.get('q') or '').split())
+    if not consulta:
+        return JsonResponse({'resultados': []})
+
+    def buscar():
+        clientes = (
+            Cliente.objects
+            .filter(Q(documento__startswith=consulta) | Q(apellido__istartswith=consulta))
+            .order_by('apellido', 'nombre')
+            .only('id', 'nombre', 'apellido', 'documento')[:LIMITE_AUTOCOMPLETAR]
+        )
+        return [{'id': c.pk, 'texto': str(c)} for c in clientes]
+
+    # Se invalida al guardar o borrar un cliente (ver ClientesConfig.ready)
+    resultados = cache.obtener('clientes:autocompletar', ('clientes',), buscar, {'q': consulta.lower()})
+    return JsonResponse({'resultados': resultados})
@@ -0,0 +1,55 @@
+"""
+Configuración de gunicorn (perfil de producción).
+
+    gunicorn -c gunicorn.conf.py
+
+- Workers: WEB_CONCURRENCY o 2 * CPUs + 1.
+- preload_app: la aplicación se carga una vez en el master y los workers la
+  heredan al hacer fork (arrancan más rápido y comparten memoria). Las
+  conexiones a la base se abren recién en cada worker.
+- Recarga sin cortar requests:
+    kill -HUP <master>    reinicia los workers de a uno (misma versión del código,
+                          porque con preload el código vive en el master)
+    kill -USR2 <master>   levanta un master nuevo con el código nuevo; después
+                          kill -TERM <master viejo> (o WINCH + QUIT)
+- Los workers se reciclan cada `max_requests` requests para acotar fugas de memoria.
+
+Todo se puede ajustar con variables de entorno GUNICORN_*.
+"""
+import multiprocessing
+import os
+
+
+def _entero(nombre, defecto):
+    return int(os.environ.get(nombre, defecto))
+
+
+wsgi_app = os.environ.get('GUNICORN_APP', 'inventario.wsgi:application')
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+
+workers = _entero('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1)
+# 'gthread' con GUNICORN_THREADS > 1 para requests que esperan E/S;
+# 'uvicorn.workers.UvicornWorker' con GUNICORN_APP=inventario.asgi:application para ASGI
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+threads = _entero('GUNICORN_THREADS', 1)
+
+timeout = _entero('GUNICORN_TIMEOUT', 30)
+graceful_timeout = _entero('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = _entero('GUNICORN_KEEPALIVE', 5)
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+max_requests = _entero('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = _entero('GUNICORN_MAX_REQUESTS_JITTER', 100)
+
+accesslog = os.environ.get('GUNICORN_ACCESSLOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOGLEVEL', 'info')
+# Con proxy delante (nginx, balanceador), confiar en su X-Forwarded-*
+forwarded_allow_ips = os.environ.get('GUNICORN_FORWARDED_ALLOW_IPS', '127.0.0.1')
+
+
+def post_fork(server, worker):
+    # Si algo abrió una conexión en el master durante la precarga, que no se comparta
+    from django.db import connections
+
+    connections.close_all()
@@ -0,0 +1,219 @@
+"""
+Cache compartido con invalidación por versiones.
+
+Los datos cacheados pertenecen a uno o más grupos ('productos', 'clientes',
+'ventas', 'movimientos', 'valuacion'). Cada grupo tiene un número de versión en el cache
+que entra en la clave; invalidar un grupo es incrementar su versión (las
+entradas viejas dejan de leerse y vencen solas). Las versiones cambian:
+
+- con post_save / post_delete de los modelos (ver `invalidar_al_guardar`,
+  conectado en el ready() de cada app).
+- explícitamente en las escrituras masivas que no disparan señales
+  (libro de stock, ajustes de precio, importación), con `invalidar_al_confirmar`.
+
+'valuacion' es el grupo de la valuación del inventario: lo invalidan sólo los
+cambios masivos de precio o stock (ajustes de precio, importación,
+conciliación) y el ABM de productos, no cada venta; entre medio el reporte
+vence por tiempo.
+
+'busqueda' sólo versiona el índice de búsqueda en memoria (productos.busqueda):
+cambia con el ABM de productos y la importación, que son los que tocan el
+texto buscable.
+
+El backend se elige en settings con CACHE_BACKEND (locmem, file o redis).
+`estadisticas()` devuelve aciertos y fallos por grupo, acumulados entre
+procesos a través del mismo cache.
+"""
+import hashlib
+import threading
+import time
+from collections import defaultdict
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.http import JsonResponse
+
+GRUPOS = ('productos', 'clientes', 'ventas', 'movimientos', 'valuacion')
+TIEMPO_CACHE = 5 * 60
+
+_PREFIJO_VERSION = 'cache:version:'
+_PREFIJO_ESTADISTICAS = 'cache:estadisticas:'
+
+
+# -----------------------------------------------------------------------------
+# Versiones
+# -----------------------------------------------------------------------------
+
+def version(grupo):
+    valor = cache.get(_PREFIJO_VERSION + grupo)
+    if valor is None:
+        # Arranca en la hora actual (en microsegundos): si el cache se vació,
+        # las versiones nuevas no repiten las de antes
+        cache.add(_PREFIJO_VERSION + grupo, int(time.time() * 1_000_000), None)
+        valor = cache.get(_PREFIJO_VERSION + grupo, 0)
+    return valor
+
+
+def versiones(grupos):
+    claves = [_PREFIJO_VERSION + grupo for grupo in grupos]
+    encontradas = cache.get_many(claves)
+    return [encontradas.get(k) or version(grupo) for k, grupo in zip(claves, grupos)]
+
+
+def invalidar(*grupos):
+    for grupo in grupos:
+        try:
+            cache.incr(_PREFIJO_VERSION + grupo)
+        except ValueError:
+            # La clave venció o el cache se reinició
+            version(grupo)
+
+
+def invalidar_al_confirmar(*grupos):
+    """Invalida cuando confirma la transacción actual (o enseguida, fuera de una)."""
+    transaction.on_commit(lambda: invalidar(*grupos))
+
+
+def invalidar_al_guardar(modelo, *grupos):
+    """Conecta post_save y post_delete de `modelo` para invalidar los grupos."""
+    def receptor(sender, **kwargs):
+        invalidar_al_confirmar(*grupos)
+
+    uid = f"inventario.cache:{modelo._meta.label}"
+    post_save.connect(receptor, sender=modelo, weak=False, dispatch_uid=uid)
+    post_delete.connect(receptor, sender=modelo, weak=False, dispatch_uid=uid)
+
+
+# -----------------------------------------------------------------------------
+# Claves y lectura
+# -----------------------------------------------------------------------------
+
+def normalizar_parametros(parametros):
+    """QueryDict o dict -> tuplas ordenadas y sin valores vacíos (?a=1&b= es lo mismo que ?a=1)."""
+    if hasattr(parametros, 'lists'):
+        items = parametros.lists()
+    else:
+        items = ((nombre, valor if isinstance(valor, (list, tuple)) else [valor]) for nombre, valor in parametros.items())
+    normalizados = []
+    for nombre, valores in items:
+        valores = sorted(str(v).strip() for v in valores if v is not None and str(v).strip() != '')
+        if valores:
+            normalizados.append((nombre, tuple(valores)))
+    return tuple(sorted(normalizados))
+
+
+def clave(nombre, grupos, parametros=None):
+    partes = [nombre]
+    partes += [f"{grupo}{valor}" for grupo, valor in zip(grupos, versiones(grupos))]
+    if parametros is not None:
+        partes.append(hashlib.md5(repr(normalizar_parametros(parametros)).encode('utf-8')).hexdigest())
+    return 'cache:' + ':'.join(partes)
+
+
+_AUSENTE = object()
+
+
+def obtener(nombre, grupos, calcular, parametros=None, tiempo=TIEMPO_CACHE):
+    """Valor cacheado de `calcular()` para esos grupos y parámetros."""
+    k = clave(nombre, grupos, parametros)
+    valor = cache.get(k, _AUSENTE)
+    _registrar(grupos, valor is not _AUSENTE)
+    if valor is _AUSENTE:
+        valor = calcular()
+        cache.set(k, valor, tiempo)
+    return valor
+
+
+def cachear_queryset(nombre, queryset, grupos, parametros=None, tiempo=TIEMPO_CACHE):
+    """Lista de resultados del queryset (ya filtrado y recortado), cacheada."""
+    return obtener(nombre, grupos, lambda: list(queryset), parametros, tiempo)
+
+
+def cachear_vista(nombre, grupos, tiempo=TIEMPO_CACHE, parametros=None):
+    """
+    Decorador para vistas GET que devuelven datos iguales para todos los
+    usuarios (JSON): cachea las respuestas 200 por parámetros de GET.
+    `parametros(request)` reemplaza a request.GET en la clave cuando la vista
+    completa valores por defecto (ej. el rango de fechas que termina hoy).
+    """
+    def decorador(vista):
+        def envoltura(request, *args, **kwargs):
+            if request.method != 'GET':
+                return vista(request, *args, **kwargs)
+            datos = parametros(request) if parametros else dict(request.GET.lists())
+            datos.update({f"_{k}": v for k, v in kwargs.items()})
+            k = clave(nombre, grupos, datos)
+            respuesta = cache.get(k)
+            _registrar(grupos, respuesta is not None)
+            if respuesta is None:
+                respuesta = vista(request, *args, **kwargs)
+                if respuesta.status_code == 200 and not respuesta.streaming:
+                    cache.set(k, respuesta, tiempo)
+            return respuesta
+        envoltura.__name__ = vista.__name__
+        envoltura.__doc__ = vista.__doc__
+        return envoltura
+    return decorador
+
+
+# -----------------------------------------------------------------------------
+# Estadísticas
+# -----------------------------------------------------------------------------
+
+# Los contadores se acumulan en el proceso y se suman al cache cada tanto
+INTERVALO_ESTADISTICAS = 30
+_locales = defaultdict(int)
+_ultimo_volcado = time.monotonic()
+_lock = threading.Lock()
+
+
+def _registrar(grupos, acierto):
+    global _ultimo_volcado
+    sufijo = 'aciertos' if acierto else 'fallos'
+    with _lock:
+        for grupo in grupos:
+            _locales[f"{grupo}:{sufijo}"] += 1
+        if time.monotonic() - _ultimo_volcado < INTERVALO_ESTADISTICAS:
+            return
+        pendientes = dict(_locales)
+        _locales.clear()
+        _ultimo_volcado = time.monotonic()
+    _volcar(pendientes)
+
+
+def _volcar(pendientes):
+    for nombre, cantidad in pendientes.items():
+        clave_total = _PREFIJO_ESTADISTICAS + nombre
+        if not cache.add(clave_total, cantidad, None):
+            try:
+                cache.incr(clave_total, cantidad)
+            except ValueError:
+                cache.set(clave_total, cantidad, None)
+
+
+def estadisticas():
+    """{grupo: {'aciertos', 'fallos', 'ratio'}} sumando todos los procesos."""
+    with _lock:
+        pendientes = dict(_locales)
+        _locales.clear()
+    _volcar(pendientes)
+    nombres = [f"{grupo}:{sufijo}" for grupo in GRUPOS for sufijo in ('aciertos', 'fallos')]
+    totales = cache.get_many([_PREFIJO_ESTADISTICAS + nombre for nombre in nombres])
+    resultado = {}
+    for grupo in GRUPOS:
+        aciertos = totales.get(f"{_PREFIJO_ESTADISTICAS}{grupo}:aciertos", 0)
+        fallos = totales.get(f"{_PREFIJO_ESTADISTICAS}{grupo}:fallos", 0)
+        total = aciertos + fallos
+        resultado[grupo] = {
+            'aciertos': aciertos,
+            'fallos': fallos,
+            'ratio': round(aciertos / total, 3) if total else None,
+        }
+    return resultado
+
+
+@staff_member_required
+def estadisticas_json(request):
+    return JsonResponse({'grupos': estadisticas(), 'versiones': dict(zip(GRUPOS, versiones(GRUPOS)))})
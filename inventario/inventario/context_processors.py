@@ -0,0 +1,6 @@
+from django.conf import settings
+
+
+def fragmentos(request):
+    """Tiempo de cache de los fragmentos de plantilla ({% cache TIEMPO_FRAGMENTOS ... %})."""
+    return {'TIEMPO_FRAGMENTOS': settings.TIEMPO_FRAGMENTOS}
@@ -0,0 +1,130 @@
+"""
+Exportaciones en streaming (CSV o JSON Lines, opcionalmente con gzip).
+
+Las filas se leen con `.iterator(chunk_size=...)` (cursor del lado del
+servidor en PostgreSQL) y se escriben a medida que llegan, así que la
+memoria no depende de la cantidad de filas. La misma generación de bytes
+sirve para la respuesta HTTP (StreamingHttpResponse) y para los comandos
+de manage.py.
+
+Las columnas se describen como [(encabezado, campo_del_orm), ...].
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.http import StreamingHttpResponse
+
+FORMATOS = ('csv', 'jsonl')
+TAMANIO_LOTE = 2000
+# Bytes acumulados antes de entregar un bloque al servidor
+TAMANIO_BLOQUE = 64 * 1024
+
+
+def _valor_json(valor):
+    if isinstance(valor, Decimal):
+        return str(valor)
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    return valor
+
+
+def _lineas_csv(encabezados, filas):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(encabezados)
+    for fila in filas:
+        escritor.writerow(fila)
+        if buffer.tell() >= TAMANIO_BLOQUE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _lineas_jsonl(encabezados, filas):
+    partes = []
+    tamanio = 0
+    for fila in filas:
+        linea = json.dumps(
+            {clave: _valor_json(valor) for clave, valor in zip(encabezados, fila)},
+            ensure_ascii=False,
+        ) + '\n'
+        partes.append(linea)
+        tamanio += len(linea)
+        if tamanio >= TAMANIO_BLOQUE:
+            yield ''.join(partes)
+            partes, tamanio = [], 0
+    yield ''.join(partes)
+
+
+def _gzip(bloques):
+    compresor = zlib.compressobj(wbits=31)  # 31 = formato gzip
+    for bloque in bloques:
+        comprimido = compresor.compress(bloque)
+        if comprimido:
+            yield comprimido
+    yield compresor.flush()
+
+
+def generar(columnas, queryset, formato='csv', comprimir=False):
+    """Genera los bytes de la exportación de `queryset` con las columnas dadas."""
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato no soportado: {formato}")
+    encabezados = [encabezado for encabezado, _ in columnas]
+    filas = queryset.values_list(*[campo for _, campo in columnas]).iterator(chunk_size=TAMANIO_LOTE)
+    lineas = _lineas_csv(encabezados, filas) if formato == 'csv' else _lineas_jsonl(encabezados, filas)
+    bloques = (texto.encode('utf-8') for texto in lineas if texto)
+    return _gzip(bloques) if comprimir else bloques
+
+
+def formato_de_archivo(nombre):
+    """(formato, comprimir) según la extensión: ventas.csv, movimientos.jsonl.gz, etc."""
+    comprimir = nombre.lower().endswith('.gz')
+    base = nombre[:-3] if comprimir else nombre
+    formato = base.rsplit('.', 1)[-1].lower() if '.' in base else 'csv'
+    return (formato if formato in FORMATOS else 'csv'), comprimir
+
+
+def nombre_archivo(base, formato='csv', comprimir=False):
+    return f"{base}.{formato}" + ('.gz' if comprimir else '')
+
+
+def respuesta(base, columnas, queryset, formato='csv', comprimir=False):
+    """StreamingHttpResponse que descarga la exportación como adjunto."""
+    if comprimir:
+        tipo = 'application/gzip'
+    elif formato == 'csv':
+        tipo = 'text/csv; charset=utf-8'
+    else:
+        tipo = 'application/x-ndjson; charset=utf-8'
+    response = StreamingHttpResponse(generar(columnas, queryset, formato, comprimir), content_type=tipo)
+    response['Content-Disposition'] = f'attachment; filename="{nombre_archivo(base, formato, comprimir)}"'
+    # Que ningún proxy la junte entera antes de mandarla
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def escribir(destino, columnas, queryset, formato='csv', comprimir=False):
+    """Escribe la exportación en un archivo binario abierto. Devuelve los bytes escritos."""
+    escritos = 0
+    for bloque in generar(columnas, queryset, formato, comprimir):
+        destino.write(bloque)
+        escritos += len(bloque)
+    return escritos
+
+
+def escribir_en_salida(salida, columnas, queryset, formato='csv', comprimir=False):
+    """
+    Escribe la exportación en la salida de un comando (`self.stdout`): en el
+    flujo binario debajo del de texto, o directo si ya es binario (BytesIO).
+    """
+    flujo = getattr(salida, '_out', salida)
+    flujo.flush()
+    destino = getattr(flujo, 'buffer', flujo)
+    escritos = escribir(destino, columnas, queryset, formato, comprimir)
+    destino.flush()
+    return escritos
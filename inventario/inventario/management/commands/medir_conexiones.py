@@ -0,0 +1,72 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_finished, request_started
+from django.db import connections
+
+from clientes.models import Cliente
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide cuánto cuesta obtener la conexión a la base en cada request, sin "
+        "reutilizarla (CONN_MAX_AGE=0) y con conexiones persistentes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help="Requests simulados por modo (200).")
+        parser.add_argument('--max-age', type=int, help="CONN_MAX_AGE del modo persistente. Por defecto, el de settings (o 60).")
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        cantidad = options['requests']
+        if cantidad < 1:
+            raise CommandError("--requests tiene que ser mayor que cero.")
+        conexion = connections[options['database']]
+        original = conexion.settings_dict.get('CONN_MAX_AGE', 0)
+        persistente = options['max_age'] if options['max_age'] is not None else (original or 60)
+        pk = Cliente.objects.using(options['database']).values_list('pk', flat=True).first()
+
+        self.stdout.write(
+            f"{conexion.vendor} en {conexion.settings_dict.get('HOST') or conexion.settings_dict.get('NAME')}, "
+            f"{cantidad} requests por modo\n"
+        )
+        resultados = {}
+        try:
+            for nombre, max_age in (('sin reutilizar', 0), (f'persistente ({persistente}s)', persistente)):
+                resultados[nombre] = self._medir(conexion, options['database'], pk, max_age, cantidad)
+        finally:
+            conexion.close()
+            conexion.settings_dict['CONN_MAX_AGE'] = original
+
+        self.stdout.write(f"{'modo':<22}{'conexión media':>16}{'p95':>10}{'request media':>16}")
+        for nombre, (conexion_ms, total_ms) in resultados.items():
+            self.stdout.write(
+                f"{nombre:<22}{statistics.mean(conexion_ms):>13.3f} ms"
+                f"{self._p95(conexion_ms):>7.3f} ms{statistics.mean(total_ms):>13.3f} ms"
+            )
+        antes, despues = (statistics.mean(total) for _, total in resultados.values())
+        self.stdout.write(self.style.SUCCESS(f"Ahorro por request: {antes - despues:.3f} ms"))
+
+    def _medir(self, conexion, alias, pk, max_age, cantidad):
+        """Simula el ciclo de un request (señales incluidas) con una consulta como la de ClienteDetailView."""
+        conexion.close()
+        conexion.settings_dict['CONN_MAX_AGE'] = max_age
+        conexion_ms, total_ms = [], []
+        for _ in range(cantidad):
+            inicio = time.perf_counter()
+            # close_old_connections: cierra las conexiones vencidas y pide el health check
+            request_started.send(sender=self.__class__)
+            conexion.ensure_connection()
+            conexion.close_if_health_check_failed()
+            conectado = time.perf_counter()
+            Cliente.objects.using(alias).filter(pk=pk).first()
+            request_finished.send(sender=self.__class__)
+            fin = time.perf_counter()
+            conexion_ms.append((conectado - inicio) * 1000)
+            total_ms.append((fin - inicio) * 1000)
+        return conexion_ms, total_ms
+
+    def _p95(self, valores):
+        return sorted(valores)[int(len(valores) * 0.95) - 1] if len(valores) > 1 else valores[0]
@@ -0,0 +1,28 @@
+"""
+Archivos de MEDIA_ROOT servidos por Django en producción (SERVIR_MEDIA),
+para cuando no hay un servidor web delante que los sirva.
+
+- Imágenes de productos (productos/): los originales (SKU y hash del
+  contenido, ver productos.models.get_image_path) y los derivados
+  (productos/derivados/) nunca cambian con el mismo nombre, así que se
+  cachean un año como `immutable`. Los originales anteriores a ese esquema
+  (sólo el SKU) tampoco se pisan: una imagen nueva siempre va a otro nombre.
+- El resto: cache corto y revalidación con Last-Modified.
+"""
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.views.static import serve
+
+PREFIJOS_INMUTABLES = ('productos/',)
+TIEMPO_INMUTABLE = 365 * 24 * 60 * 60
+TIEMPO_OTROS = 60 * 60
+
+
+def servir_media(request, path):
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    if response.status_code == 200:
+        if path.startswith(PREFIJOS_INMUTABLES):
+            patch_cache_control(response, public=True, max_age=TIEMPO_INMUTABLE, immutable=True)
+        else:
+            patch_cache_control(response, public=True, max_age=TIEMPO_OTROS)
+    return response
@@ -0,0 +1,303 @@
+"""
+Métricas de rendimiento en formato de texto de Prometheus (/metrics).
+
+MetricasMiddleware registra por vista (nombre de URL, ej. 'productos:producto_list'):
+
+- latencia del request (histograma)
+- cantidad de consultas SQL y tiempo total en la base (connection.execute_wrapper)
+- tiempo de render de plantillas (TemplateResponse de las vistas basadas en clases)
+- bytes de la respuesta
+
+`seccion('nombre')` mide secciones calientes (checkout, PDF de factura,
+derivados de imágenes) como histograma; sirve como `with` o como decorador.
+
+Para que cueste poco se acumula en memoria del proceso, bajo un lock y sin
+consultas. Un proceso hijo (fork de gunicorn o del pool de inventario.tareas)
+arranca con el registro vacío: si no, volvería a volcar bajo su pid lo que
+acumuló el padre y /metrics lo contaría dos veces. Cada INTERVALO_VOLCADO segundos el proceso guarda una foto de sus
+totales en el cache compartido (una escritura). /metrics suma las fotos de
+todos los procesos, así que con varios workers de gunicorn hace falta un
+cache compartido (CACHE_BACKEND=redis o file). Si un worker se recicla sus
+totales se conservan TIEMPO_FOTO segundos; Prometheus toma la caída posterior
+como un reinicio del contador.
+"""
+import bisect
+import hmac
+import os
+import socket
+import threading
+import time
+from collections import defaultdict
+from contextlib import ContextDecorator
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse, HttpResponseForbidden
+
+from inventario import cache as cache_compartido
+
+# Límites (en segundos) de los histogramas de latencia
+LIMITES = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+INTERVALO_VOLCADO = 15
+TIEMPO_FOTO = 24 * 60 * 60
+
+_CLAVE_PROCESOS = 'metricas:procesos'
+_PREFIJO_FOTO = 'metricas:foto:'
+
+AYUDA = {
+    'inventario_http_requests_total': ('counter', "Requests atendidos por vista, método y estado."),
+    'inventario_http_request_duration_seconds': ('histogram', "Latencia de los requests por vista."),
+    'inventario_http_response_bytes_total': ('counter', "Bytes de respuesta enviados por vista (sin respuestas en streaming)."),
+    'inventario_db_queries_total': ('counter', "Consultas SQL ejecutadas por vista."),
+    'inventario_db_duration_seconds_total': ('counter', "Tiempo total en la base por vista."),
+    'inventario_template_render_seconds_total': ('counter', "Tiempo de render de plantillas por vista."),
+    'inventario_seccion_duration_seconds': ('histogram', "Duración de las secciones calientes (checkout, PDF, imágenes)."),
+    'inventario_cache_requests_total': ('counter', "Lecturas del cache compartido por grupo y resultado."),
+}
+
+
+# -----------------------------------------------------------------------------
+# Registro en memoria
+# -----------------------------------------------------------------------------
+
+_lock = threading.Lock()
+_contadores = defaultdict(float)
+# (nombre, etiquetas) -> [cantidades por límite (+Inf al final), suma, cantidad]
+_histogramas = {}
+_ultimo_volcado = time.monotonic()
+_proceso = None
+
+
+def _reiniciar_registro():
+    global _lock, _contadores, _histogramas, _ultimo_volcado, _proceso
+    # El lock pudo quedar tomado por otro hilo del padre en el momento del fork
+    _lock = threading.Lock()
+    _contadores = defaultdict(float)
+    _histogramas = {}
+    _ultimo_volcado = time.monotonic()
+    _proceso = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reiniciar_registro)
+
+
+def _observar(nombre, etiquetas, segundos):
+    histograma = _histogramas.get((nombre, etiquetas))
+    if histograma is None:
+        histograma = _histogramas[(nombre, etiquetas)] = [[0] * (len(LIMITES) + 1), 0.0, 0]
+    histograma[0][bisect.bisect_left(LIMITES, segundos)] += 1
+    histograma[1] += segundos
+    histograma[2] += 1
+
+
+def registrar_request(vista, metodo, estado, segundos, consultas, segundos_db, segundos_plantilla, bytes_respuesta):
+    etiquetas = (('vista', vista),)
+    with _lock:
+        _contadores[('inventario_http_requests_total', etiquetas + (('metodo', metodo), ('estado', str(estado))))] += 1
+        _observar('inventario_http_request_duration_seconds', etiquetas, segundos)
+        _contadores[('inventario_db_queries_total', etiquetas)] += consultas
+        _contadores[('inventario_db_duration_seconds_total', etiquetas)] += segundos_db
+        if segundos_plantilla:
+            _contadores[('inventario_template_render_seconds_total', etiquetas)] += segundos_plantilla
+        if bytes_respuesta is not None:
+            _contadores[('inventario_http_response_bytes_total', etiquetas)] += bytes_respuesta
+    _volcar_si_corresponde()
+
+
+def registrar_seccion(nombre, segundos):
+    with _lock:
+        _observar('inventario_seccion_duration_seconds', (('seccion', nombre),), segundos)
+    _volcar_si_corresponde()
+
+
+class seccion(ContextDecorator):
+    """Mide una sección caliente: `with seccion('checkout'):` o `@seccion('checkout')`."""
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        # Como decorador la misma instancia se usa en varios hilos a la vez (y
+        # puede anidarse): cada hilo apila sus propios inicios
+        self._hilos = threading.local()
+
+    def _inicios(self):
+        inicios = getattr(self._hilos, 'inicios', None)
+        if inicios is None:
+            inicios = self._hilos.inicios = []
+        return inicios
+
+    def __enter__(self):
+        self._inicios().append(time.perf_counter())
+        return self
+
+    def __exit__(self, *exc):
+        registrar_seccion(self.nombre, time.perf_counter() - self._inicios().pop())
+        return False
+
+
+# -----------------------------------------------------------------------------
+# Fotos por proceso en el cache compartido
+# -----------------------------------------------------------------------------
+
+def _clave_proceso():
+    global _proceso
+    if _proceso is None or _proceso[0] != os.getpid():
+        # Host, pid y arranque: un pid reutilizado no pisa la foto de otro proceso
+        _proceso = (os.getpid(), f"{socket.gethostname()}:{os.getpid()}:{int(time.time())}")
+    return _proceso[1]
+
+
+def _volcar_si_corresponde():
+    if time.monotonic() - _ultimo_volcado >= INTERVALO_VOLCADO:
+        volcar()
+
+
+def volcar():
+    """Guarda la foto de este proceso en el cache (una escritura, más el registro del proceso si falta)."""
+    global _ultimo_volcado
+    with _lock:
+        foto = {
+            'contadores': dict(_contadores),
+            'histogramas': {k: [list(v[0]), v[1], v[2]] for k, v in _histogramas.items()},
+        }
+        _ultimo_volcado = time.monotonic()
+    proceso = _clave_proceso()
+    cache.set(_PREFIJO_FOTO + proceso, foto, TIEMPO_FOTO)
+    procesos = cache.get(_CLAVE_PROCESOS) or {}
+    ahora = time.time()
+    if proceso not in procesos or ahora - procesos[proceso] > TIEMPO_FOTO / 2:
+        procesos = {p: visto for p, visto in procesos.items() if ahora - visto < TIEMPO_FOTO}
+        procesos[proceso] = ahora
+        cache.set(_CLAVE_PROCESOS, procesos, None)
+
+
+def _sumar_fotos():
+    procesos = cache.get(_CLAVE_PROCESOS) or {}
+    fotos = cache.get_many([_PREFIJO_FOTO + p for p in procesos]).values()
+    contadores = defaultdict(float)
+    histogramas = {}
+    for foto in fotos:
+        for clave, valor in foto['contadores'].items():
+            contadores[clave] += valor
+        for clave, (cantidades, suma, cantidad) in foto['histogramas'].items():
+            total = histogramas.setdefault(clave, [[0] * (len(LIMITES) + 1), 0.0, 0])
+            total[0] = [a + b for a, b in zip(total[0], cantidades)]
+            total[1] += suma
+            total[2] += cantidad
+    return contadores, histogramas
+
+
+# -----------------------------------------------------------------------------
+# Exposición
+# -----------------------------------------------------------------------------
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _serie(nombre, etiquetas):
+    if not etiquetas:
+        return nombre
+    return nombre + '{' + ','.join(f'{k}="{_escapar(v)}"' for k, v in etiquetas) + '}'
+
+
+def _numero(valor):
+    return str(int(valor)) if float(valor).is_integer() else repr(float(valor))
+
+
+def texto_prometheus():
+    volcar()
+    contadores, histogramas = _sumar_fotos()
+    for grupo, datos in cache_compartido.estadisticas().items():
+        contadores[('inventario_cache_requests_total', (('grupo', grupo), ('resultado', 'acierto')))] = datos['aciertos']
+        contadores[('inventario_cache_requests_total', (('grupo', grupo), ('resultado', 'fallo')))] = datos['fallos']
+
+    por_nombre = defaultdict(list)
+    for (nombre, etiquetas), valor in contadores.items():
+        por_nombre[nombre].append((etiquetas, valor))
+    for (nombre, etiquetas), valor in histogramas.items():
+        por_nombre[nombre].append((etiquetas, valor))
+
+    lineas = []
+    for nombre in sorted(por_nombre):
+        tipo, ayuda = AYUDA.get(nombre, ('untyped', ''))
+        lineas.append(f"# HELP {nombre} {ayuda}")
+        lineas.append(f"# TYPE {nombre} {tipo}")
+        for etiquetas, valor in sorted(por_nombre[nombre]):
+            if tipo != 'histogram':
+                lineas.append(f"{_serie(nombre, etiquetas)} {_numero(valor)}")
+                continue
+            cantidades, suma, cantidad = valor
+            acumulado = 0
+            for limite, cantidad_limite in zip(LIMITES + ('+Inf',), cantidades):
+                acumulado += cantidad_limite
+                lineas.append(f"{_serie(nombre + '_bucket', etiquetas + (('le', limite),))} {acumulado}")
+            lineas.append(f"{_serie(nombre + '_sum', etiquetas)} {_numero(suma)}")
+            lineas.append(f"{_serie(nombre + '_count', etiquetas)} {cantidad}")
+    return '\n'.join(lineas) + '\n'
+
+
+def metricas_view(request):
+    """
+    /metrics: para staff logueado o con `Authorization: Bearer <METRICAS_TOKEN>`
+    (lo que usa el scraper de Prometheus).
+    """
+    token = getattr(settings, 'METRICAS_TOKEN', '')
+    enviado = request.headers.get('Authorization', '')
+    autorizado = bool(token) and hmac.compare_digest(enviado.encode(), f"Bearer {token}".encode())
+    if not autorizado and not (request.user.is_authenticated and request.user.is_staff):
+        return HttpResponseForbidden()
+    return HttpResponse(texto_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# -----------------------------------------------------------------------------
+# Middleware
+# -----------------------------------------------------------------------------
+
+class MetricasMiddleware:
+    """Mide cada request; va justo después de SecurityMiddleware."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        consultas = [0, 0.0]
+
+        def medir_consulta(execute, sql, params, many, context):
+            inicio = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                consultas[0] += 1
+                consultas[1] += time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        with connection.execute_wrapper(medir_consulta):
+            response = self.get_response(request)
+        segundos = time.perf_counter() - inicio
+
+        coincidencia = getattr(request, 'resolver_match', None)
+        vista = coincidencia.view_name if coincidencia else '<sin_ruta>'
+        if vista != 'metricas':
+            registrar_request(
+                vista,
+                request.method,
+                response.status_code,
+                segundos,
+                consultas[0],
+                consultas[1],
+                getattr(request, '_metricas_plantilla', 0.0),
+                None if response.streaming else len(response.content),
+            )
+        return response
+
+    def process_template_response(self, request, response):
+        # Se llama justo antes de response.render(); el callback, justo después
+        inicio = time.perf_counter()
+
+        def al_renderizar(respuesta):
+            request._metricas_plantilla = time.perf_counter() - inicio
+
+        response.add_post_render_callback(al_renderizar)
+        return response
@@ -0,0 +1,298 @@
+"""
+Paginación para listados grandes.
+
+- Por clave (keyset / seek): en lugar de OFFSET, cada página continúa desde
+  la clave de orden de la última fila vista, así que la página 1000 cuesta lo
+  mismo que la primera siempre que exista un índice con esas columnas.
+- Con conteo económico: paginación por número de página sin COUNT(*) en
+  cada request (conteo cacheado, o estimado por el planificador en
+  PostgreSQL) y con tamaño de página elegible por el usuario. Con grupos
+  de cache (inventario.cache) también se cachean las filas de cada página
+  hasta que cambie algo del grupo.
+"""
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from inventario import cache as cache_compartido
+
+
+class PaginaKeyset:
+    def __init__(self, objetos, siguiente=None, anterior=None):
+        self.objetos = objetos
+        self.siguiente = siguiente
+        self.anterior = anterior
+
+    @property
+    def tiene_siguiente(self):
+        return self.siguiente is not None
+
+    @property
+    def tiene_anterior(self):
+        return self.anterior is not None
+
+
+def _campos(orden):
+    return [(campo.lstrip('-'), campo.startswith('-')) for campo in orden]
+
+
+def codificar_cursor(objeto, orden):
+    return '|'.join(str(getattr(objeto, nombre)) for nombre, _ in _campos(orden))
+
+
+def decodificar_cursor(cursor, modelo, orden):
+    """Devuelve los valores del cursor convertidos al tipo de cada campo, o None si es inválido."""
+    partes = (cursor or '').split('|')
+    campos = _campos(orden)
+    if len(partes) != len(campos):
+        return None
+    try:
+        return [
+            modelo._meta.get_field('id' if nombre == 'pk' else nombre).to_python(valor)
+            for (nombre, _), valor in zip(campos, partes)
+        ]
+    except Exception:
+        return None
+
+
+def _filtro_posterior(orden, valores, invertir=False):
+    """
+    Condición "la fila viene después de `valores`" para el orden dado.
+    Equivale a la comparación de tuplas (a, b) > (x, y) escrita con Q.
+    """
+    condicion = Q()
+    iguales = Q()
+    for (nombre, descendente), valor in zip(_campos(orden), valores):
+        operador = 'lt' if descendente != invertir else 'gt'
+        condicion |= iguales & Q(**{f'{nombre}__{operador}': valor})
+        iguales &= Q(**{nombre: valor})
+    return condicion
+
+
+def _invertir(orden):
+    return [campo[1:] if campo.startswith('-') else f'-{campo}' for campo in orden]
+
+
+def paginar_keyset(queryset, orden, por_pagina, despues=None, antes=None):
+    """
+    Devuelve una PaginaKeyset con hasta `por_pagina` objetos.
+
+    `orden` es la lista de campos (ej. ['-fecha', '-id']) y debe terminar en
+    una columna única para que el orden sea total. `despues`/`antes` son los
+    cursores recibidos en la URL.
+    """
+    modelo = queryset.model
+    valores_antes = decodificar_cursor(antes, modelo, orden) if antes else None
+    valores_despues = decodificar_cursor(despues, modelo, orden) if despues and not valores_antes else None
+
+    if valores_antes:
+        filas = list(
+            queryset.filter(_filtro_posterior(orden, valores_antes, invertir=True))
+            .order_by(*_invertir(orden))[:por_pagina + 1]
+        )
+        hay_mas = len(filas) > por_pagina
+        objetos = list(reversed(filas[:por_pagina]))
+        anterior = codificar_cursor(objetos[0], orden) if hay_mas and objetos else None
+        siguiente = codificar_cursor(objetos[-1], orden) if objetos else None
+        return PaginaKeyset(objetos, siguiente=siguiente, anterior=anterior)
+
+    if valores_despues:
+        queryset = queryset.filter(_filtro_posterior(orden, valores_despues))
+    filas = list(queryset.order_by(*orden)[:por_pagina + 1])
+    hay_mas = len(filas) > por_pagina
+    objetos = filas[:por_pagina]
+    siguiente = codificar_cursor(objetos[-1], orden) if hay_mas else None
+    anterior = codificar_cursor(objetos[0], orden) if valores_despues and objetos else None
+    return PaginaKeyset(objetos, siguiente=siguiente, anterior=anterior)
+
+
+class KeysetPaginationMixin:
+    """
+    Mixin para ListView/FilterView: reemplaza la paginación por número de
+    página por cursores `?despues=` / `?antes=`.
+    """
+    orden_keyset = ['-pk']
+    por_pagina_keyset = 25
+
+    def get_context_data(self, **kwargs):
+        pagina = paginar_keyset(
+            kwargs.pop('object_list', self.object_list),
+            self.orden_keyset,
+            self.por_pagina_keyset,
+            despues=self.request.GET.get('despues'),
+            antes=self.request.GET.get('antes'),
+        )
+        self.object_list = pagina.objetos
+        context = super().get_context_data(object_list=pagina.objetos, **kwargs)
+        parametros = self.request.GET.copy()
+        parametros.pop('despues', None)
+        parametros.pop('antes', None)
+        context['pagina'] = pagina
+        context['parametros'] = parametros.urlencode()
+        return context
+
+
+class PaginaEconomica(Page):
+    """Página que sabe si hay siguiente sin depender del conteo total."""
+
+    def __init__(self, object_list, number, paginator, hay_siguiente):
+        super().__init__(object_list, number, paginator)
+        self.hay_siguiente = hay_siguiente
+
+    def has_next(self):
+        return self.hay_siguiente
+
+
+class ConteoEstimadoPaginator(Paginator):
+    """
+    Paginator que evita el COUNT(*) por request.
+
+    El total se cachea unos segundos. En PostgreSQL, si el planificador
+    estima más de `umbral_exacto` filas se usa la estimación (`estimado`
+    queda en True). Con `exacto=True` siempre cuenta. Cada página trae una
+    fila de más para saber si hay siguiente, así que un total aproximado no
+    impide llegar al final.
+
+    Con `grupos` (ej. ('productos',)) el conteo y las filas de cada página
+    se guardan en el cache compartido con la versión de esos grupos, así
+    que una escritura los invalida sin esperar `tiempo_cache`.
+    """
+    umbral_exacto = 1000
+    tiempo_cache = 60
+
+    def __init__(self, object_list, per_page, orphans=0, allow_empty_first_page=True, exacto=False, grupos=()):
+        super().__init__(object_list, per_page, orphans=0, allow_empty_first_page=allow_empty_first_page)
+        self.exacto = exacto
+        self.estimado = False
+        self.grupos = tuple(grupos)
+
+    def _huella(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        return hashlib.md5(f"{self.object_list.db}|{sql}|{params!r}".encode('utf-8')).hexdigest()
+
+    def _clave_cache(self):
+        huella = self._huella(self.object_list.order_by())
+        if self.grupos:
+            return cache_compartido.clave('paginacion:conteo', self.grupos, {'sql': huella})
+        return f"paginacion:conteo:{huella}"
+
+    def _filas(self, inferior):
+        queryset = self.object_list[inferior:inferior + self.per_page + 1]
+        if not self.grupos or not hasattr(queryset, 'query'):
+            return list(queryset)
+        return cache_compartido.cachear_queryset(
+            'paginacion:pagina', queryset, self.grupos, {'sql': self._huella(queryset)}, self.tiempo_cache,
+        )
+
+    def _estimar(self):
+        """Filas estimadas por el planificador de PostgreSQL, o None en otras bases."""
+        conexion = connections[self.object_list.db]
+        if conexion.vendor != 'postgresql':
+            return None
+        sql, params = self.object_list.order_by().query.sql_with_params()
+        with conexion.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, 'query'):
+            return len(self.object_list)
+        clave = self._clave_cache()
+        if not self.exacto:
+            guardado = cache.get(clave)
+            if guardado is not None:
+                conteo, self.estimado = guardado
+                return conteo
+            estimacion = self._estimar()
+            if estimacion is not None and estimacion > self.umbral_exacto:
+                self.estimado = True
+                cache.set(clave, (estimacion, True), self.tiempo_cache)
+                return estimacion
+        conteo = self.object_list.count()
+        cache.set(clave, (conteo, False), self.tiempo_cache)
+        return conteo
+
+    def validate_number(self, number):
+        # Sin tope superior: con un total estimado puede haber más páginas
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger("El número de página no es un entero")
+        if number < 1:
+            raise EmptyPage("El número de página es menor a 1")
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        inferior = (number - 1) * self.per_page
+        filas = self._filas(inferior)
+        if not filas and number > 1:
+            raise EmptyPage("Esa página no contiene resultados")
+        hay_siguiente = len(filas) > self.per_page
+        filas = filas[:self.per_page]
+        # Lo que se vio en esta página corrige el total (estimado o cacheado)
+        vistos = inferior + len(filas)
+        if not hay_siguiente and (filas or number == 1):
+            self.__dict__['count'] = vistos
+        elif vistos >= self.count:
+            self.__dict__['count'] = vistos + 1
+        self.__dict__.pop('num_pages', None)
+        return PaginaEconomica(filas, number, self, hay_siguiente)
+
+
+class PaginacionEconomicaMixin:
+    """
+    Mixin para ListView/FilterView con paginación por número de página:
+
+    - conteo cacheado o estimado (ConteoEstimadoPaginator); `?conteo=exacto` lo fuerza.
+    - `columnas_listado`: columnas que carga el listado (.only()).
+    - `?por_pagina=N` entre 1 y `por_pagina_maxima`.
+    - `grupos_cache`: grupos de inventario.cache; si se indican, el conteo y
+      las páginas se cachean hasta que cambie el grupo.
+    """
+    paginator_class = ConteoEstimadoPaginator
+    columnas_listado = None
+    grupos_cache = ()
+    por_pagina_maxima = 100
+    opciones_por_pagina = (10, 25, 50, 100)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.columnas_listado:
+            queryset = queryset.only(*self.columnas_listado)
+        return queryset
+
+    def get_paginate_by(self, queryset):
+        try:
+            por_pagina = int(self.request.GET.get('por_pagina', ''))
+        except ValueError:
+            return self.paginate_by
+        return max(1, min(por_pagina, self.por_pagina_maxima))
+
+    def get_paginator(self, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs):
+        return self.paginator_class(
+            queryset,
+            per_page,
+            allow_empty_first_page=allow_empty_first_page,
+            exacto=self.request.GET.get('conteo') == 'exacto',
+            grupos=self.grupos_cache,
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        parametros = self.request.GET.copy()
+        parametros.pop('page', None)
+        context['parametros'] = parametros.urlencode()
+        parametros.pop('por_pagina', None)
+        context['parametros_sin_tamanio'] = parametros.urlencode()
+        context['opciones_por_pagina'] = [n for n in self.opciones_por_pagina if n <= self.por_pagina_maxima]
+        return context
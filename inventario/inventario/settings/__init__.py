@@ -0,0 +1,20 @@
+"""
+Settings por entorno. DJANGO_ENV elige el perfil:
+
+- dev (por defecto): DEBUG, plantillas sin cachear.
+- prod: DEBUG=False, cargador de plantillas cacheado y fragmentos cacheados.
+
+DJANGO_SETTINGS_MODULE sigue siendo 'inventario.settings'.
+"""
+import os
+
+ENTORNO = os.environ.get('DJANGO_ENV', 'dev')
+
+if ENTORNO == 'prod':
+    from .prod import *  # noqa: F401,F403
+elif ENTORNO == 'dev':
+    from .dev import *  # noqa: F401,F403
+else:
+    from django.core.exceptions import ImproperlyConfigured
+
+    raise ImproperlyConfigured(f"DJANGO_ENV desconocido: {ENTORNO!r} (usar 'dev' o 'prod')")
@@ -0,0 +1,232 @@
+"""
+Configuración común a todos los entornos. dev.py y prod.py la importan y
+ajustan lo propio; el entorno se elige con DJANGO_ENV (ver __init__.py).
+"""
+import os
+from pathlib import Path
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+SECRET_KEY = os.environ.get('SECRET_KEY')
+DEBUG = False
+ALLOWED_HOSTS = os.environ.get('ALLOWED_HOSTS', '').split(',')
+
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'django.contrib.humanize',
+    # Comandos de infraestructura (inventario/management)
+    'inventario',
+    'bootstrap4',
+    'crispy_forms',
+    'crispy_bootstrap4',
+    'productos',
+    'clientes',
+    'ventas',
+    'reportes',
+    'django_extensions',
+    'allauth',
+    'allauth.account',
+    'allauth.socialaccount',
+    'django.contrib.sites',
+    'django_filters',
+]
+
+SITE_ID = 1
+
+
+MIDDLEWARE = [
+    "django.middleware.security.SecurityMiddleware",
+    # Latencia, SQL y render por vista para /metrics (inventario.metricas)
+    "inventario.metricas.MetricasMiddleware",
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    # allauth requiere esta middleware; debe estar presente en MIDDLEWARE
+    "allauth.account.middleware.AccountMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+]
+
+ROOT_URLCONF = 'inventario.urls'
+
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [os.path.join(BASE_DIR, 'templates')],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'inventario.context_processors.fragmentos',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'inventario.wsgi.application'
+
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('POSTGRES_DB'),
+        'USER': os.environ.get('POSTGRES_USER'),
+        'PASSWORD': os.environ.get('POSTGRES_PASSWORD'),    
+        'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+        'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+        # Cada worker (o hilo) reutiliza su conexión hasta DB_CONN_MAX_AGE segundos
+        # y la verifica al empezar cada request. Postgres tiene que admitir
+        # WEB_CONCURRENCY * GUNICORN_THREADS conexiones abiertas (o usar PgBouncer).
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+# DB_POOL=pgbouncer: conectarse a través de PgBouncer en modo transacción
+# (docker-compose --profile pgbouncer). En ese modo cada transacción puede ir
+# a otra conexión del servidor, así que:
+# - sin cursores del lado del servidor (los .iterator() traen por lotes igual);
+# - nada de estado de sesión: SET, advisory locks o LISTEN sólo con alcance de
+#   transacción (set_config(..., true));
+# - select_for_update sólo dentro de transaction.atomic (Django ya lo exige),
+#   como registrar_venta, que además acota la espera del bloqueo.
+DB_POOL = os.environ.get('DB_POOL', '')
+if DB_POOL == 'pgbouncer':
+    DATABASES['default'].update({
+        'HOST': os.environ.get('PGBOUNCER_HOST', 'pgbouncer'),
+        'PORT': os.environ.get('PGBOUNCER_PORT', '6432'),
+        'DISABLE_SERVER_SIDE_CURSORS': True,
+    })
+
+
+# Cache compartido (inventario.cache). CACHE_BACKEND: locmem (por proceso,
+# desarrollo y tests), file (compartido entre procesos de la misma máquina)
+# o redis (CACHE_URL, ej. redis://redis:6379/1).
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('CACHE_URL', 'redis://localhost:6379/1'),
+            'KEY_PREFIX': 'inventario',
+        }
+    }
+elif CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_URL', str(BASE_DIR / 'cache')),
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'inventario',
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
+    }
+
+
+AUTH_PASSWORD_VALIDATORS = [
+    {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
+    {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
+    {'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator'},
+    {'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator'},
+]
+
+
+LANGUAGE_CODE = 'es-ar'
+TIME_ZONE = 'UTC'
+USE_I18N = True
+USE_TZ = True
+
+
+STATIC_URL = 'static/'
+STATICFILES_DIRS = [BASE_DIR / 'static']
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+# Con DEBUG la media la sirve static(); en producción ver inventario.medios
+SERVIR_MEDIA = False
+
+# Facturas PDF prerenderizadas (fuera de MEDIA_ROOT para que no sean públicas)
+FACTURAS_ROOT = BASE_DIR / 'facturas'
+
+# Movimientos de stock de meses cerrados (archive_movimientos), en .jsonl.gz
+ARCHIVO_MOVIMIENTOS_ROOT = BASE_DIR / 'archivo'
+
+# Procesos del pool para trabajo pesado fuera del request (0 = ejecutar en línea)
+TAREAS_WORKERS = int(os.environ.get('TAREAS_WORKERS', '2'))
+
+# Días que muestra el gráfico de ventas cuando no se indica un rango
+VENTAS_GRAFICO_DIAS = 90
+
+# Token para que Prometheus lea /metrics (Authorization: Bearer <token>); sin token, sólo staff
+METRICAS_TOKEN = os.environ.get('METRICAS_TOKEN', '')
+
+# Máximo que una venta espera el bloqueo de sus productos antes de pedir reintentar
+VENTAS_ESPERA_BLOQUEO_MS = 5000
+
+# Segundos que se cachean los fragmentos de plantilla ({% cache TIEMPO_FRAGMENTOS ... %});
+# 0 los desactiva
+TIEMPO_FRAGMENTOS = 0
+
+# Segundos que se cachea cada reporte (además se invalida cuando cambian los datos)
+REPORTES_TIEMPO_CACHE = 15 * 60
+
+# Reposición sugerida (calcular_velocidades): demora del proveedor y días de venta a cubrir
+REPOSICION_DIAS_ENTREGA = 7
+REPOSICION_DIAS_COBERTURA = 30
+
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+CRISPY_ALLOWED_TEMPLATE_PACKS = 'bootstrap4'
+CRISPY_TEMPLATE_PACK = 'bootstrap4'
+
+
+BOOTSTRAP4 = {
+    'include_jquery': True,
+    'set_placeholder': False,
+    'required_css_class': 'required',
+    'error_css_class': 'is-invalid',
+    'success_css_class': 'is-valid',
+}
+
+AUTHENTICATION_BACKENDS = [
+    'django.contrib.auth.backends.ModelBackend',
+    'allauth.account.auth_backends.AuthenticationBackend',
+]
+
+LOGIN_REDIRECT_URL = '/'
+ACCOUNT_LOGOUT_REDIRECT_URL = '/accounts/login/'
+LOGIN_URL = '/accounts/login/'
+
+# allauth: configuración actualizada para evitar warnings de deprecación
+# Elegí el/los método(s) de login: 'username', 'email' o ambos
+ACCOUNT_LOGIN_METHODS = {"username"}          # si querés permitir email también: {"username", "email"}
+
+# Campos que se piden en el signup; el asterisco marca obligatorios según la convención de allauth
+ACCOUNT_SIGNUP_FIELDS = ["email", "username*", "password1*", "password2*"]
+
+# Verificación / comportamiento
+ACCOUNT_EMAIL_VERIFICATION = 'none'          # 'mandatory', 'optional' o 'none'
+
+
+ACCOUNT_SIGNUP_REDIRECT_URL = '/accounts/login/'
+
@@ -0,0 +1,8 @@
+"""Desarrollo: DEBUG y plantillas que se releen en cada request."""
+from .base import *  # noqa: F401,F403
+
+DEBUG = True
+ALLOWED_HOSTS = [host for host in ALLOWED_HOSTS if host] or ['localhost', '127.0.0.1']
+
+# Sin fragmentos cacheados: los cambios en plantillas se ven enseguida
+TIEMPO_FRAGMENTOS = 0
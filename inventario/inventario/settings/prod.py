@@ -0,0 +1,51 @@
+"""
+Producción: DEBUG=False (no se guardan las consultas SQL en memoria),
+plantillas compiladas una sola vez por proceso y fragmentos pesados
+cacheados (filas del listado de productos, ítems del detalle de venta).
+
+Se sirve con gunicorn (gunicorn.conf.py). Los estáticos los sirve WhiteNoise
+desde STATIC_ROOT (`manage.py collectstatic`), con nombres con hash y
+versiones comprimidas; la media, inventario.medios si SERVIR_MEDIA.
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *  # noqa: F401,F403
+
+DEBUG = False
+
+if not SECRET_KEY:
+    raise ImproperlyConfigured("SECRET_KEY es obligatoria en producción.")
+ALLOWED_HOSTS = [host for host in ALLOWED_HOSTS if host]
+
+# Cargador cacheado explícito (requiere APP_DIRS=False) y sin el context processor de debug
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+TEMPLATES[0]['OPTIONS']['context_processors'] = [
+    procesador for procesador in TEMPLATES[0]['OPTIONS']['context_processors']
+    if procesador != 'django.template.context_processors.debug'
+]
+
+# WhiteNoise justo después de SecurityMiddleware, antes de sesiones y auth
+MIDDLEWARE = MIDDLEWARE.copy()
+MIDDLEWARE.insert(MIDDLEWARE.index('django.middleware.security.SecurityMiddleware') + 1,
+                  'whitenoise.middleware.WhiteNoiseMiddleware')
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+}
+# Los archivos con hash en el nombre ya se cachean un año; esto vale para el resto
+WHITENOISE_MAX_AGE = 60 * 60
+
+# Servir MEDIA_ROOT desde Django (docker-compose). Con nginx u otro servidor delante, SERVIR_MEDIA=0
+SERVIR_MEDIA = os.environ.get('SERVIR_MEDIA', '1') == '1'
+
+# Las claves de los fragmentos llevan fecha_actualizacion / id de venta, así
+# que el tiempo sólo limita cuánto ocupan en el cache
+TIEMPO_FRAGMENTOS = int(os.environ.get('TIEMPO_FRAGMENTOS', 60 * 60))
@@ -0,0 +1,81 @@
+"""
+Pool de procesos compartido para trabajo pesado fuera del request
+(render de facturas PDF, procesamiento de imágenes, etc.).
+
+Las funciones que se envían al pool deben ser de nivel de módulo y no tocar
+la base de datos: reciben datos ya preparados y devuelven un resultado que
+el proceso web guarda en el callback `al_terminar`.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_pid = None
+_lock = threading.Lock()
+
+
+def _inicializar_worker():
+    # Con el método 'spawn' el proceso hijo arranca sin Django configurado.
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'inventario.settings')
+        django.setup()
+
+
+def obtener_pool():
+    """Devuelve el pool del proceso actual (se recrea después de un fork) o None si está deshabilitado."""
+    global _pool, _pool_pid
+    workers = getattr(settings, 'TAREAS_WORKERS', 2)
+    if not workers:
+        return None
+    with _lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ProcessPoolExecutor(max_workers=workers, initializer=_inicializar_worker)
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def ejecutar(funcion, *args, al_terminar=None):
+    """
+    Ejecuta `funcion(*args)` en el pool. Si el pool está deshabilitado
+    (TAREAS_WORKERS = 0) se ejecuta en el momento, en el mismo proceso.
+    `al_terminar(resultado)` se llama en el proceso web cuando termina bien.
+    """
+    pool = obtener_pool()
+    if pool is None:
+        resultado = funcion(*args)
+        if al_terminar:
+            al_terminar(resultado)
+        return resultado
+
+    hilo_origen = threading.get_ident()
+
+    def _callback(futuro):
+        try:
+            resultado = futuro.result()
+        except Exception:
+            logger.exception("Falló la tarea en segundo plano %s", funcion.__name__)
+            return
+        if al_terminar:
+            try:
+                al_terminar(resultado)
+            except Exception:
+                logger.exception("Falló el callback de la tarea %s", funcion.__name__)
+            finally:
+                # El callback corre en un hilo interno del pool: no dejamos
+                # conexiones abiertas ahí (salvo que haya corrido en el hilo del request).
+                if threading.get_ident() != hilo_origen:
+                    connections.close_all()
+
+    futuro = pool.submit(funcion, *args)
+    futuro.add_done_callback(_callback)
+    return futuro
@@ -0,0 +1,245 @@
+import os
+import threading
+import time
+import unittest
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.views.generic import ListView
+
+from inventario import cache as cache_compartido, metricas
+from inventario.paginacion import ConteoEstimadoPaginator, KeysetPaginationMixin, PaginacionEconomicaMixin
+from clientes.models import Cliente
+from productos.models import Producto
+
+SECCION = 'inventario_seccion_duration_seconds'
+
+
+class MetricasTests(SimpleTestCase):
+    def setUp(self):
+        metricas._reiniciar_registro()
+        self.addCleanup(metricas._reiniciar_registro)
+
+    def histograma(self, nombre):
+        return metricas._histogramas[(SECCION, (('seccion', nombre),))]
+
+    def test_seccion_compartida_entre_hilos(self):
+        # Como decorador, una sola instancia mide las llamadas de todos los hilos
+        medir = metricas.seccion('prueba')
+        larga_medida, corta_adentro = threading.Event(), threading.Event()
+
+        def larga():
+            with medir:
+                time.sleep(0.2)
+                larga_medida.set()
+                corta_adentro.wait()
+
+        hilo = threading.Thread(target=larga)
+        hilo.start()
+        larga_medida.wait()
+        # Empieza mientras la larga sigue adentro: no tiene que pisar su inicio
+        with medir:
+            corta_adentro.set()
+            hilo.join()
+
+        _, suma, cantidad = self.histograma('prueba')
+        self.assertEqual(cantidad, 2)
+        self.assertGreaterEqual(suma, 0.2)
+
+    def test_seccion_anidada(self):
+        @metricas.seccion('recursiva')
+        def recursiva(nivel):
+            if nivel:
+                recursiva(nivel - 1)
+            else:
+                time.sleep(0.05)
+
+        recursiva(2)
+        _, suma, cantidad = self.histograma('recursiva')
+        self.assertEqual(cantidad, 3)
+        self.assertGreaterEqual(suma, 0.15)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "Requiere fork")
+    def test_el_proceso_hijo_arranca_sin_lo_del_padre(self):
+        metricas.registrar_seccion('padre', 1.0)
+        pid = os.fork()
+        if pid == 0:
+            vacio = not metricas._contadores and not metricas._histogramas and metricas._proceso is None
+            os._exit(0 if vacio else 1)
+        _, estado = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(estado), 0)
+        self.assertEqual(self.histograma('padre')[2], 1)
+
+
+class ProductosPorStock(KeysetPaginationMixin, ListView):
+    model = Producto
+    template_name = 'productos/producto_list.html'
+    orden_keyset = ['stock', '-pk']
+    por_pagina_keyset = 2
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Muchos empates en stock: el cursor tiene que desempatar por pk
+        Producto.objects.bulk_create([
+            Producto(nombre=f'Producto {i}', descripcion='-', precio=Decimal('1.00'), stock=stock, sku=f'K{i}')
+            for i, stock in enumerate([3, 1, 3, 2, 1, 3, 2, 3, 1])
+        ])
+        cls.ordenados = list(Producto.objects.order_by('stock', '-pk').values_list('pk', flat=True))
+
+    def pagina(self, **parametros):
+        respuesta = ProductosPorStock.as_view()(RequestFactory().get('/', parametros))
+        return respuesta.context_data['pagina']
+
+    def test_hacia_adelante_sin_huecos_ni_repetidos(self):
+        vistos, pagina = [], self.pagina()
+        self.assertFalse(pagina.tiene_anterior)
+        while True:
+            vistos += [p.pk for p in pagina.objetos]
+            if not pagina.tiene_siguiente:
+                break
+            pagina = self.pagina(despues=pagina.siguiente)
+        self.assertEqual(vistos, self.ordenados)
+
+    def test_hacia_atras_sin_huecos_ni_repetidos(self):
+        pagina = self.pagina()
+        while pagina.tiene_siguiente:
+            pagina = self.pagina(despues=pagina.siguiente)
+        vistos = []
+        while True:
+            vistos = [p.pk for p in pagina.objetos] + vistos
+            if not pagina.tiene_anterior:
+                break
+            pagina = self.pagina(antes=pagina.anterior)
+        self.assertEqual(vistos, self.ordenados)
+
+    def test_cursor_invalido_vuelve_al_principio(self):
+        self.assertEqual([p.pk for p in self.pagina(despues='x|y|z').objetos], self.ordenados[:2])
+
+
+class ProductosPorPagina(PaginacionEconomicaMixin, ListView):
+    model = Producto
+    template_name = 'productos/producto_list.html'
+    ordering = ['pk']
+    paginate_by = 5
+    por_pagina_maxima = 20
+
+
+class ConteoEstimadoTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.crear(12)
+
+    def crear(self, cantidad):
+        inicio = Producto.objects.count()
+        Producto.objects.bulk_create([
+            Producto(nombre=f'Producto {i}', descripcion='-', precio=Decimal('1.00'), sku=f'C{i}')
+            for i in range(inicio, inicio + cantidad)
+        ])
+
+    def paginador(self, **opciones):
+        return ConteoEstimadoPaginator(Producto.objects.order_by('pk'), 5, **opciones)
+
+    def test_conteo_cacheado(self):
+        self.assertEqual(self.paginador().count, 12)
+        self.crear(1)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.paginador().count, 12)
+        # El exacto cuenta siempre y deja el total al día para los demás
+        self.assertEqual(self.paginador(exacto=True).count, 13)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.paginador().count, 13)
+
+    def test_conteo_viejo_no_impide_llegar_al_final(self):
+        self.assertEqual(self.paginador().num_pages, 3)
+        self.crear(4)
+        paginador = self.paginador()
+        pagina = paginador.page(3)
+        self.assertTrue(pagina.has_next())
+        self.assertEqual(paginador.num_pages, 4)
+        ultima = paginador.page(4)
+        self.assertFalse(ultima.has_next())
+        self.assertEqual((len(ultima), paginador.count), (1, 16))
+
+    def test_con_grupos_se_invalida_al_escribir(self):
+        self.assertEqual(self.paginador(grupos=('productos',)).count, 12)
+        self.crear(1)
+        self.assertEqual(self.paginador(grupos=('productos',)).count, 12)
+        cache_compartido.invalidar('productos')
+        self.assertEqual(self.paginador(grupos=('productos',)).count, 13)
+
+    def test_parametros_del_listado(self):
+        def paginador(**parametros):
+            respuesta = ProductosPorPagina.as_view()(RequestFactory().get('/', parametros))
+            return respuesta.context_data['paginator']
+
+        self.assertEqual((paginador().per_page, paginador().exacto), (5, False))
+        self.assertTrue(paginador(conteo='exacto').exacto)
+        self.assertEqual(paginador(por_pagina='1000').per_page, 20)
+        self.assertEqual(paginador(por_pagina='0').per_page, 1)
+        self.assertEqual(paginador(por_pagina='x').per_page, 5)
+
+
+class CacheCompartidoTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        cache_compartido._locales.clear()
+        self.llamadas = 0
+
+        @cache_compartido.cachear_vista('prueba', ('ventas',))
+        def vista(request):
+            self.llamadas += 1
+            if 'falla' in request.GET:
+                return HttpResponse(status=500)
+            return JsonResponse({'llamada': self.llamadas})
+
+        self.vista = vista
+
+    def pedir(self, metodo='get', **parametros):
+        return self.vista(getattr(RequestFactory(), metodo)('/', parametros))
+
+    def test_cachear_vista_hasta_invalidar_el_grupo(self):
+        self.pedir(a='1', b='2')
+        # Mismos parámetros en otro orden y con vacíos: misma entrada
+        respuesta = self.pedir(b='2', a='1', c='')
+        self.assertEqual((self.llamadas, respuesta.content), (1, b'{"llamada": 1}'))
+        self.pedir(a='2')
+        self.assertEqual(self.llamadas, 2)
+
+        cache_compartido.invalidar('clientes')
+        self.pedir(a='1', b='2')
+        self.assertEqual(self.llamadas, 2)
+        cache_compartido.invalidar('ventas')
+        self.assertEqual(self.pedir(a='1', b='2').content, b'{"llamada": 3}')
+
+    def test_no_cachea_errores_ni_post(self):
+        self.pedir(falla='1')
+        self.pedir(falla='1')
+        self.pedir('post')
+        self.pedir('post')
+        self.assertEqual(self.llamadas, 4)
+
+    def test_invalida_al_confirmar_la_transaccion(self):
+        antes = cache_compartido.version('clientes')
+        with self.captureOnCommitCallbacks(execute=True):
+            Cliente.objects.create(
+                nombre='Ana', apellido='Pérez', documento='1', email='a@example.com', telefono='1', direccion='-',
+            )
+            self.assertEqual(cache_compartido.version('clientes'), antes)
+        self.assertGreater(cache_compartido.version('clientes'), antes)
+
+    def test_estadisticas_por_grupo(self):
+        self.pedir()
+        self.pedir()
+        self.pedir()
+        cache_compartido.obtener('otra', ('ventas', 'productos'), lambda: 1)
+
+        estadisticas = cache_compartido.estadisticas()
+        self.assertEqual(estadisticas['ventas'], {'aciertos': 2, 'fallos': 2, 'ratio': 0.5})
+        self.assertEqual(estadisticas['productos'], {'aciertos': 0, 'fallos': 1, 'ratio': 0.0})
+        self.assertEqual(estadisticas['clientes'], {'aciertos': 0, 'fallos': 0, 'ratio': None})
+        # Lo ya volcado no se cuenta dos veces
+        self.assertEqual(cache_compartido.estadisticas(), estadisticas)
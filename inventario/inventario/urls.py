@@ -1,9 +1,12 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static      
 from django.contrib.auth import views as auth_views
 from django.views.generic import TemplateView
+from inventario.cache import estadisticas_json
+from inventario.medios import servir_media
+from inventario.metricas import metricas_view
 from ventas.views import generar_factura_pdf, logout_view
 
 urlpatterns = [
@@ -13,12 +16,17 @@ urlpatterns = [
     path('productos/', include('productos.urls')),
     path('clientes/', include('clientes.urls')),
     path('ventas/', include('ventas.urls')),
+    path('reportes/', include('reportes.urls')),
     path('accounts/login/', auth_views.LoginView.as_view(template_name='registration/login.html'), name='login'),
     path('accounts/logout/', logout_view, name='logout'),
     path('accounts/', include('allauth.urls')),
     path('factura/<int:venta_id>/pdf/', generar_factura_pdf, name='factura_pdf'),
+    path('cache/estadisticas/', estadisticas_json, name='cache_estadisticas'),
+    path('metrics', metricas_view, name='metricas'),
 ]
 
 
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+elif settings.SERVIR_MEDIA:
+    urlpatterns += [re_path(rf'^{settings.MEDIA_URL.lstrip("/")}(?P<path>.*)$', servir_media)]
@@ -0,0 +1,46 @@
+from django import forms
+from django.urls import reverse
+
+
+class AutocompleteSelect(forms.Select):
+    """
+    Select para ModelChoiceField que sólo renderiza la opción elegida.
+    Las demás opciones se buscan en el servidor mientras el usuario escribe
+    (ver static/js/autocompletar.js), así que el HTML y las consultas no
+    crecen con el tamaño de la tabla.
+    """
+
+    def __init__(self, url_name, attrs=None, minimo=1):
+        super().__init__(attrs)
+        self.url_name = url_name
+        self.minimo = minimo
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs']['data-autocompletar'] = reverse(self.url_name)
+        context['widget']['attrs']['data-minimo'] = self.minimo
+        return context
+
+    def _opciones_seleccionadas(self, value):
+        iterador = self.choices
+        field = getattr(iterador, 'field', None)
+        if field is None:
+            return list(iterador)
+
+        opciones = [('', field.empty_label)] if field.empty_label is not None else []
+        valores = [v for v in value if v not in (None, '')]
+        if valores:
+            try:
+                seleccionados = iterador.queryset.filter(pk__in=valores)
+                opciones += [(obj.pk, field.label_from_instance(obj)) for obj in seleccionados]
+            except (ValueError, TypeError):
+                pass
+        return opciones
+
+    def optgroups(self, name, value, attrs=None):
+        choices = self.choices
+        try:
+            self.choices = self._opciones_seleccionadas(value)
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = choices
@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class ProductosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'productos'
+
+    def ready(self):
+        from django.db.models.signals import post_delete
+        from inventario.cache import invalidar_al_guardar
+        from .catalogo import registrar_eliminado
+        from .models import MovimientoStock, Producto
+
+        # Las escrituras masivas (libro de stock, precios, importación) invalidan por su cuenta
+        invalidar_al_guardar(Producto, 'productos', 'valuacion', 'busqueda')
+        invalidar_al_guardar(MovimientoStock, 'productos', 'movimientos')
+        # Lápidas para el catálogo versionado de la pantalla de ventas
+        post_delete.connect(registrar_eliminado, sender=Producto, dispatch_uid='productos_catalogo_eliminado')
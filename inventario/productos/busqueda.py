@@ -0,0 +1,131 @@
+"""
+Búsqueda de productos por nombre, SKU y descripción.
+
+Cada producto guarda en `busqueda` su texto normalizado (minúsculas y sin
+acentos), así "torrontes" encuentra "Torrontés". Sobre esa columna:
+
+- PostgreSQL: índice GIN con pg_trgm, que resuelve los LIKE '%...%' sin
+  recorrer la tabla, y orden por similitud de trigramas.
+- Otras bases (SQLite en desarrollo): índice invertido en memoria por
+  proceso. Se reconstruye sólo cuando cambia el texto buscable (grupo
+  'busqueda' de inventario.cache: altas, bajas y ediciones de productos,
+  importación, más la cantidad y el último id de productos para ver las
+  altas y bajas de la transacción en curso), no con cada venta o cambio de
+  stock. Devuelve a lo sumo MAXIMO_RESULTADOS ids, los que coinciden con
+  más palabras completas.
+
+Un SKU exacto se resuelve primero por el índice único de `sku`.
+"""
+import bisect
+import heapq
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import Count, Max
+
+from inventario import cache as cache_compartido
+
+MAXIMO_RESULTADOS = 500
+
+_NO_ALFANUMERICO = re.compile(r'[^0-9a-z]+')
+
+
+def normalizar_texto(*partes):
+    texto = ' '.join(p for p in partes if p)
+    texto = unicodedata.normalize('NFKD', texto)
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+    return ' '.join(_NO_ALFANUMERICO.sub(' ', texto).split())
+
+
+class IndiceInvertido:
+    """Índice token -> ids con búsqueda por prefijo (bisect sobre los tokens ordenados)."""
+
+    def __init__(self, filas):
+        postings = defaultdict(set)
+        for pk, texto in filas:
+            for token in set((texto or '').split()):
+                postings[token].add(pk)
+        self.tokens = sorted(postings)
+        self.postings = postings
+
+    def _ids_con_prefijo(self, prefijo):
+        ids = set()
+        inicio = bisect.bisect_left(self.tokens, prefijo)
+        for token in self.tokens[inicio:]:
+            if not token.startswith(prefijo):
+                break
+            ids |= self.postings[token]
+        return ids
+
+    def buscar(self, tokens):
+        resultado = None
+        # Primero los tokens más largos: suelen ser los más selectivos
+        for token in sorted(tokens, key=len, reverse=True):
+            ids = self._ids_con_prefijo(token)
+            resultado = ids if resultado is None else resultado & ids
+            if not resultado:
+                return set()
+        return resultado or set()
+
+    def mejores(self, tokens, limite):
+        """Los `limite` ids que coinciden, primero los que tienen más tokens completos (no sólo prefijos)."""
+        ids = self.buscar(tokens)
+        completos = [self.postings.get(token, ()) for token in tokens]
+        return heapq.nsmallest(limite, ids, key=lambda pk: (-sum(pk in c for c in completos), pk))
+
+
+_indice = None
+_indice_version = None
+_indice_lock = threading.Lock()
+
+
+def _indice_en_memoria():
+    global _indice, _indice_version
+    from .models import Producto
+
+    # El grupo se invalida al confirmar: la cantidad y el último id cubren
+    # las altas y bajas que todavía no confirmaron
+    version = (
+        cache_compartido.version('busqueda'),
+        *Producto.objects.aggregate(cantidad=Count('pk'), ultimo=Max('pk')).values(),
+    )
+    with _indice_lock:
+        if _indice is None or _indice_version != version:
+            _indice = IndiceInvertido(Producto.objects.values_list('pk', 'busqueda').iterator())
+            _indice_version = version
+        return _indice
+
+
+def buscar_productos(queryset, consulta, limite=MAXIMO_RESULTADOS):
+    """
+    Filtra (y en PostgreSQL ordena por relevancia) `queryset` según la
+    consulta. Con el índice en memoria se filtra por los `limite` ids mejor
+    rankeados.
+    """
+    consulta = (consulta or '').strip()
+    if not consulta:
+        return queryset
+
+    # Camino rápido: SKU exacto
+    por_sku = queryset.filter(sku__in={consulta, consulta.upper()})
+    if por_sku.exists():
+        return por_sku
+
+    normalizada = normalizar_texto(consulta)
+    tokens = normalizada.split()
+    if not tokens:
+        return queryset.none()
+
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import TrigramSimilarity
+
+        for token in tokens:
+            queryset = queryset.filter(busqueda__contains=token)
+        return queryset.annotate(
+            relevancia=TrigramSimilarity('busqueda', normalizada),
+        ).order_by('-relevancia', 'nombre')
+
+    return queryset.filter(pk__in=_indice_en_memoria().mejores(tokens, limite))
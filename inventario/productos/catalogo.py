@@ -0,0 +1,133 @@
+"""
+Snapshot versionado del catálogo (precio y stock por producto) para la
+pantalla de ventas.
+
+La versión es la última `fecha_actualizacion` del catálogo en microsegundos.
+Toda escritura de precio o stock debe actualizar esa columna (los `save()`
+lo hacen solos por `auto_now`; los `update()` masivos tienen que pasarla).
+Con la versión que ya tiene, el navegador pide sólo los productos que
+cambiaron desde entonces, más los ids borrados (lápidas de
+ProductoEliminado) para sacarlos de su copia en localStorage.
+
+La fecha se toma antes de confirmar, así que un lote largo (una importación)
+puede confirmar con fechas anteriores a una versión que el navegador ya vio;
+por eso el delta repite los últimos MARGEN_DELTA. Las lápidas se guardan
+RETENCION_ELIMINADOS; una versión más vieja recibe el catálogo completo.
+"""
+import hashlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db.models import Max
+from django.utils import timezone
+
+from .busqueda import buscar_productos
+
+from .models import Producto, ProductoEliminado
+
+# Margen para cubrir transacciones que confirman con una fecha anterior a la
+# última versión vista (un lote de importación tarda minutos, no segundos).
+# Un producto repetido en el delta no molesta.
+MARGEN_DELTA = timedelta(minutes=15)
+RETENCION_ELIMINADOS = timedelta(days=30)
+TIEMPO_CACHE = 60 * 60
+
+
+def version_catalogo():
+    fechas = [
+        Producto.objects.aggregate(ultima=Max('fecha_actualizacion'))['ultima'],
+        ProductoEliminado.objects.aggregate(ultima=Max('fecha'))['ultima'],
+    ]
+    fechas = [fecha for fecha in fechas if fecha]
+    return int(max(fechas).timestamp() * 1_000_000) if fechas else 0
+
+
+def _fecha_de_version(version):
+    return datetime.fromtimestamp(version / 1_000_000, tz=dt_timezone.utc)
+
+
+def _serializar(filas):
+    return {str(pk): [float(precio), stock] for pk, precio, stock in filas}
+
+
+def snapshot_completo(version=None):
+    """Todos los productos con stock, cacheado por versión."""
+    version = version if version is not None else version_catalogo()
+    clave = f"catalogo:snapshot:{version}"
+    datos = cache.get(clave)
+    if datos is None:
+        filas = Producto.objects.filter(stock__gt=0).values_list('pk', 'precio', 'stock').order_by()
+        datos = {'version': version, 'completo': True, 'productos': _serializar(filas)}
+        cache.set(clave, datos, TIEMPO_CACHE)
+    return datos
+
+
+def admite_delta(desde, version):
+    """Si la versión `desde` del navegador se puede poner al día con un delta."""
+    limite = timezone.now() - RETENCION_ELIMINADOS + MARGEN_DELTA
+    return 0 < desde <= version and _fecha_de_version(desde) > limite
+
+
+def snapshot_delta(desde, version=None):
+    """
+    Productos modificados desde la versión `desde` (incluye los que quedaron
+    sin stock) e ids de los borrados en ese lapso.
+    """
+    version = version if version is not None else version_catalogo()
+    corte = _fecha_de_version(desde) - MARGEN_DELTA
+    filas = (
+        Producto.objects
+        .filter(fecha_actualizacion__gt=corte)
+        .values_list('pk', 'precio', 'stock')
+        .order_by()
+    )
+    eliminados = ProductoEliminado.objects.filter(fecha__gt=corte).values_list('producto_id', flat=True)
+    return {
+        'version': version,
+        'completo': False,
+        'productos': _serializar(filas),
+        'eliminados': [str(pk) for pk in eliminados],
+    }
+
+
+def registrar_eliminado(sender, instance, **kwargs):
+    """post_delete de Producto: deja la lápida y purga las vencidas."""
+    ProductoEliminado.objects.update_or_create(producto_id=instance.pk, defaults={'fecha': timezone.now()})
+    ProductoEliminado.objects.filter(fecha__lt=timezone.now() - RETENCION_ELIMINADOS).delete()
+
+
+LIMITE_AUTOCOMPLETAR = 20
+TIEMPO_CACHE_AUTOCOMPLETAR = 5 * 60
+
+
+def normalizar_consulta(consulta):
+    return ' '.join((consulta or '').lower().split())
+
+
+def autocompletar_productos(consulta):
+    """
+    Productos con stock que coinciden con la consulta (ver productos.busqueda).
+    Resultado acotado y cacheado por consulta y versión del catálogo.
+    """
+    consulta = normalizar_consulta(consulta)
+    if not consulta:
+        return []
+    version = version_catalogo()
+    clave = 'catalogo:autocompletar:{}:{}'.format(version, hashlib.md5(consulta.encode('utf-8')).hexdigest())
+    resultados = cache.get(clave)
+    if resultados is None:
+        filas = (
+            buscar_productos(Producto.objects.filter(stock__gt=0), consulta)
+            .values('pk', 'nombre', 'sku', 'precio', 'stock')[:LIMITE_AUTOCOMPLETAR]
+        )
+        resultados = [
+            {
+                'id': fila['pk'],
+                'texto': f"{fila['nombre']} ({fila['sku']})",
+                'precio': float(fila['precio']),
+                'stock': fila['stock'],
+            }
+            for fila in filas
+        ]
+        cache.set(clave, resultados, TIEMPO_CACHE_AUTOCOMPLETAR)
+    return resultados
@@ -0,0 +1,218 @@
+"""
+Checkpoints y conciliación del stock contra el libro de movimientos.
+
+El stock esperado de un producto es el del último checkpoint más los
+movimientos posteriores (por id, que es el orden en que los aplicó el libro):
+si hay un ajuste, el stock pasa a ser su cantidad y se suman sólo los
+movimientos siguientes. Todo se calcula para todos los productos en una sola
+consulta con subconsultas correlacionadas.
+
+    conciliar()                       # [(producto_id, stock, esperado), ...] con diferencias
+    conciliar(corregir=True)          # además lleva Producto.stock al valor esperado
+    crear_checkpoints()
+    crear_checkpoints_apertura()      # toma el stock actual de los productos sin checkpoint
+    stock_en_fecha(fecha)             # {producto_id: stock} a esa fecha
+
+Un libro negativo (más salidas que stock según los movimientos) no se
+corrige: es una anomalía que hay que revisar a mano y se informa aparte.
+La migración 0018 guardó un checkpoint de apertura con el stock de cada
+producto existente, que antes se podía editar sin registrar movimientos.
+"""
+from datetime import timedelta
+
+from django.db import models, transaction
+from django.db.models import Case, ExpressionWrapper, F, IntegerField, Max, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from inventario.cache import invalidar_al_confirmar
+from .models import MovimientoStock, Producto, StockCheckpoint
+
+# Antigüedad a partir de la cual un movimiento se da por confirmado (ver
+# _ultimo_movimiento_confirmado). Una transacción del libro dura segundos.
+MARGEN_CONFIRMACION = timedelta(minutes=5)
+
+
+def anotar_stock_esperado(queryset, fecha=None, hasta_movimiento=None):
+    """
+    Anota `stock_esperado` en un queryset de productos. Con `fecha` se
+    calcula el stock a esa fecha; con `hasta_movimiento` se ignoran los
+    movimientos de id mayor.
+    """
+    checkpoints = StockCheckpoint.objects.filter(producto=OuterRef('pk'))
+    movimientos = MovimientoStock.objects.filter(producto=OuterRef('pk')).order_by()
+    if fecha is not None:
+        checkpoints = checkpoints.filter(fecha__lte=fecha)
+        movimientos = movimientos.filter(fecha__lte=fecha)
+    if hasta_movimiento is not None:
+        checkpoints = checkpoints.filter(ultimo_movimiento_id__lte=hasta_movimiento)
+        movimientos = movimientos.filter(id__lte=hasta_movimiento)
+    checkpoints = checkpoints.order_by('-ultimo_movimiento_id', '-id')
+
+    ultimo_ajuste = movimientos.filter(tipo='ajuste').order_by('-id')
+    suma = (
+        movimientos.filter(id__gt=OuterRef('desde_movimiento'))
+        .exclude(tipo='ajuste')
+        .values('producto')
+        .annotate(total=Sum(Case(
+            When(tipo='entrada', then=F('cantidad')),
+            default=-F('cantidad'),
+            output_field=IntegerField(),
+        )))
+        .values('total')
+    )
+    return (
+        queryset
+        .annotate(
+            base_movimiento=Coalesce(
+                Subquery(checkpoints.values('ultimo_movimiento_id')[:1]), Value(0),
+                output_field=models.BigIntegerField(),
+            ),
+            base_stock=Coalesce(
+                Subquery(checkpoints.values('stock')[:1]), Value(0),
+                output_field=IntegerField(),
+            ),
+            ajuste_movimiento=Coalesce(
+                Subquery(ultimo_ajuste.values('id')[:1]), Value(0),
+                output_field=models.BigIntegerField(),
+            ),
+            ajuste_stock=Subquery(ultimo_ajuste.values('cantidad')[:1]),
+        )
+        .annotate(
+            # Se parte del checkpoint o del último ajuste, el que sea posterior
+            desde_movimiento=Greatest('ajuste_movimiento', 'base_movimiento'),
+            desde_stock=Case(
+                When(ajuste_movimiento__gt=F('base_movimiento'), then=F('ajuste_stock')),
+                default=F('base_stock'),
+                output_field=IntegerField(),
+            ),
+        )
+        .annotate(
+            stock_esperado=ExpressionWrapper(
+                F('desde_stock') + Coalesce(Subquery(suma), Value(0)),
+                output_field=IntegerField(),
+            ),
+        )
+    )
+
+
+def conciliar(corregir=False):
+    """
+    Devuelve [(producto_id, stock, esperado)] de los productos cuyo stock no
+    coincide con el libro. Con `corregir=True` los bloquea, recalcula y
+    ajusta Producto.stock (y stock_bajo) al valor esperado, salvo los de
+    libro negativo (ver anomalias()).
+    """
+    diferencias = _diferencias(Producto.objects.all())
+    if not corregir or not diferencias:
+        return diferencias
+
+    with transaction.atomic():
+        ids = list(
+            Producto.objects.select_for_update()
+            .filter(id__in=[pid for pid, _, _ in diferencias])
+            .order_by('id')
+            .values_list('id', flat=True)
+        )
+        # Recalculado bajo bloqueo: pudo haber movimientos entre medio
+        diferencias = _diferencias(Producto.objects.filter(id__in=ids))
+        esperados = {pid: esperado for pid, _, esperado in diferencias if esperado >= 0}
+        if esperados:
+            Producto.objects.filter(id__in=esperados).update(
+                stock=Case(
+                    *[When(id=pid, then=Value(esperado)) for pid, esperado in esperados.items()],
+                    output_field=models.PositiveIntegerField(),
+                ),
+                stock_bajo=Case(
+                    *[When(id=pid, stock_minimo__gt=esperado, then=Value(True)) for pid, esperado in esperados.items()],
+                    default=Value(False),
+                    output_field=models.BooleanField(),
+                ),
+                fecha_actualizacion=timezone.now(),
+            )
+            invalidar_al_confirmar('productos', 'valuacion')
+    return diferencias
+
+
+def _diferencias(queryset):
+    filas = (
+        anotar_stock_esperado(queryset)
+        .exclude(stock=F('stock_esperado'))
+        .order_by('id')
+        .values_list('id', 'stock', 'stock_esperado')
+    )
+    return list(filas)
+
+
+def anomalias(diferencias):
+    """Las diferencias con libro negativo: no se corrigen solas."""
+    return [fila for fila in diferencias if fila[2] < 0]
+
+
+def _ultimo_movimiento_confirmado():
+    """
+    Id del último movimiento tal que todos los anteriores ya confirmaron.
+
+    Un Max('id') suelto puede dejar afuera movimientos de id menor que todavía
+    no confirmaron. Los ids se asignan en orden de inserción, así que si se
+    toma el último movimiento con más de MARGEN_CONFIRMACION de antigüedad,
+    uno anterior pendiente sería de una transacción abierta hace más que eso,
+    y las del libro duran segundos. No bloquea productos (no frena las ventas)
+    y recorre hacia atrás por la clave primaria sólo los movimientos recientes.
+    """
+    limite = timezone.now() - MARGEN_CONFIRMACION
+    ultimo = MovimientoStock.objects.filter(fecha__lte=limite).order_by('-id').values_list('id', flat=True).first()
+    return ultimo or 0
+
+
+def crear_checkpoints(fecha=None):
+    """
+    Guarda un checkpoint por producto con el stock según el libro hasta el
+    último movimiento confirmado (los de los últimos MARGEN_CONFIRMACION
+    quedan para el próximo). Los productos con libro negativo quedan sin
+    checkpoint. Devuelve la cantidad creada.
+    """
+    fecha = fecha or timezone.now()
+    ultimo = _ultimo_movimiento_confirmado()
+    filas = (
+        anotar_stock_esperado(Producto.objects.all(), hasta_movimiento=ultimo)
+        .filter(stock_esperado__gte=0)
+        .order_by('id')
+        .values_list('id', 'stock_esperado')
+    )
+    checkpoints = [
+        StockCheckpoint(producto_id=pid, fecha=fecha, stock=esperado, ultimo_movimiento_id=ultimo)
+        for pid, esperado in filas.iterator()
+    ]
+    StockCheckpoint.objects.bulk_create(checkpoints, batch_size=1000)
+    return len(checkpoints)
+
+
+def crear_checkpoints_apertura(fecha=None):
+    """
+    Checkpoint con el Producto.stock actual para los productos que no tienen
+    ninguno: da por bueno ese stock como punto de partida del libro. Devuelve
+    la cantidad creada.
+    """
+    fecha = fecha or timezone.now()
+    with transaction.atomic():
+        stocks = list(
+            Producto.objects.select_for_update()
+            .filter(checkpoints__isnull=True)
+            .order_by('id')
+            .values_list('id', 'stock')
+        )
+        # Con los productos bloqueados, sus movimientos ya confirmaron
+        ultimo = MovimientoStock.objects.aggregate(ultimo=Max('id'))['ultimo'] or 0
+        StockCheckpoint.objects.bulk_create(
+            [StockCheckpoint(producto_id=pid, fecha=fecha, stock=stock, ultimo_movimiento_id=ultimo) for pid, stock in stocks],
+            batch_size=1000,
+        )
+    return len(stocks)
+
+
+def stock_en_fecha(fecha, productos=None):
+    """{producto_id: stock} a la fecha indicada, según checkpoints y movimientos."""
+    queryset = Producto.objects.all() if productos is None else Producto.objects.filter(pk__in=productos)
+    filas = anotar_stock_esperado(queryset, fecha=fecha).order_by('id').values_list('id', 'stock_esperado')
+    return dict(filas)
@@ -1,27 +1,48 @@
 # productos/filters.py
+from datetime import datetime, time, timedelta
+
 import django_filters
+from django import forms
 from django.db import models as dj_models
-from .models import Producto
+from django.utils import timezone
+from .models import Producto, MovimientoStock
+from .busqueda import buscar_productos
 
 class ProductoFilter(django_filters.FilterSet):
     q = django_filters.CharFilter(method='filter_q', label='Buscar')
     stock_bajo = django_filters.BooleanFilter(method='filter_stock_bajo', label='Stock bajo')
 
     def filter_q(self, queryset, name, value):
-        value = (value or "").strip()
-        if not value:
-            return queryset
-        return queryset.filter(
-            dj_models.Q(nombre__icontains=value) |
-            dj_models.Q(descripcion__icontains=value) |
-            dj_models.Q(sku__icontains=value)
-        )
+        return buscar_productos(queryset, value)
 
     def filter_stock_bajo(self, queryset, name, value):
         if value:
-            return queryset.filter(stock__lt=dj_models.F('stock_minimo'))
+            return queryset.filter(stock_bajo=True)
         return queryset
 
     class Meta:
         model = Producto
         fields = ['q', 'stock_bajo']
+
+
+class MovimientoStockFilter(django_filters.FilterSet):
+    tipo = django_filters.ChoiceFilter(choices=MovimientoStock.TIPO_CHOICES, label='Tipo')
+    desde = django_filters.DateFilter(
+        method='filter_desde', label='Desde',
+        widget=forms.DateInput(attrs={'type': 'date'}),
+    )
+    hasta = django_filters.DateFilter(
+        method='filter_hasta', label='Hasta',
+        widget=forms.DateInput(attrs={'type': 'date'}),
+    )
+
+    # Rangos sobre la columna fecha (no fecha__date) para usar el índice (producto, fecha, id)
+    def filter_desde(self, queryset, name, value):
+        return queryset.filter(fecha__gte=timezone.make_aware(datetime.combine(value, time.min)))
+
+    def filter_hasta(self, queryset, name, value):
+        return queryset.filter(fecha__lt=timezone.make_aware(datetime.combine(value + timedelta(days=1), time.min)))
+
+    class Meta:
+        model = MovimientoStock
+        fields = ['tipo', 'desde', 'hasta']
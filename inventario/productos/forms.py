@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 # Importaciones necesarias de Django y Crispy Forms
 from django import forms
 from django.core.exceptions import ValidationError
@@ -196,6 +198,55 @@ class AjusteStockForm(forms.Form):
             )
         )
 
+# -----------------------------------------------------------------------------
+# Formulario para la actualización masiva de precios
+# -----------------------------------------------------------------------------
+class AjustePrecioForm(forms.Form):
+    """
+    Reglas de una actualización masiva de precios. Se aplican en orden:
+    porcentaje, monto fijo y redondeo.
+    """
+    porcentaje = forms.DecimalField(
+        required=False,
+        max_digits=6,
+        decimal_places=2,
+        min_value=-90,
+        max_value=1000,
+        label="Porcentaje",
+        help_text="Ej.: 12.5 aumenta un 12,5%; -10 baja un 10%."
+    )
+    monto_fijo = forms.DecimalField(
+        required=False,
+        max_digits=10,
+        decimal_places=2,
+        label="Monto fijo",
+        help_text="Se suma (o resta, si es negativo) después del porcentaje."
+    )
+    redondear_a = forms.DecimalField(
+        required=False,
+        max_digits=10,
+        decimal_places=2,
+        min_value=Decimal('0.01'),
+        label="Redondear a",
+        help_text="Múltiplo al que se redondea el precio final (ej.: 10 o 0.50)."
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.helper = BaseFormHelper()
+        self.helper.form_tag = False
+        self.helper.layout = Layout(
+            PrependedText('porcentaje', '%'),
+            PrependedText('monto_fijo', '$'),
+            PrependedText('redondear_a', '$'),
+        )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not any(cleaned_data.get(campo) for campo in ('porcentaje', 'monto_fijo', 'redondear_a')):
+            raise ValidationError("Indicá al menos una regla: porcentaje, monto fijo o redondeo.")
+        return cleaned_data
+
 # -----------------------------------------------------------------------------
 # Helpers y formularios para filtros
 # -----------------------------------------------------------------------------
@@ -0,0 +1,325 @@
+"""
+Historial de movimientos de stock: particiones mensuales y archivo.
+
+En PostgreSQL la tabla de movimientos está particionada por mes sobre
+`fecha` (ver migración 0012), con una partición por defecto para lo que
+quede fuera de rango. Las consultas que filtran por fecha sólo leen las
+particiones recientes.
+
+`archivar_movimientos(corte)` cierra los meses anteriores a `corte`:
+
+1. Escribe cada mes en `ARCHIVO_MOVIMIENTOS_ROOT/movimientos-AAAA-MM.jsonl.gz`.
+2. Guarda un StockCheckpoint por producto afectado con el stock del libro al
+   corte, así el stock esperado (productos.conciliacion) no cambia.
+3. Borra los movimientos archivados: en PostgreSQL elimina las particiones
+   completas; en otras bases los pasa a la tabla MovimientoStockArchivado.
+
+Los productos con libro negativo al corte (una anomalía, ver
+productos.conciliacion) no se archivan: sus movimientos quedan en la tabla
+principal para revisarlos a mano y se informan aparte.
+
+Después del corte, `stock_en_fecha` sólo es exacto para fechas posteriores.
+
+`movimientos_filtrados` arma la exportación en streaming del historial
+(inventario.exportacion) con los filtros del listado de movimientos.
+"""
+import gzip
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Max, Min, Q
+from django.utils import timezone
+
+from inventario.cache import invalidar_al_confirmar
+from .models import MovimientoStock, MovimientoStockArchivado, StockCheckpoint
+
+TABLA = MovimientoStock._meta.db_table
+PARTICION_DEFECTO = f"{TABLA}_defecto"
+CAMPOS_ARCHIVO = ['id', 'producto_id', 'tipo', 'cantidad', 'motivo', 'fecha', 'usuario']
+COLUMNAS_EXPORTACION = [
+    ('id', 'id'),
+    ('fecha', 'fecha'),
+    ('producto_sku', 'producto__sku'),
+    ('producto_nombre', 'producto__nombre'),
+    ('tipo', 'tipo'),
+    ('cantidad', 'cantidad'),
+    ('motivo', 'motivo'),
+    ('usuario', 'usuario'),
+]
+
+
+def inicio_de_mes(fecha):
+    return datetime(fecha.year, fecha.month, 1, tzinfo=dt_timezone.utc)
+
+
+def mes_siguiente(inicio):
+    return datetime(inicio.year + inicio.month // 12, inicio.month % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def meses_entre(desde, hasta):
+    """Inicios de mes desde el mes de `desde` hasta antes de `hasta`."""
+    mes = inicio_de_mes(desde)
+    while mes < hasta:
+        yield mes
+        mes = mes_siguiente(mes)
+
+
+# -----------------------------------------------------------------------------
+# Particiones (sólo PostgreSQL)
+# -----------------------------------------------------------------------------
+
+def nombre_particion(inicio):
+    return f"{TABLA}_{inicio:%Y%m}"
+
+
+def esta_particionada():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE relname = %s", [TABLA])
+        fila = cursor.fetchone()
+    return bool(fila) and fila[0] == 'p'
+
+
+def particiones_existentes(cursor):
+    cursor.execute(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = %s",
+        [TABLA],
+    )
+    return {fila[0] for fila in cursor.fetchall()}
+
+
+def crear_particion(cursor, inicio):
+    """
+    Crea la partición del mes que empieza en `inicio`, moviendo a ella las
+    filas de ese mes que hayan caído en la partición por defecto.
+    """
+    nombre = nombre_particion(inicio)
+    desde, hasta = inicio.isoformat(), mes_siguiente(inicio).isoformat()
+    cursor.execute(f'CREATE TABLE "{nombre}" (LIKE "{TABLA}" INCLUDING DEFAULTS)')
+    cursor.execute(
+        f'WITH movidas AS (DELETE FROM "{PARTICION_DEFECTO}" WHERE fecha >= %s AND fecha < %s RETURNING *) '
+        f'INSERT INTO "{nombre}" SELECT * FROM movidas',
+        [desde, hasta],
+    )
+    cursor.execute(
+        f'ALTER TABLE "{TABLA}" ATTACH PARTITION "{nombre}" '
+        f"FOR VALUES FROM ('{desde}') TO ('{hasta}')"
+    )
+
+
+def asegurar_particiones(meses_adelante=3):
+    """Crea las particiones del mes actual y los `meses_adelante` siguientes. Devuelve las creadas."""
+    if not esta_particionada():
+        return []
+    ahora = timezone.now()
+    hasta = inicio_de_mes(ahora)
+    for _ in range(meses_adelante + 1):
+        hasta = mes_siguiente(hasta)
+
+    creadas = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        existentes = particiones_existentes(cursor)
+        for inicio in meses_entre(ahora, hasta):
+            if nombre_particion(inicio) not in existentes:
+                crear_particion(cursor, inicio)
+                creadas.append(nombre_particion(inicio))
+    return creadas
+
+
+# -----------------------------------------------------------------------------
+# Consultas
+# -----------------------------------------------------------------------------
+
+# Ventanas (en días) que se prueban antes de leer todo el historial
+VENTANAS_RECIENTES = (31, 365)
+
+
+def movimientos_recientes(producto, cantidad=10):
+    """
+    Últimos movimientos de un producto. Primero busca en ventanas de fecha
+    acotadas, que en PostgreSQL sólo leen las particiones recientes.
+    """
+    queryset = MovimientoStock.objects.filter(producto=producto).order_by('-fecha', '-id')
+    ahora = timezone.now()
+    for dias in VENTANAS_RECIENTES:
+        movimientos = list(queryset.filter(fecha__gte=ahora - timedelta(days=dias))[:cantidad])
+        if len(movimientos) == cantidad:
+            return movimientos
+    return list(queryset[:cantidad])
+
+
+def movimientos_filtrados(datos):
+    """
+    Movimientos según `datos` (GET u opciones del comando): los filtros de
+    MovimientoStockFilter (tipo, desde, hasta) y opcionalmente `producto` (id).
+    """
+    from .filters import MovimientoStockFilter
+
+    queryset = MovimientoStock.objects.all()
+    producto = datos.get('producto')
+    if producto:
+        try:
+            queryset = queryset.filter(producto_id=int(producto))
+        except (TypeError, ValueError):
+            raise ValueError(f"producto: id inválido ({producto})")
+    filtro = MovimientoStockFilter(datos, queryset=queryset)
+    if not filtro.is_valid():
+        raise ValueError('; '.join(f"{campo}: {' '.join(errores)}" for campo, errores in filtro.errors.items()))
+    return filtro.qs.order_by('fecha', 'id')
+
+
+# -----------------------------------------------------------------------------
+# Archivo
+# -----------------------------------------------------------------------------
+
+def directorio_archivo():
+    return str(getattr(settings, 'ARCHIVO_MOVIMIENTOS_ROOT', os.path.join(settings.BASE_DIR, 'archivo')))
+
+
+def _archivables(corte, hasta_id, excluidos):
+    return MovimientoStock.objects.filter(fecha__lt=corte, id__lte=hasta_id).exclude(producto_id__in=excluidos)
+
+
+def _libro_negativo_al_corte(corte, hasta_id):
+    """Ids de los productos con movimientos a archivar cuyo libro al corte es negativo."""
+    from .conciliacion import anotar_stock_esperado
+    from .models import Producto
+
+    productos = Producto.objects.filter(id__in=_archivables(corte, hasta_id, []).values('producto_id'))
+    filas = (
+        anotar_stock_esperado(productos, fecha=corte - timedelta(microseconds=1), hasta_movimiento=hasta_id)
+        .filter(stock_esperado__lt=0)
+        .order_by('id')
+        .values_list('id', flat=True)
+    )
+    return list(filas)
+
+
+def _escribir_mes(directorio, inicio, hasta_id, excluidos):
+    """Escribe los movimientos del mes en un .jsonl.gz (escritura atómica). Devuelve la cantidad."""
+    ruta = os.path.join(directorio, f"movimientos-{inicio:%Y-%m}.jsonl.gz")
+    if os.path.exists(ruta):
+        # Mes ya archivado antes (movimientos cargados con fecha vieja): no se pisa
+        ruta = os.path.join(directorio, f"movimientos-{inicio:%Y-%m}-{hasta_id}.jsonl.gz")
+    filas = (
+        _archivables(mes_siguiente(inicio), hasta_id, excluidos)
+        .filter(fecha__gte=inicio)
+        .order_by('id')
+        .values_list(*CAMPOS_ARCHIVO)
+    )
+    cantidad = 0
+    descriptor, temporal = tempfile.mkstemp(dir=directorio, suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as crudo, gzip.GzipFile(fileobj=crudo, mode='wb') as archivo:
+            for fila in filas.iterator(chunk_size=5000):
+                registro = dict(zip(CAMPOS_ARCHIVO, fila))
+                registro['fecha'] = registro['fecha'].isoformat()
+                archivo.write(json.dumps(registro, ensure_ascii=False).encode('utf-8') + b'\n')
+                cantidad += 1
+        if cantidad:
+            os.replace(temporal, ruta)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+    return cantidad
+
+
+def _crear_checkpoints_al_corte(corte, hasta_id, excluidos):
+    """Checkpoint con el stock del libro al corte para cada producto con movimientos archivados."""
+    from .conciliacion import anotar_stock_esperado
+    from .models import Producto
+
+    archivados = _archivables(corte, hasta_id, excluidos)
+    productos = Producto.objects.filter(id__in=archivados.values('producto_id'))
+    # Los movimientos que quedan tienen que ser posteriores al checkpoint
+    primero_restante = (
+        MovimientoStock.objects.filter(Q(fecha__gte=corte) | Q(id__gt=hasta_id))
+        .exclude(producto_id__in=excluidos)
+        .aggregate(primero=Min('id'))['primero']
+    )
+    ultimo = hasta_id if primero_restante is None else min(hasta_id, primero_restante - 1)
+
+    fecha = corte - timedelta(microseconds=1)
+    filas = (
+        anotar_stock_esperado(productos, fecha=fecha, hasta_movimiento=hasta_id)
+        .order_by('id')
+        .values_list('id', 'stock_esperado')
+    )
+    checkpoints = [
+        StockCheckpoint(producto_id=pid, fecha=fecha, stock=stock, ultimo_movimiento_id=ultimo)
+        for pid, stock in filas.iterator()
+    ]
+    StockCheckpoint.objects.bulk_create(checkpoints, batch_size=1000)
+    return len(checkpoints)
+
+
+def _pasar_a_tabla_archivo(corte, hasta_id, excluidos):
+    campos = ', '.join(f'"{MovimientoStock._meta.get_field(c).column}"' for c in CAMPOS_ARCHIVO)
+    condicion, parametros = 'fecha < %s AND id <= %s', [corte, hasta_id]
+    if excluidos:
+        condicion += f" AND producto_id NOT IN ({', '.join(['%s'] * len(excluidos))})"
+        parametros += excluidos
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO "{MovimientoStockArchivado._meta.db_table}" ({campos}) '
+            f'SELECT {campos} FROM "{TABLA}" WHERE {condicion}',
+            parametros,
+        )
+    _archivables(corte, hasta_id, excluidos).delete()
+
+
+def _eliminar_particiones(corte, hasta_id, escritos, excluidos):
+    """Elimina las particiones completas anteriores al corte y borra el resto de las filas archivadas."""
+    with connection.cursor() as cursor:
+        existentes = particiones_existentes(cursor)
+        for inicio, cantidad in escritos.items():
+            nombre = nombre_particion(inicio)
+            if nombre not in existentes or mes_siguiente(inicio) > corte:
+                continue
+            # Sólo si la partición contiene exactamente lo que se archivó
+            cursor.execute(f'SELECT count(*), max(id) FROM "{nombre}"')
+            total, maximo = cursor.fetchone()
+            if total == cantidad and (maximo or 0) <= hasta_id:
+                cursor.execute(f'ALTER TABLE "{TABLA}" DETACH PARTITION "{nombre}"')
+                cursor.execute(f'DROP TABLE "{nombre}"')
+    _archivables(corte, hasta_id, excluidos).delete()
+
+
+def archivar_movimientos(corte, directorio=None):
+    """
+    Archiva los movimientos anteriores a `corte` (inicio de mes, aware).
+    Devuelve ({inicio_de_mes: cantidad} de lo archivado, [ids de los
+    productos que no se archivaron por tener libro negativo al corte]).
+    """
+    directorio = directorio or directorio_archivo()
+    os.makedirs(directorio, exist_ok=True)
+
+    rango = MovimientoStock.objects.filter(fecha__lt=corte).aggregate(desde=Min('fecha'), hasta_id=Max('id'))
+    if rango['desde'] is None:
+        return {}, []
+    # Movimientos insertados después de este punto no se tocan
+    hasta_id = rango['hasta_id']
+    excluidos = _libro_negativo_al_corte(corte, hasta_id)
+
+    escritos = {}
+    for inicio in meses_entre(rango['desde'], corte):
+        cantidad = _escribir_mes(directorio, inicio, hasta_id, excluidos)
+        if cantidad:
+            escritos[inicio] = cantidad
+
+    with transaction.atomic():
+        _crear_checkpoints_al_corte(corte, hasta_id, excluidos)
+        if esta_particionada():
+            _eliminar_particiones(corte, hasta_id, escritos, excluidos)
+        else:
+            _pasar_a_tabla_archivo(corte, hasta_id, excluidos)
+        invalidar_al_confirmar('movimientos')
+    return escritos, excluidos
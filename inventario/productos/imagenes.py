@@ -0,0 +1,142 @@
+"""
+Pipeline de imágenes de producto.
+
+Cuando se sube una imagen nueva, después del commit se encola en el pool de
+procesos la generación de derivados (miniatura para el listado y tamaño de
+detalle). Los derivados se guardan en WebP (o JPEG si Pillow no trae WebP)
+con el hash del contenido en el nombre, así que se pueden cachear para
+siempre. El archivo original nunca se modifica.
+
+Cuando la imagen se reemplaza o se quita, el original y los derivados
+anteriores se borran después del commit, salvo que otro producto los use.
+"""
+import hashlib
+import logging
+import os
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from inventario.cache import invalidar
+from inventario.metricas import seccion
+from inventario.tareas import ejecutar
+
+logger = logging.getLogger(__name__)
+
+DIRECTORIO_DERIVADOS = os.path.join('productos', 'derivados')
+
+# nombre -> lado máximo en píxeles
+TAMANIOS = {
+    'miniatura': 100,
+    'detalle': 600,
+}
+
+
+def _formato_salida():
+    from PIL import features
+
+    return ('WEBP', 'webp') if features.check('webp') else ('JPEG', 'jpg')
+
+
+@seccion('imagen_derivados')
+def generar_derivados(media_root, nombre_original):
+    """
+    Genera los derivados de `nombre_original` (ruta relativa a media_root) y
+    devuelve {'miniatura': ruta_relativa, 'detalle': ruta_relativa}.
+    Corre en el pool de procesos: no usa la base de datos.
+    """
+    from PIL import Image, ImageOps
+
+    ruta_original = os.path.join(media_root, nombre_original)
+    with open(ruta_original, 'rb') as archivo:
+        huella = hashlib.sha256(archivo.read()).hexdigest()[:16]
+
+    with Image.open(ruta_original) as img:
+        img.verify()  # valida formato antes de procesar
+
+    formato, extension = _formato_salida()
+    os.makedirs(os.path.join(media_root, DIRECTORIO_DERIVADOS), exist_ok=True)
+
+    derivados = {}
+    with Image.open(ruta_original) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA' if 'A' in img.getbands() else 'RGB')
+        if formato == 'JPEG' and img.mode == 'RGBA':
+            img = img.convert('RGB')
+
+        for nombre, lado in TAMANIOS.items():
+            relativa = os.path.join(DIRECTORIO_DERIVADOS, f"{huella}-{nombre}.{extension}")
+            destino = os.path.join(media_root, relativa)
+            if not os.path.exists(destino):
+                copia = img.copy()
+                copia.thumbnail((lado, lado))
+                copia.save(destino, formato, quality=82)
+            derivados[nombre] = relativa
+    return derivados
+
+
+def borrar_imagenes(rutas):
+    """Borra del storage los originales y derivados que ya no usa ningún producto."""
+    from .models import Producto
+
+    rutas = {ruta for ruta in rutas if ruta}
+    if not rutas:
+        return
+    en_uso = set()
+    for fila in Producto.objects.filter(
+        Q(imagen__in=rutas) | Q(imagen_miniatura__in=rutas) | Q(imagen_detalle__in=rutas)
+    ).values_list('imagen', 'imagen_miniatura', 'imagen_detalle'):
+        en_uso.update(fila)
+    for ruta in rutas - en_uso:
+        try:
+            default_storage.delete(ruta)
+        except Exception:
+            logger.exception("Error al borrar la imagen %s", ruta)
+
+
+def programar_borrado_imagenes(rutas):
+    """Borra las imágenes `rutas` cuando se confirme la transacción."""
+    rutas = [ruta for ruta in rutas if ruta]
+    if rutas:
+        transaction.on_commit(lambda: borrar_imagenes(rutas))
+
+
+def _guardar_derivados(producto_id, nombre_original):
+    from .models import Producto
+
+    def guardar(derivados):
+        # Sólo si la imagen no volvió a cambiar mientras se procesaba
+        productos = Producto.objects.filter(pk=producto_id, imagen=nombre_original)
+        anteriores = productos.values_list('imagen_miniatura', 'imagen_detalle').first()
+        productos.update(
+            imagen_miniatura=derivados.get('miniatura', ''),
+            imagen_detalle=derivados.get('detalle', ''),
+            fecha_actualizacion=timezone.now(),
+        )
+        invalidar('productos')
+        # Regenerados con otro formato: los anteriores quedaron sin uso
+        if anteriores:
+            borrar_imagenes(set(anteriores) - set(derivados.values()))
+    return guardar
+
+
+def procesar_imagen(producto_id, nombre_original):
+    try:
+        ejecutar(
+            generar_derivados,
+            str(settings.MEDIA_ROOT),
+            nombre_original,
+            al_terminar=_guardar_derivados(producto_id, nombre_original),
+        )
+    except Exception:
+        logger.exception("Error al procesar la imagen %s del producto %s", nombre_original, producto_id)
+
+
+def programar_procesamiento(producto):
+    """Encola el procesamiento de la imagen del producto cuando se confirme la transacción."""
+    producto_id, nombre = producto.pk, producto.imagen.name
+    transaction.on_commit(lambda: procesar_imagen(producto_id, nombre))
@@ -0,0 +1,303 @@
+"""
+Importación y exportación masiva del catálogo, por SKU.
+
+Formato (CSV con encabezado, o XLSX con la misma primera fila):
+
+    sku,nombre,descripcion,precio,stock,stock_minimo
+
+La importación lee el archivo como stream y procesa lotes: cada lote es un
+upsert por `sku` (bulk_create con update_conflicts) más los movimientos de
+stock inicial de los productos nuevos en un solo llamado al libro de stock.
+El stock de los productos que ya existen no se toca (se cambia con
+movimientos). Las imágenes se buscan en un directorio por SKU
+(`<sku>.<ext>`) y se guardan con el mismo nombre que `get_image_path`
+(SKU y hash del contenido). Se copian al storage antes de la transacción
+del lote y se borran si esta se revierte; cada lote confirma por su cuenta,
+así que la importación no se llama dentro de otra transacción.
+
+XLSX necesita openpyxl.
+"""
+import csv
+import os
+from contextlib import contextmanager
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from inventario.cache import invalidar_al_confirmar
+from .busqueda import normalizar_texto
+from .imagenes import borrar_imagenes, procesar_imagen, programar_borrado_imagenes
+from .models import MovimientoStock, Producto, STOCK_BAJO, huella_archivo, nombre_imagen
+from .stock import USUARIO_SISTEMA, registrar_movimientos
+
+COLUMNAS = ['sku', 'nombre', 'descripcion', 'precio', 'stock', 'stock_minimo']
+EXTENSIONES_IMAGEN = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
+TAMANIO_LOTE = 1000
+MOTIVO_STOCK_INICIAL = "Stock inicial (importación)"
+
+CAMPOS_ACTUALIZABLES = ['nombre', 'descripcion', 'precio', 'stock_minimo', 'busqueda', 'fecha_actualizacion']
+CAMPOS_IMAGEN = ['imagen', 'imagen_miniatura', 'imagen_detalle']
+
+
+class ErrorImportacion(ValueError):
+    pass
+
+
+# -----------------------------------------------------------------------------
+# Lectura y escritura de archivos
+# -----------------------------------------------------------------------------
+
+def _formato(nombre, formato=None):
+    formato = formato or os.path.splitext(nombre)[1].lstrip('.').lower() or 'csv'
+    if formato not in ('csv', 'xlsx'):
+        raise ErrorImportacion(f"Formato no soportado: {formato}")
+    return formato
+
+
+def _openpyxl():
+    try:
+        import openpyxl
+    except ImportError:
+        raise ErrorImportacion("Para leer o escribir XLSX hay que instalar openpyxl.")
+    return openpyxl
+
+
+def leer_filas(ruta, formato=None):
+    """Genera (numero_de_linea, {columna: valor}) sin cargar el archivo entero."""
+    if _formato(ruta, formato) == 'xlsx':
+        libro = _openpyxl().load_workbook(ruta, read_only=True, data_only=True)
+        try:
+            filas = libro.active.iter_rows(values_only=True)
+            encabezado = [str(c or '').strip().lower() for c in next(filas, [])]
+            for numero, valores in enumerate(filas, start=2):
+                if any(v not in (None, '') for v in valores):
+                    yield numero, dict(zip(encabezado, valores))
+        finally:
+            libro.close()
+        return
+
+    with open(ruta, newline='', encoding='utf-8-sig') as archivo:
+        lector = csv.DictReader(archivo)
+        lector.fieldnames = [c.strip().lower() for c in lector.fieldnames or []]
+        for fila in lector:
+            yield lector.line_num, fila
+
+
+def _filas_exportacion():
+    filas = Producto.objects.order_by('sku').values_list(*COLUMNAS)
+    for sku, nombre, descripcion, precio, stock, stock_minimo in filas.iterator(chunk_size=TAMANIO_LOTE):
+        yield [sku, nombre, descripcion, precio, stock, stock_minimo]
+
+
+def exportar_catalogo(destino, formato='csv'):
+    """Escribe el catálogo en `destino` (ruta o archivo de texto abierto). Devuelve la cantidad de filas."""
+    cantidad = 0
+    if _formato('', formato) == 'xlsx':
+        libro = _openpyxl().Workbook(write_only=True)
+        hoja = libro.create_sheet('productos')
+        hoja.append(COLUMNAS)
+        for fila in _filas_exportacion():
+            hoja.append([float(v) if isinstance(v, Decimal) else v for v in fila])
+            cantidad += 1
+        libro.save(destino)
+        return cantidad
+
+    archivo = open(destino, 'w', newline='', encoding='utf-8') if isinstance(destino, str) else destino
+    try:
+        escritor = csv.writer(archivo)
+        escritor.writerow(COLUMNAS)
+        for fila in _filas_exportacion():
+            escritor.writerow(fila)
+            cantidad += 1
+    finally:
+        if archivo is not destino:
+            archivo.close()
+    return cantidad
+
+
+# -----------------------------------------------------------------------------
+# Importación
+# -----------------------------------------------------------------------------
+
+def indexar_imagenes(directorio):
+    """{sku: ruta} de las imágenes del directorio (nombre de archivo sin extensión = SKU)."""
+    imagenes = {}
+    if not directorio:
+        return imagenes
+    with os.scandir(directorio) as entradas:
+        for entrada in entradas:
+            sku, extension = os.path.splitext(entrada.name)
+            if entrada.is_file() and extension.lower() in EXTENSIONES_IMAGEN:
+                imagenes[sku] = entrada.path
+    return imagenes
+
+
+def _texto(fila, columna):
+    valor = fila.get(columna)
+    return '' if valor is None else str(valor).strip()
+
+
+def _entero(fila, columna, defecto):
+    valor = _texto(fila, columna)
+    if not valor:
+        return defecto
+    try:
+        numero = int(Decimal(valor))
+    except InvalidOperation:
+        raise ErrorImportacion(f"{columna} inválido: {valor}")
+    if numero < 0:
+        raise ErrorImportacion(f"{columna} no puede ser negativo")
+    return numero
+
+
+def producto_desde_fila(fila):
+    """Arma un Producto sin guardar a partir de una fila validada."""
+    sku = _texto(fila, 'sku')
+    nombre = _texto(fila, 'nombre')
+    descripcion = _texto(fila, 'descripcion')
+    if not sku:
+        raise ErrorImportacion("Falta el SKU")
+    if not nombre:
+        raise ErrorImportacion("Falta el nombre")
+    for columna, valor in (('sku', sku), ('nombre', nombre), ('descripcion', descripcion)):
+        limite = Producto._meta.get_field(columna).max_length
+        if len(valor) > limite:
+            raise ErrorImportacion(f"{columna} supera los {limite} caracteres")
+    try:
+        precio = Decimal(_texto(fila, 'precio').replace(',', '.'))
+    except InvalidOperation:
+        raise ErrorImportacion(f"Precio inválido: {_texto(fila, 'precio')}")
+    if precio <= 0:
+        raise ErrorImportacion("El precio debe ser mayor a cero")
+
+    producto = Producto(
+        sku=sku,
+        nombre=nombre,
+        descripcion=descripcion,
+        precio=precio.quantize(Decimal('0.01')),
+        stock=0,
+        stock_minimo=_entero(fila, 'stock_minimo', Producto._meta.get_field('stock_minimo').default),
+    )
+    producto.busqueda = normalizar_texto(producto.nombre, producto.sku, producto.descripcion)
+    return producto, _entero(fila, 'stock', 0)
+
+
+def _asignar_imagen(producto, ruta, actual):
+    """Copia la imagen al storage con el nombre de get_image_path. Devuelve False si ya estaba."""
+    with open(ruta, 'rb') as archivo:
+        archivo = File(archivo)
+        extension = os.path.splitext(ruta)[1].lstrip('.')
+        nombre = nombre_imagen(producto.sku, extension, huella_archivo(archivo))
+        if actual == nombre and default_storage.exists(nombre):
+            return False
+        producto.imagen.name = default_storage.save(nombre, archivo)
+    producto.imagen_miniatura = ''
+    producto.imagen_detalle = ''
+    return True
+
+
+@contextmanager
+def _borrar_si_falla(productos):
+    """Borra las imágenes recién copiadas de `productos` si el bloque (la transacción) falla."""
+    try:
+        yield
+    except BaseException:
+        # Revertido el upsert, nadie apunta a esas copias
+        borrar_imagenes(producto.imagen.name for producto in productos)
+        raise
+
+
+def _importar_lote(lote, imagenes, usuario):
+    skus = [producto.sku for producto, _ in lote]
+    existentes, derivados = {}, {}
+    for sku, imagen, miniatura, detalle in Producto.objects.filter(sku__in=skus).values_list(
+        'sku', 'imagen', 'imagen_miniatura', 'imagen_detalle'
+    ):
+        existentes[sku] = imagen
+        derivados[sku] = (miniatura, detalle)
+
+    con_imagen, sin_imagen = [], []
+    for producto, _ in lote:
+        ruta = imagenes.get(producto.sku)
+        if ruta and _asignar_imagen(producto, ruta, existentes.get(producto.sku)):
+            con_imagen.append(producto)
+        else:
+            sin_imagen.append(producto)
+
+    with _borrar_si_falla(con_imagen), transaction.atomic():
+        # Dos upserts: los productos sin imagen nueva no pisan la que ya tienen
+        for productos, campos in ((sin_imagen, CAMPOS_ACTUALIZABLES), (con_imagen, CAMPOS_ACTUALIZABLES + CAMPOS_IMAGEN)):
+            if productos:
+                Producto.objects.bulk_create(
+                    productos,
+                    update_conflicts=True,
+                    unique_fields=['sku'],
+                    update_fields=campos,
+                )
+        ids = dict(Producto.objects.filter(sku__in=skus).values_list('sku', 'id'))
+
+        movimientos = [
+            MovimientoStock(
+                producto_id=ids[producto.sku],
+                tipo='entrada',
+                cantidad=stock,
+                motivo=MOTIVO_STOCK_INICIAL,
+                usuario=usuario,
+            )
+            for producto, stock in lote
+            if stock and producto.sku not in existentes
+        ]
+        registrar_movimientos(movimientos)
+        # stock_minimo pudo cambiar en productos existentes
+        Producto.objects.filter(id__in=ids.values()).update(stock_bajo=STOCK_BAJO)
+        invalidar_al_confirmar('productos', 'valuacion', 'busqueda')
+
+        programar_borrado_imagenes(
+            ruta
+            for producto in con_imagen
+            for ruta in (existentes.get(producto.sku), *derivados.get(producto.sku, ()))
+        )
+        for producto in con_imagen:
+            transaction.on_commit(
+                lambda pk=ids[producto.sku], nombre=producto.imagen.name: procesar_imagen(pk, nombre)
+            )
+
+    creados = len(skus) - len(existentes)
+    return creados, len(existentes), len(con_imagen)
+
+
+def _lotes(filas, tamanio, errores):
+    """Agrupa productos válidos en lotes; un SKU repetido dentro del lote se queda con la última fila."""
+    filas = iter(filas)
+    while True:
+        bloque = list(islice(filas, tamanio))
+        if not bloque:
+            return
+        lote = {}
+        for numero, fila in bloque:
+            try:
+                producto, stock = producto_desde_fila(fila)
+            except ErrorImportacion as error:
+                errores.append((numero, str(error)))
+                continue
+            lote[producto.sku] = (producto, stock)
+        if lote:
+            yield list(lote.values())
+
+
+def importar_catalogo(filas, directorio_imagenes=None, usuario=USUARIO_SISTEMA, tamanio_lote=TAMANIO_LOTE):
+    """
+    Importa filas (ver leer_filas) por lotes. Devuelve un dict con
+    creados, actualizados, imagenes y errores [(linea, mensaje)].
+    """
+    imagenes = indexar_imagenes(directorio_imagenes)
+    resultado = {'creados': 0, 'actualizados': 0, 'imagenes': 0, 'errores': []}
+    for lote in _lotes(filas, tamanio_lote, resultado['errores']):
+        creados, actualizados, con_imagen = _importar_lote(lote, imagenes, usuario)
+        resultado['creados'] += creados
+        resultado['actualizados'] += actualizados
+        resultado['imagenes'] += con_imagen
+    return resultado
@@ -0,0 +1,50 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from productos.historial import archivar_movimientos, asegurar_particiones, inicio_de_mes
+
+
+class Command(BaseCommand):
+    help = (
+        "Archiva en .jsonl.gz los movimientos de stock de meses cerrados y los saca de la tabla "
+        "principal, dejando checkpoints de stock al corte. También crea las particiones de los próximos meses."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--meses', type=int, default=12,
+                            help="Meses cerrados que se conservan en la tabla principal (por defecto 12).")
+        parser.add_argument('--antes', help="Archivar los meses anteriores a este (AAAA-MM). Reemplaza a --meses.")
+        parser.add_argument('--directorio', help="Directorio de salida. Por defecto ARCHIVO_MOVIMIENTOS_ROOT.")
+
+    def handle(self, *args, **options):
+        corte = self._corte(options['antes'], options['meses'])
+
+        for nombre in asegurar_particiones():
+            self.stdout.write(f"Partición creada: {nombre}")
+
+        escritos, sin_archivar = archivar_movimientos(corte, options['directorio'])
+        for inicio, cantidad in sorted(escritos.items()):
+            self.stdout.write(f"{inicio:%Y-%m}: {cantidad} movimientos")
+        total = sum(escritos.values())
+        self.stdout.write(self.style.SUCCESS(f"Archivados {total} movimientos anteriores a {corte:%Y-%m}."))
+        if sin_archivar:
+            self.stdout.write(self.style.WARNING(
+                f"{len(sin_archivar)} productos con libro negativo al corte quedaron sin archivar "
+                f"(revisar a mano): {', '.join(map(str, sin_archivar))}"
+            ))
+
+    def _corte(self, antes, meses):
+        if antes:
+            try:
+                fecha = datetime.strptime(antes, '%Y-%m')
+            except ValueError:
+                raise CommandError(f"Mes inválido: {antes}")
+            return datetime(fecha.year, fecha.month, 1, tzinfo=dt_timezone.utc)
+        if meses < 0:
+            raise CommandError("--meses no puede ser negativo.")
+        # Inicio del mes actual menos `meses` meses
+        actual = inicio_de_mes(timezone.now())
+        indice = actual.year * 12 + actual.month - 1 - meses
+        return datetime(indice // 12, indice % 12 + 1, 1, tzinfo=dt_timezone.utc)
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from productos.velocidad import DIAS_HISTORIAL, calcular_velocidades
+
+
+class Command(BaseCommand):
+    help = "Recalcula velocidad de venta, días de cobertura y reposición sugerida de todo el catálogo."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hasta', help=f"Último día de ventas considerado (AAAA-MM-DD). Por defecto, ayer; se usan {DIAS_HISTORIAL} días.")
+        parser.add_argument('--dias-entrega', dest='dias_entrega', type=int, help="Demora de entrega del proveedor (REPOSICION_DIAS_ENTREGA).")
+        parser.add_argument('--dias-cobertura', dest='dias_cobertura', type=int, help="Días de venta a cubrir con cada pedido (REPOSICION_DIAS_COBERTURA).")
+
+    def handle(self, *args, **options):
+        hasta = None
+        if options['hasta']:
+            try:
+                hasta = parse_date(options['hasta'])
+            except ValueError:
+                hasta = None
+            if hasta is None:
+                raise CommandError(f"Fecha inválida: {options['hasta']}")
+        for opcion in ('dias_entrega', 'dias_cobertura'):
+            if options[opcion] is not None and options[opcion] < 0:
+                raise CommandError(f"--{opcion.replace('_', '-')} no puede ser negativo.")
+
+        inicio = time.monotonic()
+        cantidad = calcular_velocidades(hasta, options['dias_entrega'], options['dias_cobertura'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Velocidades calculadas para {cantidad} productos en {time.monotonic() - inicio:.1f} s."
+        ))
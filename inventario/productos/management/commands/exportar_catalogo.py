@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from productos.importacion import ErrorImportacion, exportar_catalogo
+
+
+class Command(BaseCommand):
+    help = "Exporta el catálogo en el mismo formato que importa importar_catalogo (CSV o XLSX)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', nargs='?', default='-', help="Archivo de salida ('-' = salida estándar, sólo CSV).")
+        parser.add_argument('--formato', choices=['csv', 'xlsx'], help="Por defecto, según la extensión.")
+
+    def handle(self, *args, **options):
+        archivo = options['archivo']
+        formato = options['formato'] or ('xlsx' if archivo.lower().endswith('.xlsx') else 'csv')
+        if archivo == '-' and formato == 'xlsx':
+            raise CommandError("XLSX necesita un archivo de salida.")
+        try:
+            cantidad = exportar_catalogo(self.stdout if archivo == '-' else archivo, formato)
+        except (ErrorImportacion, OSError) as error:
+            raise CommandError(str(error))
+        if archivo != '-':
+            self.stdout.write(self.style.SUCCESS(f"Exportados {cantidad} productos a {archivo}."))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from inventario import exportacion
+from productos.historial import COLUMNAS_EXPORTACION, movimientos_filtrados
+from productos.models import MovimientoStock, Producto
+
+
+class Command(BaseCommand):
+    help = "Exporta el historial de movimientos de stock en CSV o JSON Lines, opcionalmente con gzip."
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', nargs='?', default='-', help="Archivo de salida ('-' = salida estándar).")
+        parser.add_argument('--desde', help="Fecha inicial (AAAA-MM-DD).")
+        parser.add_argument('--hasta', help="Fecha final (AAAA-MM-DD), inclusive.")
+        parser.add_argument('--tipo', choices=[tipo for tipo, _ in MovimientoStock.TIPO_CHOICES])
+        parser.add_argument('--sku', help="Sólo los movimientos de este producto.")
+        parser.add_argument('--formato', choices=exportacion.FORMATOS, help="Por defecto, según la extensión (csv).")
+        parser.add_argument('--gzip', action='store_true', help="Comprime la salida (implícito con extensión .gz).")
+
+    def handle(self, *args, **options):
+        archivo = options['archivo']
+        formato, comprimir = exportacion.formato_de_archivo(archivo)
+        formato = options['formato'] or formato
+        comprimir = comprimir or options['gzip']
+
+        filtros = {clave: options[clave] for clave in ('desde', 'hasta', 'tipo') if options[clave]}
+        if options['sku']:
+            producto = Producto.objects.filter(sku=options['sku']).values_list('id', flat=True).first()
+            if producto is None:
+                raise CommandError(f"No existe el producto {options['sku']}.")
+            filtros['producto'] = producto
+        try:
+            movimientos = movimientos_filtrados(filtros)
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        if archivo == '-':
+            exportacion.escribir_en_salida(self.stdout, COLUMNAS_EXPORTACION, movimientos, formato, comprimir)
+            return
+        try:
+            with open(archivo, 'wb') as destino:
+                escritos = exportacion.escribir(destino, COLUMNAS_EXPORTACION, movimientos, formato, comprimir)
+        except OSError as error:
+            raise CommandError(str(error))
+        self.stdout.write(self.style.SUCCESS(f"Exportación escrita en {archivo} ({escritos} bytes)."))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from productos.importacion import TAMANIO_LOTE, ErrorImportacion, importar_catalogo, leer_filas
+from productos.stock import USUARIO_SISTEMA
+
+
+class Command(BaseCommand):
+    help = "Importa (alta o actualización por SKU) productos desde un CSV o XLSX."
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help="Archivo .csv o .xlsx con columnas sku,nombre,descripcion,precio,stock,stock_minimo.")
+        parser.add_argument('--formato', choices=['csv', 'xlsx'], help="Por defecto, según la extensión.")
+        parser.add_argument('--imagenes', help="Directorio con imágenes nombradas por SKU (p. ej. VINO-001.jpg).")
+        parser.add_argument('--lote', type=int, default=TAMANIO_LOTE, help=f"Filas por lote (por defecto {TAMANIO_LOTE}).")
+        parser.add_argument('--usuario', default=USUARIO_SISTEMA, help="Usuario de los movimientos de stock inicial.")
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError("--lote tiene que ser mayor a cero.")
+        try:
+            resultado = importar_catalogo(
+                leer_filas(options['archivo'], options['formato']),
+                directorio_imagenes=options['imagenes'],
+                usuario=options['usuario'],
+                tamanio_lote=options['lote'],
+            )
+        except (ErrorImportacion, OSError) as error:
+            raise CommandError(str(error))
+
+        for linea, mensaje in resultado['errores']:
+            self.stderr.write(f"Línea {linea}: {mensaje}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Creados: {resultado['creados']}. Actualizados: {resultado['actualizados']}. "
+            f"Imágenes: {resultado['imagenes']}. Filas con error: {len(resultado['errores'])}."
+        ))
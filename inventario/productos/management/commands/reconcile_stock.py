@@ -0,0 +1,75 @@
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from productos.conciliacion import anomalias, conciliar, crear_checkpoints, crear_checkpoints_apertura, stock_en_fecha
+from productos.models import Producto
+
+
+class Command(BaseCommand):
+    help = "Compara Producto.stock con el libro de movimientos (desde el último checkpoint)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help="Corrige el stock de los productos con diferencias.")
+        parser.add_argument('--checkpoint', action='store_true', help="Guarda un checkpoint por producto al terminar.")
+        parser.add_argument(
+            '--apertura', action='store_true',
+            help="Antes de conciliar, toma el stock actual como punto de partida de los productos sin checkpoint.",
+        )
+        parser.add_argument('--fecha', help="Muestra el stock de cada producto a esa fecha (AAAA-MM-DD o AAAA-MM-DD HH:MM).")
+
+    def handle(self, *args, **options):
+        if options['fecha']:
+            self._mostrar_stock_en_fecha(self._fecha(options['fecha']))
+            return
+
+        if options['apertura']:
+            creados = crear_checkpoints_apertura()
+            self.stdout.write(self.style.SUCCESS(f"Checkpoints de apertura creados: {creados}."))
+
+        diferencias = conciliar(corregir=options['fix'])
+        negativos = anomalias(diferencias)
+        nombres = dict(Producto.objects.filter(id__in=[pid for pid, _, _ in diferencias]).values_list('id', 'sku'))
+        for pid, stock, esperado in diferencias:
+            if esperado >= 0:
+                self.stdout.write(f"{nombres.get(pid, pid)}: stock {stock}, libro {esperado} ({esperado - stock:+d})")
+        for pid, stock, esperado in negativos:
+            self.stdout.write(self.style.ERROR(f"{nombres.get(pid, pid)}: stock {stock}, libro negativo {esperado}"))
+
+        corregibles = len(diferencias) - len(negativos)
+        if not diferencias:
+            self.stdout.write(self.style.SUCCESS("Sin diferencias."))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f"Corregidos {corregibles} productos."))
+        else:
+            self.stdout.write(self.style.WARNING(f"{corregibles} productos con diferencias (usar --fix para corregir)."))
+        if negativos:
+            self.stdout.write(self.style.ERROR(
+                f"{len(negativos)} productos con libro negativo: no se corrigen, revisar sus movimientos."
+            ))
+
+        if options['checkpoint']:
+            creados = crear_checkpoints()
+            self.stdout.write(self.style.SUCCESS(f"Checkpoints creados: {creados}."))
+
+    def _mostrar_stock_en_fecha(self, fecha):
+        stocks = stock_en_fecha(fecha)
+        for pid, sku in Producto.objects.order_by('sku').values_list('id', 'sku').iterator():
+            self.stdout.write(f"{sku}\t{stocks.get(pid, 0)}")
+
+    def _fecha(self, valor):
+        try:
+            dia = parse_date(valor)
+            fecha = parse_datetime(valor) if dia is None else None
+        except ValueError:
+            dia = fecha = None
+        if dia is not None:
+            # Un día sin hora incluye todos los movimientos de ese día
+            fecha = datetime.combine(dia, time.max)
+        if fecha is None:
+            raise CommandError(f"Fecha inválida: {valor}")
+        if timezone.is_naive(fecha):
+            fecha = timezone.make_aware(fecha)
+        return fecha
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from productos.imagenes import procesar_imagen
+from productos.models import Producto
+
+
+class Command(BaseCommand):
+    help = "Genera los derivados (miniatura y detalle) de las imágenes de productos."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--todos', action='store_true',
+            help="Regenera también los productos que ya tienen derivados.",
+        )
+
+    def handle(self, *args, **options):
+        productos = Producto.objects.exclude(imagen='').exclude(imagen__isnull=True)
+        if not options['todos']:
+            productos = productos.filter(imagen_miniatura='')
+
+        total = 0
+        for pk, nombre in productos.values_list('pk', 'imagen').iterator():
+            procesar_imagen(pk, nombre)
+            total += 1
+        self.stdout.write(self.style.SUCCESS(f"Imágenes encoladas: {total}."))
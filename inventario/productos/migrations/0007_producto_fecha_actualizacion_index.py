@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 19:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0006_alter_movimientostock_cantidad_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='producto',
+            name='fecha_actualizacion',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Fecha de actualización'),
+        ),
+    ]
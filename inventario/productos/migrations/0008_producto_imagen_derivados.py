@@ -0,0 +1,23 @@
+# Generated by Django 4.2.11 on 2026-10-18 19:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0007_producto_fecha_actualizacion_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producto',
+            name='imagen_detalle',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='producto',
+            name='imagen_miniatura',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.11 on 2026-10-18 19:15
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+_NO_ALFANUMERICO = re.compile(r'[^0-9a-z]+')
+
+
+def normalizar_texto(*partes):
+    # Copia congelada de productos.busqueda.normalizar_texto: la migración no
+    # debe cambiar si después cambia el código de la aplicación.
+    texto = ' '.join(p for p in partes if p)
+    texto = unicodedata.normalize('NFKD', texto)
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+    return ' '.join(_NO_ALFANUMERICO.sub(' ', texto).split())
+
+
+def poblar_busqueda(apps, schema_editor):
+    Producto = apps.get_model('productos', 'Producto')
+    productos = []
+    for producto in Producto.objects.only('id', 'nombre', 'sku', 'descripcion').iterator():
+        producto.busqueda = normalizar_texto(producto.nombre, producto.sku, producto.descripcion)
+        productos.append(producto)
+    Producto.objects.bulk_update(productos, ['busqueda'], batch_size=500)
+
+
+def crear_indice_trigramas(apps, schema_editor):
+    # Sólo PostgreSQL: en otras bases la búsqueda usa el índice en memoria
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS productos_producto_busqueda_trgm "
+            "ON productos_producto USING gin (busqueda gin_trgm_ops)"
+        )
+
+
+def eliminar_indice_trigramas(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS productos_producto_busqueda_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0008_producto_imagen_derivados'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producto',
+            name='busqueda',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(poblar_busqueda, migrations.RunPython.noop),
+        migrations.RunPython(crear_indice_trigramas, eliminar_indice_trigramas),
+    ]
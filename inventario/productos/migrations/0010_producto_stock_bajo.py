@@ -0,0 +1,29 @@
+# Generated by Django 4.2.11 on 2026-10-18 19:18
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+def poblar_stock_bajo(apps, schema_editor):
+    Producto = apps.get_model('productos', 'Producto')
+    Producto.objects.filter(stock__lt=models.F('stock_minimo')).update(stock_bajo=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0009_producto_busqueda'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producto',
+            name='stock_bajo',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(poblar_stock_bajo, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(models.OrderBy(django.db.models.expressions.CombinedExpression(models.F('stock_minimo'), '-', models.F('stock')), descending=True), models.F('id'), condition=models.Q(('stock_bajo', True)), name='producto_faltante_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.11 on 2026-10-18 19:20
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0010_producto_stock_bajo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha')),
+                ('stock', models.PositiveIntegerField(verbose_name='Stock')),
+                ('ultimo_movimiento_id', models.BigIntegerField(default=0, verbose_name='Último movimiento')),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkpoints', to='productos.producto', verbose_name='Producto')),
+            ],
+            options={
+                'verbose_name': 'Checkpoint de Stock',
+                'verbose_name_plural': 'Checkpoints de Stock',
+                'ordering': ['-fecha'],
+                'indexes': [models.Index(fields=['producto', '-ultimo_movimiento_id'], name='checkpoint_producto_ultimo_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,117 @@
+# Generated by Django 4.2.11 on 2026-10-18 19:22
+
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import migrations, models
+from django.utils import timezone
+
+TABLA = 'productos_movimientostock'
+ANTERIOR = f'{TABLA}_anterior'
+SECUENCIA = f'{TABLA}_id_seq'
+PARTICION_DEFECTO = f'{TABLA}_defecto'
+MESES_ADELANTE = 3
+
+
+# Copias congeladas de productos.historial: la migración no debe cambiar si
+# después cambia el código de la aplicación.
+
+def inicio_de_mes(fecha):
+    return datetime(fecha.year, fecha.month, 1, tzinfo=dt_timezone.utc)
+
+
+def mes_siguiente(inicio):
+    return datetime(inicio.year + inicio.month // 12, inicio.month % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def meses_entre(desde, hasta):
+    mes = inicio_de_mes(desde)
+    while mes < hasta:
+        yield mes
+        mes = mes_siguiente(mes)
+
+
+def crear_particion(cursor, inicio):
+    nombre = f"{TABLA}_{inicio:%Y%m}"
+    desde, hasta = inicio.isoformat(), mes_siguiente(inicio).isoformat()
+    cursor.execute(f'CREATE TABLE "{nombre}" (LIKE "{TABLA}" INCLUDING DEFAULTS)')
+    cursor.execute(
+        f'WITH movidas AS (DELETE FROM "{PARTICION_DEFECTO}" WHERE fecha >= %s AND fecha < %s RETURNING *) '
+        f'INSERT INTO "{nombre}" SELECT * FROM movidas',
+        [desde, hasta],
+    )
+    cursor.execute(
+        f'ALTER TABLE "{TABLA}" ATTACH PARTITION "{nombre}" '
+        f"FOR VALUES FROM ('{desde}') TO ('{hasta}')"
+    )
+
+
+def particionar_movimientos(apps, schema_editor):
+    """
+    Rehace la tabla de movimientos como tabla particionada por mes (sólo
+    PostgreSQL). La clave primaria pasa a ser (id, fecha), como exige el
+    particionado; los ids siguen saliendo de una secuencia propia.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE "{TABLA}" IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(f'ALTER TABLE "{TABLA}" RENAME TO "{ANTERIOR}"')
+        # La secuencia (o identity) de la tabla anterior se borra con ella
+        cursor.execute(f'ALTER TABLE "{ANTERIOR}" ALTER COLUMN id DROP IDENTITY IF EXISTS')
+        cursor.execute(f'ALTER TABLE "{ANTERIOR}" ALTER COLUMN id DROP DEFAULT')
+        cursor.execute(f'DROP SEQUENCE IF EXISTS "{SECUENCIA}"')
+
+        cursor.execute(f'CREATE TABLE "{TABLA}" (LIKE "{ANTERIOR}") PARTITION BY RANGE (fecha)')
+        cursor.execute(f'CREATE SEQUENCE "{SECUENCIA}" AS bigint OWNED BY "{TABLA}".id')
+        cursor.execute(f'ALTER TABLE "{TABLA}" ALTER COLUMN id SET DEFAULT nextval(\'"{SECUENCIA}"\')')
+        cursor.execute(f'ALTER TABLE "{TABLA}" ADD CONSTRAINT "{TABLA}_id_fecha_pk" PRIMARY KEY (id, fecha)')
+        cursor.execute(
+            f'ALTER TABLE "{TABLA}" ADD CONSTRAINT "{TABLA}_producto_id_fk" '
+            f'FOREIGN KEY (producto_id) REFERENCES productos_producto (id) DEFERRABLE INITIALLY DEFERRED'
+        )
+        cursor.execute(f'CREATE INDEX "{TABLA}_producto_id_idx" ON "{TABLA}" (producto_id)')
+        cursor.execute(f'CREATE INDEX "{TABLA}_fecha_idx" ON "{TABLA}" (fecha)')
+        cursor.execute(f'CREATE TABLE "{PARTICION_DEFECTO}" PARTITION OF "{TABLA}" DEFAULT')
+
+        cursor.execute(f'SELECT min(fecha) FROM "{ANTERIOR}"')
+        primera = cursor.fetchone()[0] or timezone.now()
+        hasta = inicio_de_mes(timezone.now())
+        for _ in range(MESES_ADELANTE + 1):
+            hasta = mes_siguiente(hasta)
+        for inicio in meses_entre(min(primera, timezone.now()), hasta):
+            crear_particion(cursor, inicio)
+
+        cursor.execute(f'INSERT INTO "{TABLA}" SELECT * FROM "{ANTERIOR}"')
+        cursor.execute(f'SELECT setval(\'"{SECUENCIA}"\', COALESCE(max(id), 0) + 1, false) FROM "{TABLA}"')
+        cursor.execute(f'DROP TABLE "{ANTERIOR}"')
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0011_stockcheckpoint'),
+    ]
+
+    operations = [
+        # Sin reversa: la tabla particionada funciona igual para el ORM
+        migrations.RunPython(particionar_movimientos, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='MovimientoStockArchivado',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('producto_id', models.BigIntegerField(db_index=True, verbose_name='Producto')),
+                ('tipo', models.CharField(choices=[('entrada', 'Entrada'), ('salida', 'Salida'), ('ajuste', 'Ajuste')], max_length=50, verbose_name='Tipo')),
+                ('cantidad', models.IntegerField(verbose_name='Cantidad')),
+                ('motivo', models.CharField(blank=True, max_length=200, null=True, verbose_name='Motivo')),
+                ('fecha', models.DateTimeField(db_index=True, verbose_name='Fecha')),
+                ('usuario', models.CharField(max_length=50, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Movimiento de Stock archivado',
+                'verbose_name_plural': 'Movimientos de Stock archivados',
+                'ordering': ['-fecha'],
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.11 on 2026-10-18 19:26
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0012_movimientos_particionados'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AjustePrecio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha')),
+                ('usuario', models.CharField(max_length=50, verbose_name='Usuario')),
+                ('porcentaje', models.DecimalField(blank=True, decimal_places=2, max_digits=6, null=True, verbose_name='Porcentaje')),
+                ('monto_fijo', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Monto fijo')),
+                ('redondear_a', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Redondear a')),
+                ('filtro', models.CharField(blank=True, default='', max_length=200, verbose_name='Filtro')),
+                ('productos', models.PositiveIntegerField(default=0, verbose_name='Productos')),
+            ],
+            options={
+                'verbose_name': 'Ajuste de Precios',
+                'verbose_name_plural': 'Ajustes de Precios',
+                'ordering': ['-fecha'],
+            },
+        ),
+        migrations.CreateModel(
+            name='HistorialPrecio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('precio_anterior', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Precio anterior')),
+                ('precio_nuevo', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Precio nuevo')),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha')),
+                ('ajuste', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='historial', to='productos.ajusteprecio', verbose_name='Ajuste')),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='historial_precios', to='productos.producto', verbose_name='Producto')),
+            ],
+            options={
+                'verbose_name': 'Historial de Precio',
+                'verbose_name_plural': 'Historial de Precios',
+                'ordering': ['-fecha'],
+                'indexes': [models.Index(fields=['producto', '-fecha'], name='historial_producto_fecha_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-18 19:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0013_ajusteprecio_historialprecio'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movimientostock',
+            index=models.Index(fields=['producto', '-fecha', '-id'], name='movimiento_producto_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.11 on 2026-10-18 19:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0014_movimiento_producto_fecha_idx'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='producto',
+            options={'ordering': ['nombre', 'id'], 'verbose_name': 'Producto', 'verbose_name_plural': 'Productos'},
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['nombre', 'id'], name='producto_nombre_id_idx'),
+        ),
+    ]
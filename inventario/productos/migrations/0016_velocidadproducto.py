@@ -0,0 +1,31 @@
+# Generated by Django 4.2.11 on 2026-10-18 19:34
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0015_alter_producto_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VelocidadProducto',
+            fields=[
+                ('producto', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='velocidad', serialize=False, to='productos.producto', verbose_name='Producto')),
+                ('ventas_7d', models.PositiveIntegerField(default=0, verbose_name='Ventas 7 días')),
+                ('ventas_28d', models.PositiveIntegerField(default=0, verbose_name='Ventas 28 días')),
+                ('velocidad', models.DecimalField(decimal_places=3, default=0, max_digits=10, verbose_name='Velocidad')),
+                ('dias_cobertura', models.DecimalField(blank=True, decimal_places=1, max_digits=10, null=True, verbose_name='Días de cobertura')),
+                ('reposicion_sugerida', models.PositiveIntegerField(default=0, verbose_name='Reposición sugerida')),
+                ('calculado', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Calculado')),
+            ],
+            options={
+                'verbose_name': 'Velocidad de Producto',
+                'verbose_name_plural': 'Velocidades de Productos',
+            },
+        ),
+    ]
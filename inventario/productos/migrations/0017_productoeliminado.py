@@ -0,0 +1,25 @@
+# Generated by Django 4.2.11 on 2026-10-18 20:03
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0016_velocidadproducto'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductoEliminado',
+            fields=[
+                ('producto_id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='Producto')),
+                ('fecha', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Fecha')),
+            ],
+            options={
+                'verbose_name': 'Producto eliminado',
+                'verbose_name_plural': 'Productos eliminados',
+            },
+        ),
+    ]
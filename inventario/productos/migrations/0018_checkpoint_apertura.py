@@ -0,0 +1,34 @@
+from django.db import migrations
+from django.db.models import Max
+from django.utils import timezone
+
+
+def crear_checkpoints_apertura(apps, schema_editor):
+    # Antes del libro de stock el stock se editaba sin registrar movimientos:
+    # el Producto.stock actual es el punto de partida de la conciliación.
+    # Copia congelada de productos.conciliacion.crear_checkpoints_apertura.
+    Producto = apps.get_model('productos', 'Producto')
+    MovimientoStock = apps.get_model('productos', 'MovimientoStock')
+    StockCheckpoint = apps.get_model('productos', 'StockCheckpoint')
+
+    fecha = timezone.now()
+    ultimo = MovimientoStock.objects.aggregate(ultimo=Max('id'))['ultimo'] or 0
+    stocks = Producto.objects.filter(checkpoints__isnull=True).order_by('id').values_list('id', 'stock')
+    StockCheckpoint.objects.bulk_create(
+        [
+            StockCheckpoint(producto_id=pid, fecha=fecha, stock=stock, ultimo_movimiento_id=ultimo)
+            for pid, stock in stocks.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0017_productoeliminado'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_checkpoints_apertura, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,8 @@
 from django.db import models
 from django.core.exceptions import ValidationError
 from django.utils import timezone
-from PIL import Image
+from django.core.files.storage import default_storage
+import hashlib
 import os
 
 # Validación de tamaño de imagen
@@ -11,11 +12,36 @@ def validate_image_size(image):
     if filesize > megabyte_limit * 1024 * 1024:
         raise ValidationError(f"El tamaño máximo permitido es de {megabyte_limit} MB")
 
+def huella_archivo(archivo):
+    """Hash abreviado del contenido de un archivo de Django (lo deja al principio)."""
+    huella = hashlib.sha256()
+    archivo.seek(0)
+    for bloque in archivo.chunks():
+        huella.update(bloque)
+    archivo.seek(0)
+    return huella.hexdigest()[:12]
+
+
+def nombre_imagen(sku, ext, huella):
+    # SKU y hash del contenido: cada imagen nueva tiene otro nombre, así que
+    # los originales se pueden cachear como inmutables (inventario.medios)
+    return os.path.join("productos", f"{sku}-{huella}.{ext}")
+
+
 # Ruta dinámica para guardar imágenes
 def get_image_path(instance, filename):
     ext = filename.split('.')[-1]
-    filename = f"{instance.sku}.{ext}"  # Usamos el SKU como nombre de archivo
-    return os.path.join("productos", filename)
+    archivo = instance.imagen.file if instance.imagen and not instance.imagen._committed else None
+    if archivo is None:
+        return os.path.join("productos", f"{instance.sku}.{ext}")
+    return nombre_imagen(instance.sku, ext, huella_archivo(archivo))
+
+# Expresión para recalcular Producto.stock_bajo en un UPDATE
+STOCK_BAJO = models.ExpressionWrapper(
+    models.Q(stock__lt=models.F('stock_minimo')),
+    output_field=models.BooleanField(),
+)
+
 
 class Producto(models.Model):
     nombre = models.CharField("Nombre", max_length=50)
@@ -38,36 +64,94 @@ class Producto(models.Model):
         null=True,
         help_text="Formatos permitidos: jpg, png, gif. Tamaño máximo: 5MB"
     )
+    # Derivados generados por productos.imagenes (rutas relativas a MEDIA_ROOT)
+    imagen_miniatura = models.CharField(max_length=255, blank=True, default='', editable=False)
+    imagen_detalle = models.CharField(max_length=255, blank=True, default='', editable=False)
+    # Nombre, SKU y descripción normalizados para productos.busqueda
+    busqueda = models.TextField(blank=True, default='', editable=False)
+    # stock < stock_minimo, mantenido por save() y por el libro de stock (productos.stock)
+    stock_bajo = models.BooleanField(default=False, editable=False)
     fecha_creacion = models.DateTimeField("Fecha de creación", auto_now_add=True)
-    fecha_actualizacion = models.DateTimeField("Fecha de actualización", auto_now=True)
+    fecha_actualizacion = models.DateTimeField("Fecha de actualización", auto_now=True, db_index=True)
 
     class Meta:
         verbose_name = "Producto"
         verbose_name_plural = "Productos"
-        ordering = ["nombre"]
+        ordering = ["nombre", "id"]
+        indexes = [
+            # Orden del listado (paginación por número de página)
+            models.Index(fields=['nombre', 'id'], name='producto_nombre_id_idx'),
+            # Sólo contiene los productos con stock bajo, ordenados por faltante
+            models.Index(
+                models.OrderBy(models.F('stock_minimo') - models.F('stock'), descending=True),
+                models.F('id'),
+                name='producto_faltante_idx',
+                condition=models.Q(stock_bajo=True),
+            ),
+        ]
 
     def __str__(self):
         return self.nombre
 
     def save(self, *args, **kwargs):
+        from .busqueda import normalizar_texto
+        self.busqueda = normalizar_texto(self.nombre, self.sku, self.descripcion)
+
+        # Sólo se procesa la imagen cuando se subió un archivo nuevo
+        imagen_nueva = bool(self.imagen) and not getattr(self.imagen, '_committed', True)
+        imagenes_anteriores = []
+        if imagen_nueva or not self.imagen:
+            imagenes_anteriores = [self.imagen_miniatura, self.imagen_detalle]
+            if self.pk and (imagen_nueva or any(imagenes_anteriores)):
+                # El original reemplazado o quitado ya no está en la instancia
+                imagenes_anteriores.append(
+                    Producto.objects.filter(pk=self.pk).values_list('imagen', flat=True).first()
+                )
+            self.imagen_miniatura = ''
+            self.imagen_detalle = ''
+
+        # Si no se guarda el stock, el valor en memoria puede estar desactualizado:
+        # la marca de stock bajo se recalcula en la base con el stock real.
+        self.stock_bajo = self.stock < self.stock_minimo
+        update_fields = kwargs.get('update_fields')
+        recalcular_stock_bajo = update_fields is not None and 'stock' not in update_fields
+        if recalcular_stock_bajo:
+            kwargs['update_fields'] = [f for f in update_fields if f != 'stock_bajo']
+
         super().save(*args, **kwargs)
 
-        # Redimensionar imagen si es muy grande
-        if self.imagen and hasattr(self.imagen, 'path'):
-            try:
-                img = Image.open(self.imagen.path)
-                img.verify()  # valida formato
-                img = Image.open(self.imagen.path)  # reabrir para modificar
-                if img.height > 300 or img.width > 300:
-                    output_size = (300, 300)
-                    img.thumbnail(output_size)
-                    img.save(self.imagen.path)
-            except Exception as e:
-                print(f"Error al procesar la imagen: {e}")
+        if recalcular_stock_bajo:
+            Producto.objects.filter(pk=self.pk).update(stock_bajo=STOCK_BAJO)
+
+        if imagen_nueva or any(imagenes_anteriores):
+            from .imagenes import programar_borrado_imagenes, programar_procesamiento
+            programar_borrado_imagenes(imagenes_anteriores)
+            if imagen_nueva:
+                programar_procesamiento(self)
+
+    @property
+    def imagen_miniatura_url(self):
+        if self.imagen_miniatura:
+            return default_storage.url(self.imagen_miniatura)
+        return self.imagen.url if self.imagen else ''
+
+    @property
+    def imagen_detalle_url(self):
+        if self.imagen_detalle:
+            return default_storage.url(self.imagen_detalle)
+        return self.imagen.url if self.imagen else ''
 
     @property
     def necesita_reposicion(self):
-        return self.stock < self.stock_minimo
+        if self.stock < self.stock_minimo:
+            return True
+        # Según la velocidad de venta (productos.velocidad): llegó al punto de pedido
+        velocidad = getattr(self, 'velocidad', None)
+        return bool(velocidad and velocidad.reposicion_sugerida)
+
+    @property
+    def faltante(self):
+        return max(self.stock_minimo - self.stock, 0)
 
 
 class MovimientoStock(models.Model):
@@ -93,25 +177,166 @@ class MovimientoStock(models.Model):
         verbose_name = "Movimiento de Stock"
         verbose_name_plural = "Movimientos de Stock"
         ordering = ["-fecha"]
+        indexes = [
+            # Historial por producto: últimos movimientos y paginación por clave (-fecha, -id)
+            models.Index(fields=['producto', '-fecha', '-id'], name='movimiento_producto_fecha_idx'),
+        ]
 
     def __str__(self):
         return f"{self.producto.nombre} - {self.get_tipo_display()} - {self.cantidad}"
 
     def save(self, *args, **kwargs):
-        # Si es un nuevo movimiento (no actualización)
-        if not self.pk:
-            if self.tipo == "entrada":
-                self.producto.stock += self.cantidad
-            elif self.tipo == "salida":
-                # Evitamos stock negativo
-                if self.producto.stock - self.cantidad < 0:
-                    raise ValidationError("No hay suficiente stock para realizar la salida.")
-                self.producto.stock -= self.cantidad
-            elif self.tipo == "ajuste":
-                # Ajuste: se asigna directamente la cantidad como stock
-                self.producto.stock = self.cantidad
-
-            # Guardar cambios en producto
-            self.producto.save()
-
+        # Un movimiento nuevo pasa por el libro de stock, que actualiza
+        # Producto.stock con un UPDATE condicional e inserta esta fila.
+        if self._state.adding and not self.pk:
+            from .stock import registrar_movimientos
+            registrar_movimientos([self])
+            return
         super().save(*args, **kwargs)
+
+
+class StockCheckpoint(models.Model):
+    """
+    Stock de un producto según el libro de movimientos hasta `ultimo_movimiento_id`.
+    Permite calcular el stock esperado o a una fecha sin recorrer todo el historial.
+    """
+    producto = models.ForeignKey(
+        Producto,
+        on_delete=models.CASCADE,
+        related_name="checkpoints",
+        verbose_name="Producto"
+    )
+    fecha = models.DateTimeField("Fecha", default=timezone.now)
+    stock = models.PositiveIntegerField("Stock")
+    # No es FK: los movimientos viejos se pueden archivar y borrar
+    ultimo_movimiento_id = models.BigIntegerField("Último movimiento", default=0)
+
+    class Meta:
+        verbose_name = "Checkpoint de Stock"
+        verbose_name_plural = "Checkpoints de Stock"
+        ordering = ["-fecha"]
+        indexes = [
+            models.Index(fields=['producto', '-ultimo_movimiento_id'], name='checkpoint_producto_ultimo_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.producto_id} - {self.fecha:%Y-%m-%d %H:%M} - {self.stock}"
+
+
+class MovimientoStockArchivado(models.Model):
+    """
+    Movimientos de meses cerrados, fuera de la tabla principal (ver productos.historial).
+    En PostgreSQL no se usa: los meses cerrados se eliminan como particiones.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    # Sin FK: el archivo se conserva aunque se borre el producto
+    producto_id = models.BigIntegerField("Producto", db_index=True)
+    tipo = models.CharField("Tipo", max_length=50, choices=MovimientoStock.TIPO_CHOICES)
+    cantidad = models.IntegerField("Cantidad")
+    motivo = models.CharField("Motivo", max_length=200, blank=True, null=True)
+    fecha = models.DateTimeField("Fecha", db_index=True)
+    usuario = models.CharField("Usuario", max_length=50)
+
+    class Meta:
+        verbose_name = "Movimiento de Stock archivado"
+        verbose_name_plural = "Movimientos de Stock archivados"
+        ordering = ["-fecha"]
+
+    def __str__(self):
+        return f"{self.producto_id} - {self.tipo} - {self.cantidad}"
+
+
+class AjustePrecio(models.Model):
+    """Actualización masiva de precios (ver productos.precios)."""
+    fecha = models.DateTimeField("Fecha", default=timezone.now)
+    usuario = models.CharField("Usuario", max_length=50)
+    porcentaje = models.DecimalField("Porcentaje", max_digits=6, decimal_places=2, null=True, blank=True)
+    monto_fijo = models.DecimalField("Monto fijo", max_digits=10, decimal_places=2, null=True, blank=True)
+    redondear_a = models.DecimalField("Redondear a", max_digits=10, decimal_places=2, null=True, blank=True)
+    filtro = models.CharField("Filtro", max_length=200, blank=True, default='')
+    productos = models.PositiveIntegerField("Productos", default=0)
+
+    class Meta:
+        verbose_name = "Ajuste de Precios"
+        verbose_name_plural = "Ajustes de Precios"
+        ordering = ["-fecha"]
+
+    def __str__(self):
+        return f"{self.fecha:%Y-%m-%d %H:%M} - {self.productos} productos"
+
+
+class HistorialPrecio(models.Model):
+    producto = models.ForeignKey(
+        Producto,
+        on_delete=models.CASCADE,
+        related_name="historial_precios",
+        verbose_name="Producto"
+    )
+    # Nulo cuando el precio se cambió editando el producto
+    ajuste = models.ForeignKey(
+        AjustePrecio,
+        on_delete=models.CASCADE,
+        related_name="historial",
+        null=True,
+        blank=True,
+        verbose_name="Ajuste"
+    )
+    precio_anterior = models.DecimalField("Precio anterior", max_digits=10, decimal_places=2)
+    precio_nuevo = models.DecimalField("Precio nuevo", max_digits=10, decimal_places=2)
+    fecha = models.DateTimeField("Fecha", default=timezone.now)
+
+    class Meta:
+        verbose_name = "Historial de Precio"
+        verbose_name_plural = "Historial de Precios"
+        ordering = ["-fecha"]
+        indexes = [
+            models.Index(fields=['producto', '-fecha'], name='historial_producto_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.producto_id}: {self.precio_anterior} -> {self.precio_nuevo}"
+
+
+class VelocidadProducto(models.Model):
+    """
+    Velocidad de venta y reposición sugerida de un producto, calculadas
+    cada noche por `manage.py calcular_velocidades` (ver productos.velocidad).
+    """
+    producto = models.OneToOneField(
+        Producto,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="velocidad",
+        verbose_name="Producto"
+    )
+    ventas_7d = models.PositiveIntegerField("Ventas 7 días", default=0)
+    ventas_28d = models.PositiveIntegerField("Ventas 28 días", default=0)
+    # Unidades por día
+    velocidad = models.DecimalField("Velocidad", max_digits=10, decimal_places=3, default=0)
+    # Nulo si no tuvo ventas (el stock alcanza indefinidamente)
+    dias_cobertura = models.DecimalField("Días de cobertura", max_digits=10, decimal_places=1, null=True, blank=True)
+    reposicion_sugerida = models.PositiveIntegerField("Reposición sugerida", default=0)
+    calculado = models.DateTimeField("Calculado", default=timezone.now)
+
+    class Meta:
+        verbose_name = "Velocidad de Producto"
+        verbose_name_plural = "Velocidades de Productos"
+
+    def __str__(self):
+        return f"{self.producto_id}: {self.velocidad}/día"
+
+
+class ProductoEliminado(models.Model):
+    """
+    Lápida de un producto borrado, para que el catálogo versionado de la
+    pantalla de ventas (productos.catalogo) lo quite de los navegadores.
+    """
+    producto_id = models.BigIntegerField("Producto", primary_key=True)
+    fecha = models.DateTimeField("Fecha", default=timezone.now, db_index=True)
+
+    class Meta:
+        verbose_name = "Producto eliminado"
+        verbose_name_plural = "Productos eliminados"
+
+    def __str__(self):
+        return f"{self.producto_id} ({self.fecha:%d/%m/%Y %H:%M})"
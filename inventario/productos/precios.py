@@ -0,0 +1,105 @@
+"""
+Actualización masiva de precios.
+
+Las reglas se combinan en este orden: porcentaje, monto fijo y redondeo al
+múltiplo indicado (el precio nunca baja de 0,01). Todo corre en una
+transacción corta con tres sentencias, sin importar cuántos productos haya:
+
+1. INSERT ... SELECT en HistorialPrecio con el precio anterior y el nuevo
+   calculado en SQL para la selección.
+2. Un UPDATE de Producto que toma el precio nuevo de ese historial.
+3. El contador de productos del AjustePrecio.
+
+El UPDATE también mueve `fecha_actualizacion`, así que los cachés
+versionados del catálogo (productos.catalogo) quedan invalidados.
+"""
+from decimal import Decimal
+
+from django.db import connection, models, transaction
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Greatest, Round
+from django.utils import timezone
+
+from inventario.cache import invalidar_al_confirmar
+from .models import AjustePrecio, HistorialPrecio, Producto
+
+PRECIO_MINIMO = Decimal('0.01')
+CAMPO_PRECIO = Producto._meta.get_field('precio')
+
+
+def expresion_precio(porcentaje=None, monto_fijo=None, redondear_a=None):
+    """Expresión SQL del precio nuevo a partir de F('precio')."""
+    salida = models.DecimalField(max_digits=CAMPO_PRECIO.max_digits, decimal_places=CAMPO_PRECIO.decimal_places)
+    precio = F('precio')
+    if porcentaje:
+        precio = precio * Value(1 + Decimal(porcentaje) / 100, output_field=salida)
+    if monto_fijo:
+        precio = precio + Value(Decimal(monto_fijo), output_field=salida)
+    if redondear_a:
+        multiplo = Value(Decimal(redondear_a), output_field=salida)
+        precio = Round(precio / multiplo) * multiplo
+    return Round(
+        Greatest(precio, Value(PRECIO_MINIMO, output_field=salida), output_field=salida),
+        2,
+        output_field=salida,
+    )
+
+
+def previsualizar(queryset, porcentaje=None, monto_fijo=None, redondear_a=None):
+    """Anota `precio_nuevo` en la selección, sin guardar nada."""
+    return queryset.annotate(precio_nuevo=expresion_precio(porcentaje, monto_fijo, redondear_a))
+
+
+def aplicar_ajuste(queryset, porcentaje=None, monto_fijo=None, redondear_a=None, usuario='', filtro=''):
+    """
+    Aplica el ajuste a los productos de `queryset` (p. ej. ProductoFilter(...).qs)
+    y devuelve el AjustePrecio. Los productos cuyo precio no cambia no se tocan.
+    """
+    ahora = timezone.now()
+    seleccion = queryset.order_by().values('pk')
+
+    with transaction.atomic():
+        ajuste = AjustePrecio.objects.create(
+            fecha=ahora,
+            usuario=usuario,
+            porcentaje=porcentaje,
+            monto_fijo=monto_fijo,
+            redondear_a=redondear_a,
+            filtro=filtro[:200],
+        )
+
+        # Todas las columnas como anotaciones, en el orden del INSERT
+        filas = (
+            Producto.objects
+            .filter(pk__in=seleccion)
+            .annotate(
+                h_ajuste=Value(ajuste.pk, output_field=models.BigIntegerField()),
+                h_producto=F('pk'),
+                h_anterior=F('precio'),
+                h_nuevo=expresion_precio(porcentaje, monto_fijo, redondear_a),
+                h_fecha=Value(ahora, output_field=models.DateTimeField()),
+            )
+            .exclude(h_nuevo=F('precio'))
+            .order_by()
+            .values_list('h_ajuste', 'h_producto', 'h_anterior', 'h_nuevo', 'h_fecha')
+        )
+        sql, params = filas.query.get_compiler(connection=connection).as_sql()
+        columnas = ', '.join(
+            connection.ops.quote_name(HistorialPrecio._meta.get_field(nombre).column)
+            for nombre in ('ajuste', 'producto', 'precio_anterior', 'precio_nuevo', 'fecha')
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {connection.ops.quote_name(HistorialPrecio._meta.db_table)} ({columnas}) {sql}',
+                params,
+            )
+            ajuste.productos = cursor.rowcount
+
+        historial = HistorialPrecio.objects.filter(ajuste=ajuste)
+        Producto.objects.filter(pk__in=historial.values('producto_id')).update(
+            precio=Subquery(historial.filter(producto_id=OuterRef('pk')).values('precio_nuevo')[:1]),
+            fecha_actualizacion=ahora,
+        )
+        ajuste.save(update_fields=['productos'])
+        invalidar_al_confirmar('productos', 'valuacion')
+    return ajuste
@@ -0,0 +1,186 @@
+"""
+Libro de stock: única puerta de entrada para modificar Producto.stock.
+
+Cada operación bloquea las filas de los productos involucrados (siempre en
+orden de id), aplica los deltas con un UPDATE condicional sobre F('stock')
+e inserta los movimientos, todo en una transacción. Nunca guarda el producto
+completo, así que no toca la imagen ni el resto de las columnas.
+
+    entrada(producto, 10, motivo="Compra", usuario="ana")
+    salida(producto, 2, usuario="ana")
+    ajuste(producto, 50)                       # fija el stock en 50
+    ajustar_stock(producto, 50)                # registra la diferencia como entrada/salida
+    registrar_movimientos([MovimientoStock(...), ...])
+"""
+from django.core.exceptions import ValidationError
+from django.db import connection, models, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.lookups import GreaterThan, GreaterThanOrEqual
+from django.utils import timezone
+
+from inventario.cache import invalidar_al_confirmar
+from .models import Producto, MovimientoStock
+
+USUARIO_SISTEMA = 'Sistema'
+
+
+class StockInsuficiente(ValidationError):
+    pass
+
+
+def bloquear_productos(ids):
+    """Bloquea los productos en orden de id y devuelve {id: stock}."""
+    return dict(
+        Producto.objects.select_for_update()
+        .filter(id__in=set(ids))
+        .order_by('id')
+        .values_list('id', 'stock')
+    )
+
+
+def _aplicar_en_memoria(movimientos, stocks):
+    """Calcula el stock final de cada producto aplicando los movimientos en orden."""
+    finales = dict(stocks)
+    for movimiento in movimientos:
+        pid = movimiento.producto_id
+        if pid not in finales:
+            raise ValidationError(f"El producto {pid} no existe.")
+        if movimiento.tipo == 'entrada':
+            finales[pid] += movimiento.cantidad
+        elif movimiento.tipo == 'salida':
+            if finales[pid] < movimiento.cantidad:
+                raise StockInsuficiente(
+                    f"No hay suficiente stock para realizar la salida. Disponible: {finales[pid]}"
+                )
+            finales[pid] -= movimiento.cantidad
+        elif movimiento.tipo == 'ajuste':
+            if movimiento.cantidad < 0:
+                raise ValidationError("El stock ajustado no puede ser negativo.")
+            finales[pid] = movimiento.cantidad
+        else:
+            raise ValidationError(f"Tipo de movimiento inválido: {movimiento.tipo}")
+    return finales
+
+
+def _tamanio_tramo():
+    # Cada fila usa unos 7 parámetros (id en el IN y dos When por CASE)
+    return (connection.features.max_query_params or 4000) // 8
+
+
+def aplicar_deltas(deltas):
+    """
+    Suma `delta` al stock de cada producto con un UPDATE por tramo de filas.
+    Las restas sólo se aplican si el stock alcanza (condición en el WHERE);
+    si alguna fila no cumple se lanza StockInsuficiente y la transacción se
+    revierte. En el mismo UPDATE se recalcula `stock_bajo` con el stock
+    resultante.
+
+    El WHERE es `id IN (...) AND stock + CASE id ... END >= 0`: su tamaño no
+    depende de la cantidad de productos (una cadena de OR por fila superaba
+    el límite de profundidad de SQLite con unos 500 productos), y el tramo
+    mantiene la cantidad de parámetros por debajo del límite del motor.
+    """
+    deltas = {pid: delta for pid, delta in deltas.items() if delta}
+    if not deltas:
+        return 0
+
+    ids = sorted(deltas)
+    tramo = _tamanio_tramo()
+    ahora = timezone.now()
+    actualizados = 0
+    with transaction.atomic():
+        for inicio in range(0, len(ids), tramo):
+            parte = ids[inicio:inicio + tramo]
+            delta = Case(
+                *[When(id=pid, then=Value(deltas[pid])) for pid in parte],
+                default=Value(0),
+                output_field=models.IntegerField(),
+            )
+            nuevo = F('stock') + delta
+            cantidad = (
+                Producto.objects
+                .filter(GreaterThanOrEqual(nuevo, 0), id__in=parte)
+                .update(
+                    stock=nuevo,
+                    stock_bajo=GreaterThan(F('stock_minimo'), nuevo),
+                    fecha_actualizacion=ahora,
+                )
+            )
+            if cantidad != len(parte):
+                raise StockInsuficiente("El stock cambió mientras se registraba el movimiento. Intentá nuevamente.")
+            actualizados += cantidad
+    invalidar_al_confirmar('productos')
+    return actualizados
+
+
+def registrar_movimientos(movimientos, bloqueados=None):
+    """
+    Registra en lote movimientos sin guardar (entrada / salida / ajuste).
+
+    `bloqueados` permite pasar {id: stock} de productos que el llamador ya
+    bloqueó en esta transacción, para no repetir la consulta.
+    """
+    movimientos = list(movimientos)
+    if not movimientos:
+        return movimientos
+
+    with transaction.atomic():
+        if bloqueados is None:
+            bloqueados = bloquear_productos(m.producto_id for m in movimientos)
+        finales = _aplicar_en_memoria(movimientos, bloqueados)
+        aplicar_deltas({pid: finales[pid] - bloqueados[pid] for pid in finales})
+        MovimientoStock.objects.bulk_create(movimientos)
+        invalidar_al_confirmar('movimientos')
+
+    # Mantener al día las instancias de producto que tenga el llamador
+    for movimiento in movimientos:
+        if MovimientoStock.producto.is_cached(movimiento):
+            movimiento.producto.stock = finales[movimiento.producto_id]
+    return movimientos
+
+
+def registrar_movimiento(producto, tipo, cantidad, motivo=None, usuario=USUARIO_SISTEMA, fecha=None):
+    movimiento = MovimientoStock(
+        producto=producto,
+        tipo=tipo,
+        cantidad=cantidad,
+        motivo=motivo,
+        usuario=usuario,
+    )
+    if fecha is not None:
+        movimiento.fecha = fecha
+    registrar_movimientos([movimiento])
+    return movimiento
+
+
+def entrada(producto, cantidad, motivo=None, usuario=USUARIO_SISTEMA):
+    return registrar_movimiento(producto, 'entrada', cantidad, motivo, usuario)
+
+
+def salida(producto, cantidad, motivo=None, usuario=USUARIO_SISTEMA):
+    return registrar_movimiento(producto, 'salida', cantidad, motivo, usuario)
+
+
+def ajuste(producto, nuevo_stock, motivo=None, usuario=USUARIO_SISTEMA):
+    return registrar_movimiento(producto, 'ajuste', nuevo_stock, motivo, usuario)
+
+
+def ajustar_stock(producto, nuevo_stock, motivo=None, usuario=USUARIO_SISTEMA):
+    """
+    Lleva el stock a `nuevo_stock` registrando la diferencia como entrada o
+    salida (calculada bajo bloqueo). Devuelve el movimiento o None si no hubo cambio.
+    """
+    with transaction.atomic():
+        bloqueados = bloquear_productos([producto.pk])
+        diferencia = nuevo_stock - bloqueados[producto.pk]
+        if diferencia == 0:
+            return None
+        movimiento = MovimientoStock(
+            producto=producto,
+            tipo='entrada' if diferencia > 0 else 'salida',
+            cantidad=abs(diferencia),
+            motivo=motivo,
+            usuario=usuario,
+        )
+        registrar_movimientos([movimiento], bloqueados=bloqueados)
+    return movimiento
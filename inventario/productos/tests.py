@@ -1,3 +1,542 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from copy import deepcopy
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from django.core.management import call_command
+
+from clientes.models import Cliente
+from ventas.models import ItemVenta, Venta
+from . import busqueda
+from .catalogo import MARGEN_DELTA, RETENCION_ELIMINADOS, admite_delta, snapshot_delta, version_catalogo
+from .conciliacion import MARGEN_CONFIRMACION, anomalias, conciliar, crear_checkpoints, crear_checkpoints_apertura, stock_en_fecha
+from .importacion import MOTIVO_STOCK_INICIAL, importar_catalogo
+from .historial import archivar_movimientos, inicio_de_mes, meses_entre, movimientos_recientes
+from .models import (
+    AjustePrecio, HistorialPrecio, MovimientoStock, MovimientoStockArchivado, Producto, ProductoEliminado, StockCheckpoint,
+    VelocidadProducto,
+)
+from .precios import aplicar_ajuste, previsualizar
+from .stock import StockInsuficiente, aplicar_deltas, registrar_movimiento, registrar_movimientos
+from .velocidad import matriz_ventas
+
+
+def crear_productos(cantidad, stock=10, prefijo='P'):
+    return Producto.objects.bulk_create([
+        Producto(
+            nombre=f'Producto {i}', descripcion='-', precio=Decimal('100.00'),
+            stock=stock, stock_minimo=2, sku=f'{prefijo}{i:05d}',
+        )
+        for i in range(cantidad)
+    ])
+
+
+class CatalogoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('vendedor', password='x')
+        cls.usuario.user_permissions.add(Permission.objects.get(codename='view_producto'))
+        cls.productos = crear_productos(3)
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+
+    def test_delta_incluye_lapidas(self):
+        version = version_catalogo()
+        pk = self.productos[0].pk
+        Producto.objects.get(pk=pk).delete()
+        self.assertTrue(ProductoEliminado.objects.filter(producto_id=pk).exists())
+        self.assertGreater(version_catalogo(), version)
+
+        respuesta = self.client.get(reverse('productos:catalogo_snapshot'), {'desde': version})
+        datos = respuesta.json()
+        self.assertFalse(datos['completo'])
+        self.assertEqual(datos['eliminados'], [str(pk)])
+        self.assertNotIn(str(pk), datos['productos'])
+
+    def test_delta_cubre_transacciones_largas(self):
+        # Un lote que confirma con una fecha anterior a la versión ya vista
+        version = version_catalogo()
+        fecha = timezone.now() - MARGEN_DELTA / 2
+        Producto.objects.filter(pk=self.productos[1].pk).update(stock=0, fecha_actualizacion=fecha)
+        self.assertIn(str(self.productos[1].pk), snapshot_delta(version)['productos'])
+
+    def test_version_vieja_recibe_catalogo_completo(self):
+        version = version_catalogo()
+        vieja = int((timezone.now() - RETENCION_ELIMINADOS - timedelta(days=1)).timestamp() * 1_000_000)
+        self.assertTrue(admite_delta(version, version))
+        self.assertFalse(admite_delta(vieja, version))
+        respuesta = self.client.get(reverse('productos:catalogo_snapshot'), {'desde': vieja})
+        self.assertTrue(respuesta.json()['completo'])
+
+    def test_snapshot_requiere_permiso(self):
+        self.client.force_login(User.objects.create_user('sin_permisos', password='x'))
+        respuesta = self.client.get(reverse('productos:catalogo_snapshot'))
+        self.assertEqual(respuesta.status_code, 403)
+
+    def test_autocompletar_requiere_permiso(self):
+        url = reverse('productos:autocompletar')
+        self.assertEqual(self.client.get(url, {'q': 'P00000'}).status_code, 200)
+        self.client.force_login(User.objects.create_user('sin_permisos', password='x'))
+        self.assertEqual(self.client.get(url, {'q': 'P00000'}).status_code, 403)
+
+
+class LibroStockTests(TestCase):
+    def salidas(self, productos, cantidad):
+        return [MovimientoStock(producto=p, tipo='salida', cantidad=cantidad, usuario='test') for p in productos]
+
+    def test_lote_grande(self):
+        # Más filas que las que entran en un solo UPDATE (límite de SQLite)
+        productos = crear_productos(1500)
+        registrar_movimientos(self.salidas(productos, 9))
+        self.assertEqual(Producto.objects.filter(stock=1).count(), 1500)
+        self.assertEqual(Producto.objects.filter(stock_bajo=True).count(), 1500)
+        self.assertEqual(MovimientoStock.objects.count(), 1500)
+
+    def test_stock_insuficiente_revierte_todo(self):
+        productos = crear_productos(2)
+        Producto.objects.filter(pk=productos[1].pk).update(stock=1)
+        with self.assertRaises(StockInsuficiente):
+            registrar_movimientos(self.salidas(productos, 2))
+        self.assertEqual(sorted(Producto.objects.values_list('stock', flat=True)), [1, 10])
+        self.assertFalse(MovimientoStock.objects.exists())
+
+    def test_stock_cambiado_por_otra_transaccion(self):
+        # El llamador bloqueó con un stock que otra venta ya consumió
+        productos = crear_productos(300)
+        ultimo = productos[-1]
+        Producto.objects.filter(pk=ultimo.pk).update(stock=1)
+        bloqueados = {p.pk: 10 for p in productos}
+        with self.assertRaises(StockInsuficiente):
+            registrar_movimientos(self.salidas(productos, 5), bloqueados=bloqueados)
+        self.assertEqual(Producto.objects.get(pk=ultimo.pk).stock, 1)
+        self.assertFalse(Producto.objects.filter(stock=5).exists())
+
+    def test_deltas_mixtos(self):
+        productos = crear_productos(2)
+        aplicar_deltas({productos[0].pk: 5, productos[1].pk: -10})
+        self.assertEqual(
+            list(Producto.objects.order_by('pk').values_list('stock', 'stock_bajo')),
+            [(15, False), (0, True)],
+        )
+
+
+def imagen_png(color):
+    from PIL import Image
+
+    salida = io.BytesIO()
+    Image.new('RGB', (800, 600), color).save(salida, 'PNG')
+    return SimpleUploadedFile('foto.png', salida.getvalue(), content_type='image/png')
+
+
+class ImagenesTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        ajustes = override_settings(MEDIA_ROOT=self.media, TAREAS_WORKERS=0)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def guardar_imagen(self, producto, color):
+        producto.imagen = imagen_png(color)
+        with self.captureOnCommitCallbacks(execute=True):
+            producto.save()
+        producto.refresh_from_db()
+        return [producto.imagen.name, producto.imagen_miniatura, producto.imagen_detalle]
+
+    def existe(self, ruta):
+        return os.path.exists(os.path.join(self.media, ruta))
+
+    def test_reemplazo_borra_imagenes_anteriores(self):
+        producto = crear_productos(1)[0]
+        anteriores = self.guardar_imagen(producto, 'red')
+        self.assertTrue(all(anteriores) and all(map(self.existe, anteriores)))
+
+        nuevos = self.guardar_imagen(producto, 'blue')
+        self.assertTrue(all(map(self.existe, nuevos)))
+        self.assertFalse(any(map(self.existe, anteriores)))
+
+    def test_no_borra_derivados_compartidos(self):
+        uno, otro = crear_productos(2)
+        anteriores = self.guardar_imagen(uno, 'red')[1:]
+        self.assertEqual(self.guardar_imagen(otro, 'red')[1:], anteriores)
+
+        self.guardar_imagen(uno, 'blue')
+        self.assertTrue(all(map(self.existe, anteriores)))
+
+    def test_original_con_hash_y_cache_inmutable(self):
+        from inventario.medios import servir_media
+
+        producto = crear_productos(1)[0]
+        original = self.guardar_imagen(producto, 'red')[0]
+        self.assertRegex(original, rf'^productos/{producto.sku}-[0-9a-f]{{12}}\.png$')
+        respuesta = servir_media(RequestFactory().get('/media/' + original), original)
+        self.assertIn('immutable', respuesta['Cache-Control'])
+        self.assertIn(f'max-age={365 * 24 * 60 * 60}', respuesta['Cache-Control'])
+
+    def test_importar_la_misma_imagen_no_la_copia_de_nuevo(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        with open(os.path.join(directorio, 'IMG1.png'), 'wb') as archivo:
+            archivo.write(imagen_png('green').read())
+        filas = [(2, {'sku': 'IMG1', 'nombre': 'Con imagen', 'descripcion': '-', 'precio': '5', 'stock': '1'})]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(importar_catalogo(filas, directorio)['imagenes'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(importar_catalogo(filas, directorio)['imagenes'], 0)
+        producto = Producto.objects.get(sku='IMG1')
+        self.assertTrue(producto.imagen_miniatura and self.existe(producto.imagen.name))
+        self.assertEqual(len(os.listdir(os.path.join(self.media, 'productos'))), 2)
+
+    def test_importacion_revertida_no_deja_imagenes(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        with open(os.path.join(directorio, 'IMG1.png'), 'wb') as archivo:
+            archivo.write(imagen_png('green').read())
+        filas = [(2, {'sku': 'IMG1', 'nombre': 'Con imagen', 'descripcion': '-', 'precio': '5', 'stock': '1'})]
+
+        with mock.patch('productos.importacion.registrar_movimientos', side_effect=RuntimeError), \
+                self.assertRaises(RuntimeError):
+            importar_catalogo(filas, directorio)
+        self.assertFalse(Producto.objects.filter(sku='IMG1').exists())
+        self.assertEqual(os.listdir(os.path.join(self.media, 'productos')), [])
+
+
+class ConciliacionTests(TestCase):
+    def setUp(self):
+        self.producto = crear_productos(1)[0]
+
+    def test_apertura_conserva_el_stock_sin_movimientos(self):
+        # Stock cargado sin pasar por el libro (como la edición anterior)
+        salida = io.StringIO()
+        call_command('reconcile_stock', apertura=True, fix=True, stdout=salida)
+        self.assertIn("Sin diferencias", salida.getvalue())
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.stock, 10)
+
+    def test_corrige_segun_el_libro(self):
+        crear_checkpoints_apertura()
+        registrar_movimientos([MovimientoStock(producto=self.producto, tipo='salida', cantidad=3, usuario='test')])
+        Producto.objects.filter(pk=self.producto.pk).update(stock=50)
+
+        self.assertEqual(conciliar(corregir=True), [(self.producto.pk, 50, 7)])
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.stock, 7)
+        self.assertEqual(conciliar(), [])
+
+    def test_libro_negativo_no_se_corrige(self):
+        crear_checkpoints_apertura()
+        # Salida insertada por fuera del libro: el libro queda en 10 - 15
+        MovimientoStock.objects.bulk_create([
+            MovimientoStock(
+                producto=self.producto, tipo='salida', cantidad=15, usuario='test',
+                fecha=timezone.now() - MARGEN_CONFIRMACION,
+            ),
+        ])
+        diferencias = conciliar(corregir=True)
+        self.assertEqual(anomalias(diferencias), [(self.producto.pk, 10, -5)])
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.stock, 10)
+        self.assertEqual(crear_checkpoints(), 0)
+
+    def test_checkpoint_hasta_el_ultimo_movimiento_confirmado(self):
+        crear_checkpoints_apertura()
+        anterior = registrar_movimiento(
+            self.producto, 'entrada', 5, usuario='test', fecha=timezone.now() - MARGEN_CONFIRMACION,
+        )
+        # Dentro del margen: puede haber uno de id menor sin confirmar
+        registrar_movimiento(self.producto, 'salida', 1, usuario='test')
+        self.assertEqual(crear_checkpoints(), 1)
+        checkpoint = StockCheckpoint.objects.order_by('-id').first()
+        self.assertEqual((checkpoint.stock, checkpoint.ultimo_movimiento_id), (15, anterior.pk))
+        self.assertEqual(conciliar(), [])
+
+
+class HistorialTests(TestCase):
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio, ignore_errors=True)
+        self.producto = crear_productos(1)[0]
+        crear_checkpoints_apertura(fecha=timezone.now() - timedelta(days=120))
+        self.corte = inicio_de_mes(timezone.now())
+        self.viejo = self.corte - timedelta(days=40)
+        for cantidad in (1, 2, 3):
+            registrar_movimiento(self.producto, 'salida', cantidad, usuario='test', fecha=self.viejo)
+        registrar_movimiento(self.producto, 'entrada', 5, usuario='test')
+
+    def test_meses_entre_cruza_el_anio(self):
+        desde = datetime(2025, 11, 15, tzinfo=dt_timezone.utc)
+        hasta = datetime(2026, 2, 1, tzinfo=dt_timezone.utc)
+        self.assertEqual([f"{mes:%Y-%m}" for mes in meses_entre(desde, hasta)], ['2025-11', '2025-12', '2026-01'])
+
+    def test_archivar_conserva_el_stock_esperado(self):
+        escritos, sin_archivar = archivar_movimientos(self.corte, self.directorio)
+
+        self.assertEqual((escritos, sin_archivar), ({inicio_de_mes(self.viejo): 3}, []))
+        ruta = os.path.join(self.directorio, f"movimientos-{self.viejo:%Y-%m}.jsonl.gz")
+        with gzip.open(ruta, 'rt', encoding='utf-8') as archivo:
+            self.assertEqual([json.loads(linea)['cantidad'] for linea in archivo], [1, 2, 3])
+        self.assertEqual(MovimientoStockArchivado.objects.count(), 3)
+        self.assertEqual(list(MovimientoStock.objects.values_list('cantidad', flat=True)), [5])
+
+        # El checkpoint al corte reemplaza a los movimientos archivados
+        self.assertEqual(conciliar(), [])
+        self.assertEqual(stock_en_fecha(timezone.now())[self.producto.pk], 9)
+
+    def test_archivar_dos_veces_no_repite(self):
+        archivar_movimientos(self.corte, self.directorio)
+        self.assertEqual(archivar_movimientos(self.corte, self.directorio), ({}, []))
+        self.assertEqual(MovimientoStockArchivado.objects.count(), 3)
+
+    def test_libro_negativo_no_se_archiva(self):
+        negativo = crear_productos(1, stock=0, prefijo='N')[0]
+        crear_checkpoints_apertura(fecha=timezone.now() - timedelta(days=120))
+        # Salida insertada por fuera del libro: queda en -4 al corte
+        MovimientoStock.objects.bulk_create([
+            MovimientoStock(producto=negativo, tipo='salida', cantidad=4, usuario='test', fecha=self.viejo),
+        ])
+
+        salida = io.StringIO()
+        call_command('archive_movimientos', antes=f"{self.corte:%Y-%m}", directorio=self.directorio, stdout=salida)
+        self.assertIn(f"libro negativo al corte quedaron sin archivar (revisar a mano): {negativo.pk}", salida.getvalue())
+
+        # Sin checkpoint al corte y con sus movimientos intactos: la anomalía sigue a la vista
+        self.assertFalse(StockCheckpoint.objects.filter(producto=negativo, stock__lt=0).exists())
+        self.assertEqual(list(MovimientoStock.objects.filter(producto=negativo).values_list('cantidad', flat=True)), [4])
+        self.assertEqual(anomalias(conciliar()), [(negativo.pk, 0, -4)])
+        # Los demás se archivan igual
+        self.assertEqual(MovimientoStockArchivado.objects.count(), 3)
+
+    def test_movimientos_recientes(self):
+        self.assertEqual([m.cantidad for m in movimientos_recientes(self.producto, 2)], [5, 3])
+
+
+class ImportacionTests(TestCase):
+    def escribir_csv(self, filas):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        ruta = os.path.join(directorio, 'catalogo.csv')
+        with open(ruta, 'w', encoding='utf-8', newline='') as archivo:
+            archivo.write('sku,nombre,descripcion,precio,stock,stock_minimo\n')
+            archivo.writelines(filas)
+        return ruta
+
+    def test_lote_por_defecto_con_mas_de_mil_filas(self):
+        filas = [f'IMP{i:05d},Producto {i},-,10.50,{i % 7},3\n' for i in range(1200)]
+        ruta = self.escribir_csv(filas + ['MALO,Sin precio,-,abc,1,1\n'])
+        salida, errores = io.StringIO(), io.StringIO()
+        call_command('importar_catalogo', ruta, stdout=salida, stderr=errores)
+
+        self.assertIn("Creados: 1200. Actualizados: 0.", salida.getvalue())
+        self.assertIn("Línea 1202: Precio inválido", errores.getvalue())
+        self.assertEqual(Producto.objects.count(), 1200)
+        self.assertEqual(
+            MovimientoStock.objects.filter(motivo=MOTIVO_STOCK_INICIAL).count(),
+            sum(1 for i in range(1200) if i % 7),
+        )
+        self.assertEqual(Producto.objects.filter(stock_bajo=True).count(), sum(1 for i in range(1200) if i % 7 < 3))
+        self.assertEqual(conciliar(), [])
+
+    def test_reimportar_no_toca_el_stock(self):
+        ruta = self.escribir_csv([f'IMP{i:05d},Producto {i},-,10.50,5,3\n' for i in range(1100)])
+        call_command('importar_catalogo', ruta, stdout=io.StringIO())
+        Producto.objects.filter(sku='IMP00000').update(stock=1)
+
+        ruta = self.escribir_csv([f'IMP{i:05d},Otro {i},-,12.00,50,3\n' for i in range(1100)])
+        salida = io.StringIO()
+        call_command('importar_catalogo', ruta, stdout=salida)
+        self.assertIn("Creados: 0. Actualizados: 1100.", salida.getvalue())
+        producto = Producto.objects.get(sku='IMP00000')
+        self.assertEqual((producto.nombre, producto.precio, producto.stock), ('Otro 0', Decimal('12.00'), 1))
+
+
+def plantillas_prod():
+    """TEMPLATES como en settings/prod.py: cargador cacheado y sin el context processor de debug."""
+    plantillas = deepcopy(settings.TEMPLATES)
+    opciones = plantillas[0]['OPTIONS']
+    plantillas[0]['APP_DIRS'] = False
+    opciones['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+    opciones['context_processors'] = [
+        procesador for procesador in opciones['context_processors']
+        if procesador != 'django.template.context_processors.debug'
+    ]
+    return plantillas
+
+
+def sin_csrf(html):
+    return re.sub(rb'name="csrfmiddlewaretoken" value="[^"]+"', b'', html)
+
+
+class PerfilesPlantillasTests(TestCase):
+    """El listado con el perfil de producción (plantillas y fragmentos cacheados) no es más lento que en desarrollo."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_superuser('admin', 'admin@example.com', 'clave')
+        crear_productos(100)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.usuario)
+
+    def medir(self, plantillas, tiempo_fragmentos, repeticiones=5):
+        url = reverse('productos:producto_list') + '?por_pagina=100'
+        with override_settings(TEMPLATES=plantillas, TIEMPO_FRAGMENTOS=tiempo_fragmentos):
+            html = sin_csrf(self.client.get(url).content)
+            tiempos = []
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                respuesta = self.client.get(url)
+                tiempos.append(time.perf_counter() - inicio)
+                self.assertEqual(sin_csrf(respuesta.content), html)
+        return min(tiempos), html
+
+    def test_prod_no_es_mas_lento_que_dev(self):
+        dev, html_dev = self.medir(deepcopy(settings.TEMPLATES), 0)
+        prod, html_prod = self.medir(plantillas_prod(), 60 * 60)
+        self.assertEqual(html_prod, html_dev)
+        self.assertLess(prod, dev)
+
+
+class BusquedaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.productos = crear_productos(3)
+        Producto.objects.filter(pk=self.productos[0].pk).update(busqueda='vino torrontes p00000')
+        Producto.objects.filter(pk=self.productos[1].pk).update(busqueda='vino torrontesito p00001')
+        busqueda.cache_compartido.invalidar('busqueda')
+
+    def test_una_venta_no_reconstruye_el_indice(self):
+        self.assertEqual(set(busqueda.buscar_productos(Producto.objects.all(), 'torrontes')), set(self.productos[:2]))
+        indice = busqueda._indice
+        with self.captureOnCommitCallbacks(execute=True):
+            registrar_movimientos([MovimientoStock(producto=self.productos[0], tipo='salida', cantidad=1, usuario='test')])
+        busqueda.buscar_productos(Producto.objects.all(), 'torrontes')
+        self.assertIs(busqueda._indice, indice)
+
+    def test_editar_el_texto_reconstruye_el_indice(self):
+        busqueda.buscar_productos(Producto.objects.all(), 'torrontes')
+        indice = busqueda._indice
+        producto = Producto.objects.get(pk=self.productos[2].pk)
+        producto.nombre = 'Malbec'
+        with self.captureOnCommitCallbacks(execute=True):
+            producto.save()
+        self.assertEqual(list(busqueda.buscar_productos(Producto.objects.all(), 'malbec')), [producto])
+        self.assertIsNot(busqueda._indice, indice)
+
+    def test_limite_con_los_mejor_rankeados(self):
+        # La palabra completa va antes que el prefijo
+        resultado = busqueda.buscar_productos(Producto.objects.all(), 'torrontes', limite=1)
+        self.assertEqual(list(resultado), [self.productos[0]])
+
+
+class PreciosTests(TestCase):
+    def setUp(self):
+        self.productos = crear_productos(3)
+        Producto.objects.filter(pk=self.productos[2].pk).update(precio=Decimal('9.99'))
+
+    def precios(self):
+        return list(Producto.objects.order_by('sku').values_list('precio', flat=True))
+
+    def test_reglas_en_orden_e_historial(self):
+        seleccion = Producto.objects.exclude(pk=self.productos[1].pk)
+        parametros = {'porcentaje': Decimal('10'), 'monto_fijo': Decimal('5'), 'redondear_a': Decimal('10')}
+        # 100 * 1,10 + 5 = 115 -> 120; 9,99 * 1,10 + 5 = 15,989 -> 20
+        vista_previa = dict(previsualizar(seleccion, **parametros).values_list('sku', 'precio_nuevo'))
+        self.assertEqual(vista_previa, {'P00000': Decimal('120.00'), 'P00002': Decimal('20.00')})
+
+        ajuste = aplicar_ajuste(seleccion, usuario='admin', filtro='q=vino', **parametros)
+
+        self.assertEqual(self.precios(), [Decimal('120.00'), Decimal('100.00'), Decimal('20.00')])
+        self.assertEqual((ajuste.productos, ajuste.usuario, ajuste.filtro), (2, 'admin', 'q=vino'))
+        self.assertEqual(AjustePrecio.objects.get().productos, 2)
+        historial = HistorialPrecio.objects.filter(ajuste=ajuste).order_by('producto__sku')
+        self.assertEqual(
+            list(historial.values_list('producto__sku', 'precio_anterior', 'precio_nuevo')),
+            [('P00000', Decimal('100.00'), Decimal('120.00')), ('P00002', Decimal('9.99'), Decimal('20.00'))],
+        )
+        self.assertEqual({h.fecha for h in historial}, {ajuste.fecha})
+
+    def test_sin_cambio_no_se_registra(self):
+        # Redondear a 10 sólo cambia el de 9,99
+        ajuste = aplicar_ajuste(Producto.objects.all(), redondear_a=Decimal('10'))
+        self.assertEqual(ajuste.productos, 1)
+        self.assertEqual(list(HistorialPrecio.objects.values_list('producto_id', flat=True)), [self.productos[2].pk])
+        self.assertEqual(self.precios(), [Decimal('100.00'), Decimal('100.00'), Decimal('10.00')])
+
+    def test_el_precio_no_baja_del_minimo(self):
+        aplicar_ajuste(Producto.objects.all(), monto_fijo=Decimal('-500'))
+        self.assertEqual(self.precios(), [Decimal('0.01')] * 3)
+
+
+class VelocidadTests(TestCase):
+    hasta = date(2026, 3, 28)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.productos = crear_productos(3)
+        cliente = Cliente.objects.create(
+            nombre='Ana', apellido='Pérez', documento='30111222', email='ana@example.com', telefono='1', direccion='-',
+        )
+        # Producto 0: 14 unidades el último día y 14 a principio de la ventana.
+        # Producto 2: sólo ventas fuera de la ventana de 28 días.
+        ventas = [
+            (date(2026, 3, 28), 0, 14), (date(2026, 3, 5), 0, 10), (date(2026, 3, 5), 0, 4),
+            (date(2026, 2, 28), 2, 5), (date(2026, 3, 29), 2, 5),
+        ]
+        for numero, (fecha, indice, cantidad) in enumerate(ventas):
+            venta = Venta.objects.create(codigo=f'T-{numero}', cliente=cliente, fecha=fecha)
+            ItemVenta.objects.create(venta=venta, producto=cls.productos[indice], cantidad=cantidad)
+
+    def calcular(self):
+        call_command('calcular_velocidades', hasta=f"{self.hasta}", dias_entrega=7, dias_cobertura=30, stdout=io.StringIO())
+        return {
+            v.producto_id: (v.ventas_7d, v.ventas_28d, v.velocidad, v.dias_cobertura, v.reposicion_sugerida)
+            for v in VelocidadProducto.objects.all()
+        }
+
+    def test_matriz_producto_por_dia(self):
+        ids = np.array([p.pk for p in self.productos])
+        matriz = matriz_ventas(ids, date(2026, 3, 1), 28)
+        self.assertEqual(matriz.shape, (3, 28))
+        self.assertEqual((matriz[0, 27], matriz[0, 4], matriz.sum()), (14, 14, 28))
+
+    def test_velocidad_cobertura_y_reposicion(self):
+        p0, p1, p2 = (p.pk for p in self.productos)
+        # 0,5 * 14/7 + 0,5 * 28/28 = 1,5 por día; stock 10 -> 6,7 días.
+        # Punto de pedido 1,5 * 7 + 2 = 12,5 >= 10: reponer hasta 1,5 * 37 + 2 = 57,5
+        self.assertEqual(self.calcular(), {
+            p0: (14, 28, Decimal('1.500'), Decimal('6.7'), 48),
+            p1: (0, 0, Decimal('0.000'), None, 0),
+            p2: (0, 0, Decimal('0.000'), None, 0),
+        })
+
+    def test_recalcular_actualiza_las_filas(self):
+        self.calcular()
+        Producto.objects.filter(pk=self.productos[0].pk).update(stock=30)
+        velocidades = self.calcular()
+        self.assertEqual(VelocidadProducto.objects.count(), 3)
+        self.assertEqual(velocidades[self.productos[0].pk][3:], (Decimal('20.0'), 0))
@@ -10,6 +10,12 @@ urlpatterns = [
     path('<int:pk>/editar/', views.ProductoUpdateView.as_view(), name='producto_update'),
     path('<int:pk>/eliminar/', views.ProductoDeleteView.as_view(), name='producto_delete'),
     path('<int:pk>/movimiento/', views.MovimientoStockCreateView.as_view(), name='movimiento_create'),
+    path('<int:pk>/movimientos/', views.MovimientoStockListView.as_view(), name='movimiento_list'),
     path('<int:pk>/ajustar-stock/', views.AjusteStockView.as_view(), name='ajustar_stock'),
+    path('movimientos/exportar/', views.exportar_movimientos, name='exportar_movimientos'),
     path('stock-bajo/', views.StockBajoListView.as_view(), name='stock_bajo_list'),
+    path('precios/', views.AjustePrecioView.as_view(), name='ajuste_precio'),
+    path('reposicion/', views.ReposicionListView.as_view(), name='reposicion_list'),
+    path('catalogo/', views.catalogo_snapshot, name='catalogo_snapshot'),
+    path('buscar/', views.productos_autocompletar, name='autocompletar'),
 ]
@@ -0,0 +1,140 @@
+"""
+Velocidad de venta, días de cobertura y reposición sugerida (VelocidadProducto).
+
+`calcular_velocidades` lee las unidades vendidas por producto y por día en
+una sola consulta (agrupada en la base) y hace todas las cuentas con NumPy
+sobre una matriz producto x día de todo el catálogo:
+
+- velocidad: promedio diario ponderado de los últimos 7 y 28 días.
+- días de cobertura: stock / velocidad.
+- punto de pedido: velocidad * días de entrega + stock mínimo. Al llegar a
+  él se sugiere reponer hasta cubrir la entrega más REPOSICION_DIAS_COBERTURA.
+
+Se corre de noche con `manage.py calcular_velocidades`.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from inventario.cache import invalidar_al_confirmar
+from ventas.models import ItemVenta
+from .models import Producto, VelocidadProducto
+
+DIAS_HISTORIAL = 28
+DIAS_RECIENTES = 7
+# Peso de los últimos 7 días frente a los 28 en la velocidad
+PESO_RECIENTE = 0.5
+TAMANIO_LOTE = 2000
+# Tope para los días de cobertura de productos que casi no se venden
+COBERTURA_MAXIMA = 99999
+
+CAMPOS_ACTUALIZABLES = [
+    'ventas_7d', 'ventas_28d', 'velocidad', 'dias_cobertura', 'reposicion_sugerida', 'calculado',
+]
+
+
+def matriz_ventas(ids, desde, dias):
+    """
+    Unidades vendidas como matriz (len(ids) x dias); la columna 0 es `desde`.
+    `ids` tiene que estar ordenado.
+    """
+    filas = (
+        ItemVenta.objects
+        .filter(venta__fecha__gte=desde, venta__fecha__lt=desde + timedelta(days=dias))
+        .values_list('producto_id', 'venta__fecha')
+        .annotate(unidades=Sum('cantidad'))
+        .order_by()
+    )
+    origen = desde.toordinal()
+    datos = np.array(
+        [(pk, fecha.toordinal() - origen, unidades) for pk, fecha, unidades in filas.iterator(chunk_size=TAMANIO_LOTE)],
+        dtype=np.int64,
+    ).reshape(-1, 3)
+
+    matriz = np.zeros((len(ids), dias), dtype=np.int64)
+    if len(ids) and len(datos):
+        posicion = np.searchsorted(ids, datos[:, 0]).clip(max=len(ids) - 1)
+        # Descarta ventas de productos creados después de leer el catálogo
+        validos = ids[posicion] == datos[:, 0]
+        np.add.at(matriz, (posicion[validos], datos[validos, 1]), datos[validos, 2])
+    return matriz
+
+
+def calcular(stock, stock_minimo, matriz, dias_entrega, dias_cobertura):
+    """Cálculo vectorizado. Devuelve un dict de arrays, uno por campo de VelocidadProducto."""
+    ventas_28d = matriz[:, -DIAS_HISTORIAL:].sum(axis=1)
+    ventas_7d = matriz[:, -DIAS_RECIENTES:].sum(axis=1)
+    velocidad = PESO_RECIENTE * ventas_7d / DIAS_RECIENTES + (1 - PESO_RECIENTE) * ventas_28d / DIAS_HISTORIAL
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cobertura = np.where(velocidad > 0, np.minimum(stock / velocidad, COBERTURA_MAXIMA), np.nan)
+
+    seguridad = np.maximum(stock_minimo, 0)
+    punto_pedido = velocidad * dias_entrega + seguridad
+    objetivo = velocidad * (dias_entrega + dias_cobertura) + seguridad
+    sugerida = np.where(stock <= punto_pedido, np.ceil(objetivo - stock), 0).clip(min=0)
+
+    return {
+        'ventas_7d': ventas_7d,
+        'ventas_28d': ventas_28d,
+        'velocidad': velocidad,
+        'dias_cobertura': cobertura,
+        'reposicion_sugerida': sugerida.astype(np.int64),
+    }
+
+
+def _decimal(valor, decimales):
+    return None if np.isnan(valor) else Decimal(f"{valor:.{decimales}f}")
+
+
+def calcular_velocidades(hasta=None, dias_entrega=None, dias_cobertura=None):
+    """
+    Recalcula VelocidadProducto para todo el catálogo con las ventas de los
+    DIAS_HISTORIAL días que terminan en `hasta` (por defecto, ayer).
+    Devuelve la cantidad de productos procesados.
+    """
+    hasta = hasta or timezone.localdate() - timedelta(days=1)
+    desde = hasta - timedelta(days=DIAS_HISTORIAL - 1)
+    if dias_entrega is None:
+        dias_entrega = getattr(settings, 'REPOSICION_DIAS_ENTREGA', 7)
+    if dias_cobertura is None:
+        dias_cobertura = getattr(settings, 'REPOSICION_DIAS_COBERTURA', 30)
+
+    catalogo = np.array(
+        list(Producto.objects.order_by('id').values_list('id', 'stock', 'stock_minimo').iterator(chunk_size=TAMANIO_LOTE)),
+        dtype=np.int64,
+    ).reshape(-1, 3)
+    ids, stock, stock_minimo = catalogo[:, 0], catalogo[:, 1], catalogo[:, 2]
+    resultado = calcular(stock, stock_minimo, matriz_ventas(ids, desde, DIAS_HISTORIAL), dias_entrega, dias_cobertura)
+
+    ahora = timezone.now()
+    filas = [
+        VelocidadProducto(
+            producto_id=int(pk),
+            ventas_7d=int(v7),
+            ventas_28d=int(v28),
+            velocidad=_decimal(velocidad, 3),
+            dias_cobertura=_decimal(cobertura, 1),
+            reposicion_sugerida=int(sugerida),
+            calculado=ahora,
+        )
+        for pk, v7, v28, velocidad, cobertura, sugerida in zip(
+            ids, resultado['ventas_7d'], resultado['ventas_28d'], resultado['velocidad'],
+            resultado['dias_cobertura'], resultado['reposicion_sugerida'],
+        )
+    ]
+    with transaction.atomic():
+        for inicio in range(0, len(filas), TAMANIO_LOTE):
+            VelocidadProducto.objects.bulk_create(
+                filas[inicio:inicio + TAMANIO_LOTE],
+                update_conflicts=True,
+                unique_fields=['producto'],
+                update_fields=CAMPOS_ACTUALIZABLES,
+            )
+        invalidar_al_confirmar('productos')
+    return len(filas)
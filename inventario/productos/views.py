@@ -1,24 +1,42 @@
+import csv
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView, DetailView, FormView
 from django.urls import reverse_lazy
 from django.contrib import messages
 from django.db.models import Q, F
-from django.utils import timezone
+from django.core.exceptions import ValidationError
+from django.db import transaction
 from django_filters.views import FilterView
-from .models import Producto, MovimientoStock
-from .forms import ProductoForm, MovimientoStockForm, AjusteStockForm
-from .filters import ProductoFilter
+from .models import Producto, MovimientoStock, AjustePrecio, HistorialPrecio
+from .forms import ProductoForm, MovimientoStockForm, AjusteStockForm, AjustePrecioForm
+from .filters import ProductoFilter, MovimientoStockFilter
+from .stock import USUARIO_SISTEMA, ajustar_stock, entrada, registrar_movimientos
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
+from django.contrib.auth.decorators import login_required, permission_required
+from inventario.paginacion import KeysetPaginationMixin, PaginacionEconomicaMixin
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseNotModified, JsonResponse
+from inventario import exportacion
+from .historial import COLUMNAS_EXPORTACION, movimientos_filtrados, movimientos_recientes
+from .precios import aplicar_ajuste, previsualizar
+from .catalogo import version_catalogo, admite_delta, snapshot_completo, snapshot_delta, autocompletar_productos
 
 
 # Listado general con filtros y paginación
-class ProductoListView(LoginRequiredMixin, PermissionRequiredMixin, FilterView):
+class ProductoListView(LoginRequiredMixin, PermissionRequiredMixin, PaginacionEconomicaMixin, FilterView):
     model = Producto
     filterset_class = ProductoFilter
     template_name = 'productos/producto_list.html'
     context_object_name = 'productos'
     paginate_by = 5
     permission_required = 'productos.view_producto'
+    opciones_por_pagina = (5, 10, 25, 50, 100)
+    grupos_cache = ('productos',)
+    # Sólo lo que muestra producto_list.html (fecha_actualizacion es la clave del fragmento de cada fila)
+    columnas_listado = (
+        'id', 'nombre', 'sku', 'precio', 'stock', 'stock_minimo',
+        'imagen', 'imagen_miniatura', 'imagen_detalle', 'fecha_actualizacion',
+    )
 
 
 # Detalle de producto con últimos movimientos y formulario de ajuste
@@ -27,10 +45,12 @@ class ProductoDetailView(LoginRequiredMixin, PermissionRequiredMixin, DetailView
     template_name = 'productos/producto_detail.html'
     context_object_name = 'producto'
     permission_required = 'productos.view_producto'
+    queryset = Producto.objects.select_related('velocidad')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['movimientos'] = MovimientoStock.objects.filter(producto=self.object).order_by('-fecha')[:10]
+        context['movimientos'] = movimientos_recientes(self.object, 10)
+        context['velocidad'] = getattr(self.object, 'velocidad', None)
         context['form_ajuste'] = AjusteStockForm()
         return context
 
@@ -44,16 +64,14 @@ class ProductoCreateView(LoginRequiredMixin, PermissionRequiredMixin, CreateView
     permission_required = 'productos.add_producto'
 
     def form_valid(self, form):
-        response = super().form_valid(form)
-        if form.cleaned_data['stock'] > 0:
-            MovimientoStock.objects.create(
-                producto=self.object,
-                tipo="entrada",  # usar minúscula para coincidir con el modelo
-                cantidad=form.cleaned_data['stock'],
-                motivo="Stock inicial",
-                fecha=timezone.now(),
-                usuario=self.request.user.username if self.request.user.is_authenticated else 'Sistema'
-            )
+        stock_inicial = form.cleaned_data['stock'] or 0
+        usuario = self.request.user.username if self.request.user.is_authenticated else USUARIO_SISTEMA
+        with transaction.atomic():
+            # El producto nace sin stock y el inicial entra por el libro de stock
+            form.instance.stock = 0
+            response = super().form_valid(form)
+            if stock_inicial > 0:
+                entrada(self.object, stock_inicial, motivo="Stock inicial", usuario=usuario)
         messages.success(self.request, 'Producto creado exitosamente.')
         return response
 
@@ -67,9 +85,26 @@ class ProductoUpdateView(LoginRequiredMixin, PermissionRequiredMixin, UpdateView
     permission_required = 'productos.change_producto'
 
     def form_valid(self, form):
-        response = super().form_valid(form)
+        nuevo_stock = form.cleaned_data['stock']
+        usuario = self.request.user.username if self.request.user.is_authenticated else USUARIO_SISTEMA
+        with transaction.atomic():
+            if 'precio' in form.changed_data:
+                HistorialPrecio.objects.create(
+                    producto=form.instance,
+                    precio_anterior=form.initial['precio'],
+                    precio_nuevo=form.cleaned_data['precio'],
+                )
+            # El stock no se escribe con el resto del formulario (evita pisar
+            # ventas concurrentes): la diferencia pasa por el libro de stock.
+            self.object = form.save(commit=False)
+            self.object.save(update_fields=[
+                f.name for f in Producto._meta.concrete_fields
+                if not f.primary_key and f.name not in ('stock', 'fecha_creacion')
+            ])
+            if nuevo_stock is not None:
+                ajustar_stock(self.object, nuevo_stock, motivo="Edición de producto", usuario=usuario)
         messages.success(self.request, 'Producto actualizado exitosamente.')
-        return response
+        return redirect(self.get_success_url())
 
 
 # Eliminar producto
@@ -84,6 +119,26 @@ class ProductoDeleteView(LoginRequiredMixin, PermissionRequiredMixin, DeleteView
         return super().delete(request, *args, **kwargs)
 
 
+# Historial completo de movimientos de un producto, paginado por clave
+class MovimientoStockListView(LoginRequiredMixin, PermissionRequiredMixin, KeysetPaginationMixin, FilterView):
+    model = MovimientoStock
+    filterset_class = MovimientoStockFilter
+    template_name = 'productos/movimiento_list.html'
+    context_object_name = 'movimientos'
+    permission_required = 'productos.view_producto'
+    orden_keyset = ['-fecha', '-id']
+    por_pagina_keyset = 25
+
+    def get_queryset(self):
+        self.producto = get_object_or_404(Producto, pk=self.kwargs['pk'])
+        return MovimientoStock.objects.filter(producto=self.producto)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['producto'] = self.producto
+        return context
+
+
 # Registrar movimiento de stock (entrada/salida)
 class MovimientoStockCreateView(LoginRequiredMixin, PermissionRequiredMixin, CreateView):
     model = MovimientoStock
@@ -105,10 +160,13 @@ class MovimientoStockCreateView(LoginRequiredMixin, PermissionRequiredMixin, Cre
         movimiento = form.save(commit=False)
         producto = get_object_or_404(Producto, pk=self.kwargs['pk'])
         movimiento.producto = producto
-        movimiento.usuario = self.request.user.username if self.request.user.is_authenticated else 'Sistema'
+        movimiento.usuario = self.request.user.username if self.request.user.is_authenticated else USUARIO_SISTEMA
 
-        # No tocamos producto.stock aquí, lo maneja MovimientoStock.save()
-        movimiento.save()
+        try:
+            registrar_movimientos([movimiento])
+        except ValidationError as e:
+            form.add_error('cantidad', e)
+            return self.form_invalid(form)
         messages.success(self.request, 'Movimiento de stock registrado exitosamente.')
         return redirect('productos:producto_detail', pk=producto.pk)
 
@@ -128,19 +186,10 @@ class AjusteStockView(LoginRequiredMixin, PermissionRequiredMixin, FormView):
         producto = get_object_or_404(Producto, pk=self.kwargs['pk'])
         nueva_cantidad = form.cleaned_data['cantidad']
         motivo = form.cleaned_data['motivo'] or 'Ajuste de stock'
-        diferencia = nueva_cantidad - producto.stock
-
-        if diferencia != 0:
-            tipo = 'entrada' if diferencia > 0 else 'salida'
-            MovimientoStock.objects.create(
-                producto=producto,
-                tipo=tipo,
-                cantidad=abs(diferencia),
-                motivo=motivo,
-                fecha=timezone.now(),
-                usuario=self.request.user.username if self.request.user.is_authenticated else 'Sistema'
-            )
-            # producto.stock se ajusta automáticamente en MovimientoStock.save()
+        usuario = self.request.user.username if self.request.user.is_authenticated else USUARIO_SISTEMA
+
+        # La diferencia se calcula bajo bloqueo dentro del libro de stock
+        if ajustar_stock(producto, nueva_cantidad, motivo=motivo, usuario=usuario):
             messages.success(self.request, 'Ajuste de stock realizado exitosamente.')
         else:
             messages.info(self.request, 'No se realizó ningún ajuste ya que la cantidad es la misma.')
@@ -148,13 +197,136 @@ class AjusteStockView(LoginRequiredMixin, PermissionRequiredMixin, FormView):
         return redirect('productos:producto_detail', pk=producto.pk)
 
 
+# Actualización masiva de precios sobre la selección de ProductoFilter
+class AjustePrecioView(LoginRequiredMixin, PermissionRequiredMixin, FormView):
+    form_class = AjustePrecioForm
+    template_name = 'productos/ajuste_precio_form.html'
+    permission_required = 'productos.change_producto'
+    limite_vista_previa = 20
+
+    def get_filterset(self):
+        return ProductoFilter(self.request.GET, queryset=Producto.objects.all())
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        filterset = self.get_filterset()
+        seleccion = filterset.qs
+        form = context['form']
+        if form.is_bound and form.is_valid():
+            seleccion = previsualizar(seleccion, **form.cleaned_data)
+        context.update({
+            'filter': filterset,
+            'cantidad': filterset.qs.count(),
+            'vista_previa': seleccion[:self.limite_vista_previa],
+            'ajustes': AjustePrecio.objects.all()[:5],
+        })
+        return context
+
+    def post(self, request, *args, **kwargs):
+        form = self.get_form()
+        if form.is_valid() and 'confirmar' in request.POST:
+            return self.form_valid(form)
+        # Sin confirmar (o con errores) se muestra la vista previa
+        return self.render_to_response(self.get_context_data(form=form))
+
+    def form_valid(self, form):
+        usuario = self.request.user.username if self.request.user.is_authenticated else USUARIO_SISTEMA
+        ajuste = aplicar_ajuste(
+            self.get_filterset().qs,
+            usuario=usuario,
+            filtro=self.request.GET.urlencode(),
+            **form.cleaned_data,
+        )
+        messages.success(self.request, f'Precios actualizados: {ajuste.productos} productos.')
+        return redirect(self.request.get_full_path())
+
+
 # Listado de productos con stock bajo + paginación
-class StockBajoListView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
+class StockBajoListView(LoginRequiredMixin, PermissionRequiredMixin, PaginacionEconomicaMixin, ListView):
     model = Producto
     template_name = 'productos/stock_bajo_list.html'
     context_object_name = 'productos'
     paginate_by = 5
     permission_required = 'productos.view_producto'
+    opciones_por_pagina = (5, 10, 25, 50, 100)
+    grupos_cache = ('productos',)
+    columnas_listado = (
+        'id', 'sku', 'nombre', 'stock', 'stock_minimo',
+        'velocidad__velocidad', 'velocidad__dias_cobertura', 'velocidad__reposicion_sugerida',
+    )
 
     def get_queryset(self):
-        return Producto.objects.filter(stock__lt=F('stock_minimo')).order_by('stock')
+        # Filtro y orden resueltos por el índice parcial producto_faltante_idx
+        return super().get_queryset().select_related('velocidad').filter(stock_bajo=True).order_by(
+            (F('stock_minimo') - F('stock')).desc(), 'id'
+        )
+
+
+# Lista de reposición: productos con stock bajo ordenados por faltante, exportable a CSV
+class ReposicionListView(StockBajoListView):
+    template_name = 'productos/reposicion_list.html'
+    paginate_by = 50
+
+    def get(self, request, *args, **kwargs):
+        if request.GET.get('formato') == 'csv':
+            return self.exportar_csv()
+        return super().get(request, *args, **kwargs)
+
+    def exportar_csv(self):
+        response = HttpResponse(content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = 'attachment; filename="reposicion.csv"'
+        writer = csv.writer(response)
+        writer.writerow(['SKU', 'Nombre', 'Stock', 'Stock mínimo', 'Faltante', 'Velocidad (u/día)', 'Días de cobertura', 'Sugerido'])
+        filas = self.get_queryset().values_list(
+            'sku', 'nombre', 'stock', 'stock_minimo',
+            'velocidad__velocidad', 'velocidad__dias_cobertura', 'velocidad__reposicion_sugerida',
+        )
+        for sku, nombre, stock, stock_minimo, velocidad, cobertura, sugerido in filas.iterator():
+            writer.writerow([sku, nombre, stock, stock_minimo, stock_minimo - stock, velocidad, cobertura, sugerido])
+        return response
+
+
+# Exportación del historial de movimientos (CSV o JSONL, opcionalmente gzip)
+@login_required
+@permission_required('productos.view_producto', raise_exception=True)
+def exportar_movimientos(request):
+    formato = request.GET.get('formato', 'csv')
+    if formato not in exportacion.FORMATOS:
+        return HttpResponseBadRequest("Formato no soportado.")
+    try:
+        movimientos = movimientos_filtrados(request.GET)
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+    return exportacion.respuesta(
+        'movimientos', COLUMNAS_EXPORTACION, movimientos, formato, comprimir=request.GET.get('gzip') == '1',
+    )
+
+
+# Snapshot del catálogo (precio y stock) para la pantalla de ventas
+@login_required
+@permission_required('productos.view_producto', raise_exception=True)
+def catalogo_snapshot(request):
+    version = version_catalogo()
+    etag = f'"{version}"'
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponseNotModified()
+    else:
+        try:
+            desde = int(request.GET.get('desde', 0))
+        except ValueError:
+            desde = 0
+        if admite_delta(desde, version):
+            datos = snapshot_delta(desde, version)
+        else:
+            datos = snapshot_completo(version)
+        response = JsonResponse(datos)
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+# Búsqueda de productos para los selectores de la pantalla de ventas
+@login_required
+@permission_required('productos.view_producto', raise_exception=True)
+def productos_autocompletar(request):
+    return JsonResponse({'resultados': autocompletar_productos(request.GET.get('q'))})
@@ -0,0 +1,80 @@
+"""
+Mantenimiento de los agregados que leen los reportes.
+
+- VentaProductoDiaria: se acumula al registrar cada venta y se reconstruye
+  desde ItemVenta con `manage.py rebuild_reportes`.
+- Al confirmar una venta o reconstruir un agregado se invalida el grupo
+  'ventas' del cache compartido (inventario.cache), y con él los reportes.
+"""
+from django.db import transaction
+from django.db.models import Case, F, Sum, Value, When
+
+from inventario.cache import invalidar_al_confirmar
+from ventas.models import ItemVenta
+from .models import VentaProductoDiaria
+
+
+def acumular_items(fecha, items):
+    """
+    Suma los ítems de una venta al agregado del día (llamar dentro de la
+    transacción de la venta). Siempre dos consultas, sin importar los ítems:
+    crea las filas que falten (en cero) y suma en un solo UPDATE.
+    """
+    totales = {}
+    for item in items:
+        unidades, ingresos = totales.get(item.producto_id, (0, 0))
+        totales[item.producto_id] = (unidades + item.cantidad, ingresos + (item.subtotal or 0))
+    if not totales:
+        return
+
+    # Si otra caja crea la fila del día al mismo tiempo, el conflicto se ignora
+    VentaProductoDiaria.objects.bulk_create(
+        [VentaProductoDiaria(fecha=fecha, producto_id=pid) for pid in totales],
+        ignore_conflicts=True,
+    )
+    VentaProductoDiaria.objects.filter(fecha=fecha, producto_id__in=totales.keys()).update(
+        unidades=F('unidades') + Case(
+            *[When(producto_id=pid, then=Value(unidades)) for pid, (unidades, _) in totales.items()],
+            default=Value(0),
+        ),
+        ingresos=F('ingresos') + Case(
+            *[When(producto_id=pid, then=Value(ingresos)) for pid, (_, ingresos) in totales.items()],
+            default=Value(0),
+            output_field=VentaProductoDiaria._meta.get_field('ingresos'),
+        ),
+    )
+    invalidar_al_confirmar('ventas')
+
+
+def reconstruir_ventas_productos(desde=None, hasta=None):
+    """Recalcula VentaProductoDiaria desde ItemVenta, opcionalmente para un rango de fechas."""
+    items = ItemVenta.objects.all()
+    agregado = VentaProductoDiaria.objects.all()
+    if desde:
+        items = items.filter(venta__fecha__gte=desde)
+        agregado = agregado.filter(fecha__gte=desde)
+    if hasta:
+        items = items.filter(venta__fecha__lte=hasta)
+        agregado = agregado.filter(fecha__lte=hasta)
+
+    filas = (
+        items.values('venta__fecha', 'producto_id')
+        .annotate(unidades=Sum('cantidad'), ingresos=Sum('subtotal'))
+        .order_by()
+    )
+    with transaction.atomic():
+        agregado.delete()
+        creadas = VentaProductoDiaria.objects.bulk_create(
+            [
+                VentaProductoDiaria(
+                    fecha=fila['venta__fecha'],
+                    producto_id=fila['producto_id'],
+                    unidades=fila['unidades'] or 0,
+                    ingresos=fila['ingresos'] or 0,
+                )
+                for fila in filas.iterator()
+            ],
+            batch_size=1000,
+        )
+        invalidar_al_confirmar('ventas')
+    return len(creadas)
@@ -0,0 +1,105 @@
+"""
+Reportes: valuación del inventario, productos más vendidos y ventas por
+medio de pago.
+
+Todos se calculan con agregaciones en la base y se cachean
+REPORTES_TIEMPO_CACHE segundos en el cache compartido (inventario.cache),
+así que un cambio invalida el reporte antes de que venza:
+
+- valuación: grupo 'valuacion', que las ventas no invalidan (cambiaría con
+  cada venta); refleja las ventas cuando vence.
+- ventas: grupo 'ventas'.
+
+Los reportes de ventas leen sólo los resúmenes diarios (VentaDiaria y
+VentaProductoDiaria), nunca Venta ni ItemVenta.
+"""
+from django.conf import settings
+from django.db.models import Count, DecimalField, F, Q, Sum
+from django.db.models.functions import Coalesce
+
+from inventario import cache
+from productos.models import Producto
+from ventas.models import MEDIO_PAGO_CHOICES, VentaDiaria
+from .models import VentaProductoDiaria
+
+CRITERIOS_TOP = {
+    'unidades': 'unidades',
+    'ingresos': 'ingresos',
+}
+
+
+def _tiempo_cache():
+    return getattr(settings, 'REPORTES_TIEMPO_CACHE', 15 * 60)
+
+
+def _cacheado(nombre, grupo, calcular, parametros=None):
+    return cache.obtener(nombre, (grupo,), calcular, parametros, _tiempo_cache())
+
+
+def valuacion_inventario():
+    """Unidades en stock y valor (stock * precio) del inventario."""
+    def calcular():
+        return Producto.objects.aggregate(
+            productos=Count('id'),
+            con_stock=Count('id', filter=Q(stock__gt=0)),
+            unidades=Coalesce(Sum('stock'), 0),
+            valor=Coalesce(
+                Sum(F('stock') * F('precio'), output_field=DecimalField(max_digits=16, decimal_places=2)),
+                0,
+                output_field=DecimalField(max_digits=16, decimal_places=2),
+            ),
+        )
+
+    return _cacheado('reportes:valuacion', 'valuacion', calcular)
+
+
+def top_productos(desde, hasta, cantidad=10, criterio='unidades'):
+    """Los `cantidad` productos más vendidos del período por unidades o ingresos."""
+    orden = CRITERIOS_TOP[criterio]
+
+    def calcular():
+        filas = (
+            VentaProductoDiaria.objects
+            .filter(fecha__gte=desde, fecha__lte=hasta)
+            .values('producto_id', 'producto__sku', 'producto__nombre')
+            .annotate(unidades=Sum('unidades'), ingresos=Sum('ingresos'))
+            .order_by(f'-{orden}', 'producto_id')[:cantidad]
+        )
+        return [
+            {
+                'producto_id': fila['producto_id'],
+                'sku': fila['producto__sku'],
+                'nombre': fila['producto__nombre'],
+                'unidades': fila['unidades'],
+                'ingresos': fila['ingresos'],
+            }
+            for fila in filas
+        ]
+
+    parametros = {'desde': desde, 'hasta': hasta, 'cantidad': cantidad, 'criterio': criterio}
+    return _cacheado('reportes:top', 'ventas', calcular, parametros)
+
+
+def ventas_por_medio_pago(desde, hasta):
+    """[{medio_pago, nombre, cantidad, total}] del período, desde el resumen diario."""
+    nombres = dict(MEDIO_PAGO_CHOICES)
+
+    def calcular():
+        filas = (
+            VentaDiaria.objects
+            .filter(fecha__gte=desde, fecha__lte=hasta)
+            .values('medio_pago')
+            .annotate(cantidad=Sum('cantidad'), total=Sum('total'))
+            .order_by('-total')
+        )
+        return [
+            {
+                'medio_pago': fila['medio_pago'],
+                'nombre': nombres.get(fila['medio_pago'], fila['medio_pago']),
+                'cantidad': fila['cantidad'],
+                'total': fila['total'],
+            }
+            for fila in filas
+        ]
+
+    return _cacheado('reportes:medio_pago', 'ventas', calcular, {'desde': desde, 'hasta': hasta})
@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+from .consultas import CRITERIOS_TOP
+
+DIAS_PERIODO = 30
+
+
+class PeriodoForm(forms.Form):
+    """Período y ranking que se muestran en la página de reportes (GET)."""
+    desde = forms.DateField(
+        required=False, label="Desde",
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
+    )
+    hasta = forms.DateField(
+        required=False, label="Hasta",
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
+    )
+    top = forms.IntegerField(
+        required=False, min_value=1, max_value=50, label="Top",
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'placeholder': '10'}),
+    )
+    criterio = forms.ChoiceField(
+        required=False,
+        choices=[('unidades', 'Unidades'), ('ingresos', 'Ingresos')],
+        label="Ordenar por",
+        widget=forms.Select(attrs={'class': 'form-control'}),
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        hasta = cleaned_data.get('hasta') or timezone.localdate()
+        desde = cleaned_data.get('desde') or hasta - timedelta(days=DIAS_PERIODO - 1)
+        if desde > hasta:
+            raise ValidationError("La fecha desde no puede ser posterior a la fecha hasta.")
+        cleaned_data['desde'], cleaned_data['hasta'] = desde, hasta
+        cleaned_data['top'] = cleaned_data.get('top') or 10
+        if cleaned_data.get('criterio') not in CRITERIOS_TOP:
+            cleaned_data['criterio'] = 'unidades'
+        return cleaned_data
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.11 on 2026-10-18 19:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def poblar_ventas_productos(apps, schema_editor):
+    ItemVenta = apps.get_model('ventas', 'ItemVenta')
+    VentaProductoDiaria = apps.get_model('reportes', 'VentaProductoDiaria')
+    filas = (
+        ItemVenta.objects.values('venta__fecha', 'producto_id')
+        .annotate(unidades=Sum('cantidad'), ingresos=Sum('subtotal'))
+        .order_by()
+    )
+    VentaProductoDiaria.objects.bulk_create(
+        [
+            VentaProductoDiaria(
+                fecha=fila['venta__fecha'],
+                producto_id=fila['producto_id'],
+                unidades=fila['unidades'] or 0,
+                ingresos=fila['ingresos'] or 0,
+            )
+            for fila in filas.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('productos', '0016_velocidadproducto'),
+        ('ventas', '0007_venta_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VentaProductoDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('unidades', models.PositiveIntegerField(default=0)),
+                ('ingresos', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='productos.producto')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('fecha', 'producto'), name='ventaproductodiaria_fecha_producto_uniq')],
+            },
+        ),
+        migrations.RunPython(poblar_ventas_productos, migrations.RunPython.noop),
+    ]
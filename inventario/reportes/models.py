@@ -0,0 +1,24 @@
+from django.db import models
+
+from productos.models import Producto
+
+
+class VentaProductoDiaria(models.Model):
+    """
+    Unidades e ingresos por producto y día. Se acumula en la misma
+    transacción que registra cada venta (ver reportes.agregados) y se puede
+    reconstruir con `manage.py rebuild_reportes`. Los reportes de más
+    vendidos leen esta tabla en lugar de ItemVenta.
+    """
+    fecha = models.DateField()
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='+')
+    unidades = models.PositiveIntegerField(default=0)
+    ingresos = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['fecha', 'producto'], name='ventaproductodiaria_fecha_producto_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} {self.producto_id}: {self.unidades}"
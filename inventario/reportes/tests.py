@@ -0,0 +1,83 @@
+import shutil
+import tempfile
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from clientes.models import Cliente
+from productos.models import Producto
+from productos.precios import aplicar_ajuste
+from ventas.models import Venta
+from ventas.services import registrar_venta
+from .agregados import reconstruir_ventas_productos
+from .consultas import top_productos, valuacion_inventario, ventas_por_medio_pago
+from .models import VentaProductoDiaria
+
+
+class ReportesTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_superuser('admin', 'admin@example.com', 'clave')
+        cls.cliente = Cliente.objects.create(
+            nombre='Ana', apellido='Pérez', documento='30111222', email='ana@example.com',
+            telefono='1', direccion='Calle 1',
+        )
+        cls.productos = [
+            Producto.objects.create(nombre=f'Vino {i}', descripcion='-', precio=Decimal('10.00'), stock=10, sku=f'R{i}')
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        # Las ventas prerenderizan la factura al confirmar
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        ajustes = override_settings(FACTURAS_ROOT=directorio, TAREAS_WORKERS=0)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def vender(self, lineas, medio_pago='efectivo'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return registrar_venta(Venta(cliente=self.cliente, medio_pago=medio_pago), lineas, 'caja')
+
+
+class ValuacionTests(ReportesTestCase):
+    def test_las_ventas_no_invalidan_la_valuacion(self):
+        self.assertEqual(valuacion_inventario()['unidades'], 30)
+        self.vender([(self.productos[0].pk, 4)])
+        # Sigue cacheada hasta que vence
+        self.assertEqual(valuacion_inventario()['unidades'], 30)
+
+    def test_ajuste_de_precios_invalida_la_valuacion(self):
+        self.assertEqual(valuacion_inventario()['valor'], Decimal('300.00'))
+        with self.captureOnCommitCallbacks(execute=True):
+            aplicar_ajuste(Producto.objects.all(), porcentaje=Decimal('10'))
+        self.assertEqual(valuacion_inventario()['valor'], Decimal('330.00'))
+
+
+class VentasReportesTests(ReportesTestCase):
+    def test_top_y_medios_de_pago(self):
+        self.vender([(self.productos[0].pk, 1), (self.productos[1].pk, 3)])
+        self.vender([(self.productos[0].pk, 1)], medio_pago='qr')
+        hoy = timezone.localdate()
+
+        top = top_productos(hoy, hoy, cantidad=2)
+        self.assertEqual([(fila['sku'], fila['unidades']) for fila in top], [('R1', 3), ('R0', 2)])
+        medios = {fila['medio_pago']: fila['cantidad'] for fila in ventas_por_medio_pago(hoy, hoy)}
+        self.assertEqual(medios, {'efectivo': 1, 'qr': 1})
+
+    def test_reconstruir_coincide_con_lo_acumulado(self):
+        self.vender([(self.productos[0].pk, 2), (self.productos[2].pk, 1)])
+        acumulado = sorted(VentaProductoDiaria.objects.values_list('producto_id', 'unidades', 'ingresos'))
+        reconstruir_ventas_productos()
+        self.assertEqual(sorted(VentaProductoDiaria.objects.values_list('producto_id', 'unidades', 'ingresos')), acumulado)
+
+    def test_pagina_de_reportes(self):
+        self.client.force_login(self.usuario)
+        respuesta = self.client.get(reverse('reportes:reportes'))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.context['valuacion']['productos'], 3)
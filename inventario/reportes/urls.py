@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+app_name = 'reportes'
+
+urlpatterns = [
+    path('', views.ReportesView.as_view(), name='reportes'),
+]
@@ -0,0 +1,26 @@
+from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
+from django.views.generic import TemplateView
+
+from .consultas import top_productos, valuacion_inventario, ventas_por_medio_pago
+from .forms import PeriodoForm
+
+
+class ReportesView(LoginRequiredMixin, PermissionRequiredMixin, TemplateView):
+    template_name = 'reportes/reportes.html'
+    permission_required = ('productos.view_producto', 'ventas.view_venta')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Todos los campos son opcionales: sin parámetros se muestran los últimos 30 días
+        form = PeriodoForm(self.request.GET)
+        context['form'] = form
+        context['valuacion'] = valuacion_inventario()
+        if not form.is_valid():
+            return context
+
+        periodo = form.cleaned_data
+        context.update(periodo)
+        context['top'] = top_productos(periodo['desde'], periodo['hasta'], periodo['top'], periodo['criterio'])
+        context['medios_pago'] = ventas_por_medio_pago(periodo['desde'], periodo['hasta'])
+        context['total_periodo'] = sum(fila['total'] or 0 for fila in context['medios_pago'])
+        return context
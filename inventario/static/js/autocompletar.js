@@ -0,0 +1,63 @@
+// Búsqueda en el servidor para los <select data-autocompletar="url">
+(function () {
+    const ESPERA_MS = 250;
+
+    function inicializarSelect(select) {
+        if (select.dataset.autocompletarListo) return;
+        select.dataset.autocompletarListo = '1';
+
+        const buscador = document.createElement('input');
+        buscador.type = 'search';
+        buscador.className = 'form-control form-control-sm mb-1';
+        buscador.placeholder = 'Buscar...';
+        buscador.autocomplete = 'off';
+        select.parentNode.insertBefore(buscador, select);
+
+        const minimo = parseInt(select.dataset.minimo || '1', 10);
+        let temporizador = null;
+        let ultimaConsulta = null;
+
+        buscador.addEventListener('input', function () {
+            clearTimeout(temporizador);
+            const consulta = buscador.value.trim();
+            if (consulta.length < minimo || consulta === ultimaConsulta) return;
+
+            temporizador = setTimeout(function () {
+                ultimaConsulta = consulta;
+                fetch(`${select.dataset.autocompletar}?q=${encodeURIComponent(consulta)}`, { credentials: 'same-origin' })
+                    .then(response => {
+                        if (!response.ok) throw new Error(`Búsqueda: HTTP ${response.status}`);
+                        return response.json();
+                    })
+                    .then(data => {
+                        if (consulta !== ultimaConsulta) return;
+                        const seleccionado = select.value;
+                        const vacia = select.querySelector('option[value=""]');
+                        select.innerHTML = '';
+                        if (vacia) select.appendChild(vacia);
+                        data.resultados.forEach(r => {
+                            const opcion = new Option(r.texto, r.id, false, String(r.id) === seleccionado);
+                            select.appendChild(opcion);
+                        });
+                        if (data.resultados.length && !seleccionado) {
+                            select.value = data.resultados[0].id;
+                            select.dispatchEvent(new Event('change'));
+                        }
+                    })
+                    .catch(error => {
+                        // Que la próxima tecla vuelva a intentar la misma consulta
+                        if (consulta === ultimaConsulta) ultimaConsulta = null;
+                        console.error(error);
+                    });
+            }, ESPERA_MS);
+        });
+    }
+
+    window.inicializarAutocompletar = function (raiz) {
+        (raiz || document).querySelectorAll('select[data-autocompletar]').forEach(inicializarSelect);
+    };
+
+    document.addEventListener('DOMContentLoaded', function () {
+        window.inicializarAutocompletar(document);
+    });
+})();
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class VentasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ventas'
+
+    def ready(self):
+        from inventario.cache import invalidar_al_guardar
+        from .models import Venta
+
+        invalidar_al_guardar(Venta, 'ventas')
@@ -0,0 +1,81 @@
+"""
+Asignación de códigos de venta (V-0001, V-0002, ...).
+
+Cada proceso reserva bloques de números y los entrega desde memoria, así que
+asignar un código no cuesta ninguna consulta salvo cuando se agota el bloque.
+En PostgreSQL los números salen de una secuencia (nextval no participa de la
+transacción y nunca bloquea); en otras bases se usa la tabla ContadorCodigo.
+Los huecos son aceptables: un bloque que no se termina de usar se pierde.
+"""
+import os
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+
+from .models import ContadorCodigo
+
+SERIE_VENTAS = 'V'
+SECUENCIA_VENTAS = 'ventas_venta_codigo_seq'
+
+
+def formatear_codigo(serie, numero):
+    return f"{serie}-{numero:04d}"
+
+
+def _reservar_con_secuencia(secuencia, cantidad):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(%s) FROM generate_series(1, %s)",
+            [secuencia, cantidad],
+        )
+        return [fila[0] for fila in cursor.fetchall()]
+
+
+def _reservar_con_tabla(serie, cantidad):
+    with transaction.atomic():
+        ContadorCodigo.objects.get_or_create(serie=serie)
+        ContadorCodigo.objects.filter(serie=serie).update(ultimo=F('ultimo') + cantidad)
+        ultimo = ContadorCodigo.objects.values_list('ultimo', flat=True).get(serie=serie)
+    return list(range(ultimo - cantidad + 1, ultimo + 1))
+
+
+class AsignadorCodigos:
+    """
+    Entrega números consecutivos de una serie reservándolos por bloques.
+    Es seguro entre hilos y detecta un fork para no compartir bloques entre procesos.
+    """
+
+    def __init__(self, serie, secuencia, bloque=None):
+        self.serie = serie
+        self.secuencia = secuencia
+        self.bloque = bloque or getattr(settings, 'VENTAS_CODIGO_BLOQUE', 20)
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._disponibles = deque()
+
+    def _reservar(self):
+        if connection.vendor == 'postgresql':
+            return _reservar_con_secuencia(self.secuencia, self.bloque)
+        if connection.in_atomic_block:
+            # Sin secuencias la reserva viaja dentro de la transacción en curso: si
+            # se revierte, el contador vuelve atrás, así que no guardamos sobrantes.
+            return _reservar_con_tabla(self.serie, 1)
+        return _reservar_con_tabla(self.serie, self.bloque)
+
+    def siguiente_numero(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._disponibles.clear()
+            if not self._disponibles:
+                self._disponibles.extend(self._reservar())
+            return self._disponibles.popleft()
+
+    def siguiente(self):
+        return formatear_codigo(self.serie, self.siguiente_numero())
+
+
+codigos_venta = AsignadorCodigos(SERIE_VENTAS, SECUENCIA_VENTAS)
@@ -0,0 +1,43 @@
+"""
+Exportación de ventas e ítems para contabilidad (ver inventario.exportacion).
+
+Los filtros son los mismos del listado (VentaFilter): desde, hasta,
+cliente, medio_pago y código.
+"""
+from .filters import VentaFilter
+from .models import ItemVenta, Venta
+
+COLUMNAS_VENTAS = [
+    ('id', 'id'),
+    ('codigo', 'codigo'),
+    ('fecha', 'fecha'),
+    ('cliente_documento', 'cliente__documento'),
+    ('cliente_apellido', 'cliente__apellido'),
+    ('cliente_nombre', 'cliente__nombre'),
+    ('medio_pago', 'medio_pago'),
+    ('total', 'total'),
+]
+
+COLUMNAS_ITEMS = [
+    ('id', 'id'),
+    ('venta_id', 'venta_id'),
+    ('venta_codigo', 'venta__codigo'),
+    ('fecha', 'venta__fecha'),
+    ('producto_sku', 'producto__sku'),
+    ('producto_nombre', 'producto__nombre'),
+    ('cantidad', 'cantidad'),
+    ('precio_unitario', 'precio_unitario'),
+    ('subtotal', 'subtotal'),
+]
+
+
+def ventas_filtradas(datos):
+    """Ventas que cumplen los filtros de `datos` (GET u opciones del comando), en orden de fecha."""
+    filtro = VentaFilter(datos, queryset=Venta.objects.all())
+    if not filtro.is_valid():
+        raise ValueError('; '.join(f"{campo}: {' '.join(errores)}" for campo, errores in filtro.errors.items()))
+    return filtro.qs.order_by('fecha', 'id')
+
+
+def items_de(ventas):
+    return ItemVenta.objects.filter(venta__in=ventas.values('id')).order_by('venta_id', 'id')
@@ -0,0 +1,119 @@
+"""
+Almacén de facturas PDF ya renderizadas.
+
+Una venta confirmada no cambia, así que el PDF se genera una sola vez en el
+pool de procesos (después del commit) y las descargas sirven el archivo.
+Cada archivo se nombra `<venta_id>-<huella>.pdf`. La huella se calcula sin
+renderizar ni consultar los ítems: hash de la plantilla más las columnas de
+la venta y del cliente (los ítems no cambian después de registrada la venta
+y el total los resume). Si cambia la plantilla o los datos, cambia la huella
+y el PDF viejo se reemplaza; si no, la descarga (o el 304) no renderiza nada.
+"""
+import glob
+import hashlib
+import logging
+import os
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.db import transaction
+from django.template.loader import get_template, render_to_string
+
+from inventario.metricas import seccion
+from inventario.tareas import ejecutar
+from .models import Venta
+
+logger = logging.getLogger(__name__)
+
+
+def directorio_facturas():
+    return str(getattr(settings, 'FACTURAS_ROOT', os.path.join(settings.BASE_DIR, 'facturas')))
+
+
+def renderizar_html(venta):
+    items = venta.items.select_related('producto')
+    return render_to_string(PLANTILLA_FACTURA, {'venta': venta, 'items': items})
+
+
+PLANTILLA_FACTURA = 'venta/factura_pdf.html'
+
+
+def _columnas(objeto):
+    return [(campo.attname, getattr(objeto, campo.attname)) for campo in objeto._meta.concrete_fields]
+
+
+def calcular_huella(venta):
+    """
+    Huella de la factura de `venta` (con el cliente ya cargado) sin renderizarla.
+    Los ítems quedan afuera a propósito: no se editan después de registrada la
+    venta (no hay vista ni servicio que los modifique) y el total los resume.
+    """
+    # Con el cargador cacheado de producción la fuente no se vuelve a leer del disco
+    fuente = get_template(PLANTILLA_FACTURA).template.source
+    datos = repr((fuente, _columnas(venta), _columnas(venta.cliente)))
+    return hashlib.sha256(datos.encode('utf-8')).hexdigest()[:20]
+
+
+def ruta_factura(venta_id, huella):
+    return os.path.join(directorio_facturas(), f"{venta_id}-{huella}.pdf")
+
+
+@seccion('factura_pdf')
+def generar_pdf(html, ruta):
+    """
+    Renderiza el HTML a PDF y lo escribe de forma atómica en `ruta`.
+    Corre en el pool de procesos: no usa la base de datos.
+    """
+    from xhtml2pdf import pisa
+
+    buffer = BytesIO()
+    resultado = pisa.CreatePDF(html, dest=buffer)
+    if resultado.err:
+        raise RuntimeError(f"No se pudo generar el PDF {os.path.basename(ruta)}")
+
+    directorio = os.path.dirname(ruta)
+    os.makedirs(directorio, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=directorio, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as archivo:
+        archivo.write(buffer.getvalue())
+    os.replace(temporal, ruta)
+
+    # Borramos versiones anteriores de la misma venta
+    venta_id = os.path.basename(ruta).split('-', 1)[0]
+    for anterior in glob.glob(os.path.join(directorio, f"{venta_id}-*.pdf")):
+        if anterior != ruta:
+            try:
+                os.remove(anterior)
+            except OSError:
+                pass
+    return ruta
+
+
+def obtener_factura(venta, huella=None):
+    """
+    Devuelve (ruta, huella) del PDF de la venta. Sólo si no está en el
+    almacén (o quedó desactualizado) renderiza el HTML y el PDF en el momento.
+    """
+    huella = huella or calcular_huella(venta)
+    ruta = ruta_factura(venta.pk, huella)
+    if not os.path.exists(ruta):
+        generar_pdf(renderizar_html(venta), ruta)
+    return ruta, huella
+
+
+def prerenderizar_factura(venta_id):
+    """Encola el render del PDF en el pool de procesos."""
+    try:
+        venta = Venta.objects.select_related('cliente').get(pk=venta_id)
+        ruta = ruta_factura(venta.pk, calcular_huella(venta))
+        if not os.path.exists(ruta):
+            ejecutar(generar_pdf, renderizar_html(venta), ruta)
+    except Exception:
+        # La venta ya está confirmada; si falla, la factura se genera al descargarla.
+        logger.exception("No se pudo prerenderizar la factura de la venta %s", venta_id)
+
+
+def programar_factura(venta):
+    """Prerenderiza la factura cuando se confirme la transacción de la venta."""
+    transaction.on_commit(lambda: prerenderizar_factura(venta.pk))
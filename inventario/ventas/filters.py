@@ -0,0 +1,35 @@
+# ventas/filters.py
+import django_filters
+from django import forms
+from .models import Venta, MEDIO_PAGO_CHOICES
+
+
+class VentaFilter(django_filters.FilterSet):
+    desde = django_filters.DateFilter(
+        field_name='fecha', lookup_expr='gte', label='Desde',
+        widget=forms.DateInput(attrs={'type': 'date'}),
+    )
+    hasta = django_filters.DateFilter(
+        field_name='fecha', lookup_expr='lte', label='Hasta',
+        widget=forms.DateInput(attrs={'type': 'date'}),
+    )
+    cliente = django_filters.CharFilter(method='filter_cliente', label='Documento del cliente')
+    medio_pago = django_filters.ChoiceFilter(choices=MEDIO_PAGO_CHOICES, label='Medio de pago')
+    codigo = django_filters.CharFilter(method='filter_codigo', label='Código')
+
+    def filter_cliente(self, queryset, name, value):
+        value = (value or "").strip()
+        if not value:
+            return queryset
+        # Igualdad exacta sobre el documento (único) para usar el índice (cliente, fecha, id)
+        return queryset.filter(cliente__documento=value)
+
+    def filter_codigo(self, queryset, name, value):
+        value = (value or "").strip().upper()
+        if not value:
+            return queryset
+        return queryset.filter(codigo=value)
+
+    class Meta:
+        model = Venta
+        fields = ['desde', 'hasta', 'cliente', 'medio_pago', 'codigo']
@@ -1,11 +1,17 @@
 from django import forms
-from django.forms import inlineformset_factory
+from django.core.exceptions import ValidationError
+from django.forms import BaseInlineFormSet, inlineformset_factory
+from inventario.widgets import AutocompleteSelect
+from productos.models import Producto
 from .models import Venta, ItemVenta
 
 class VentaForm(forms.ModelForm):
     class Meta:
         model = Venta
         fields = ['cliente', 'fecha', 'medio_pago']
+        widgets = {
+            'cliente': AutocompleteSelect('clientes:autocompletar', attrs={'class': 'form-control'}),
+        }
 
     numero_tarjeta = forms.CharField(
         label="Número de tarjeta",
@@ -40,21 +46,70 @@ class VentaForm(forms.ModelForm):
 
         return cleaned_data
 
+class ProductoPrecargadoField(forms.ModelChoiceField):
+    """
+    ModelChoiceField que toma el producto de `precargados` ({pk: producto}),
+    cargado una sola vez por el formset, en lugar de consultar por cada línea.
+    """
+    precargados = None
+
+    def to_python(self, value):
+        if self.precargados is None or value in self.empty_values:
+            return super().to_python(value)
+        try:
+            return self.precargados[int(value)]
+        except (KeyError, TypeError, ValueError):
+            raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice')
+
+
 class ItemVentaForm(forms.ModelForm):
+    producto = ProductoPrecargadoField(
+        queryset=Producto.objects.all(),
+        widget=AutocompleteSelect('productos:autocompletar', attrs={'class': 'producto'}),
+    )
+
     class Meta:
         model = ItemVenta
         fields = ['producto', 'cantidad', 'precio_unitario', 'subtotal']
         widgets = {
-            'producto': forms.Select(attrs={'class': 'producto'}),
             'cantidad': forms.NumberInput(attrs={'class': 'cantidad'}),
             'precio_unitario': forms.TextInput(attrs={'class': 'precio-unitario', 'readonly': 'readonly'}),
             'subtotal': forms.TextInput(attrs={'class': 'subtotal', 'readonly': 'readonly'}),
         }
 
+    def _get_validation_exclusions(self):
+        exclusiones = super()._get_validation_exclusions()
+        if self.fields['producto'].precargados is not None:
+            # La existencia del producto ya se verificó al precargarlo
+            exclusiones.add('producto')
+        return exclusiones
+
+
+class BaseItemVentaFormSet(BaseInlineFormSet):
+    """Resuelve los productos de todas las líneas con una sola consulta (in_bulk)."""
+
+    def _productos_precargados(self):
+        if not hasattr(self, '_precargados'):
+            ids = set()
+            for i in range(self.total_form_count()):
+                valor = self.data.get(f"{self.add_prefix(i)}-producto")
+                if valor and str(valor).isdigit():
+                    ids.add(int(valor))
+            self._precargados = Producto.objects.in_bulk(ids) if ids else {}
+        return self._precargados
+
+    def _construct_form(self, i, **kwargs):
+        form = super()._construct_form(i, **kwargs)
+        if self.is_bound:
+            form.fields['producto'].precargados = self._productos_precargados()
+        return form
+
+
 ItemVentaFormSet = inlineformset_factory(
     Venta,
     ItemVenta,
     form=ItemVentaForm,
+    formset=BaseItemVentaFormSet,
     extra=1,
     can_delete=True
 )
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from inventario import exportacion
+from ventas.exportacion import COLUMNAS_ITEMS, COLUMNAS_VENTAS, items_de, ventas_filtradas
+
+
+class Command(BaseCommand):
+    help = "Exporta ventas (o sus ítems) en CSV o JSON Lines, opcionalmente con gzip, sin cargarlas en memoria."
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', nargs='?', default='-', help="Archivo de salida ('-' = salida estándar).")
+        parser.add_argument('--items', action='store_true', help="Exporta los ítems en lugar de las ventas.")
+        parser.add_argument('--desde', help="Fecha inicial (AAAA-MM-DD).")
+        parser.add_argument('--hasta', help="Fecha final (AAAA-MM-DD), inclusive.")
+        parser.add_argument('--medio-pago', dest='medio_pago', help="Sólo ventas con este medio de pago.")
+        parser.add_argument('--formato', choices=exportacion.FORMATOS, help="Por defecto, según la extensión (csv).")
+        parser.add_argument('--gzip', action='store_true', help="Comprime la salida (implícito con extensión .gz).")
+
+    def handle(self, *args, **options):
+        archivo = options['archivo']
+        formato, comprimir = exportacion.formato_de_archivo(archivo)
+        formato = options['formato'] or formato
+        comprimir = comprimir or options['gzip']
+
+        filtros = {clave: options[clave] for clave in ('desde', 'hasta', 'medio_pago') if options[clave]}
+        try:
+            ventas = ventas_filtradas(filtros)
+        except ValueError as error:
+            raise CommandError(str(error))
+        columnas, queryset = (COLUMNAS_ITEMS, items_de(ventas)) if options['items'] else (COLUMNAS_VENTAS, ventas)
+
+        if archivo == '-':
+            exportacion.escribir_en_salida(self.stdout, columnas, queryset, formato, comprimir)
+            return
+        try:
+            with open(archivo, 'wb') as destino:
+                escritos = exportacion.escribir(destino, columnas, queryset, formato, comprimir)
+        except OSError as error:
+            raise CommandError(str(error))
+        self.stdout.write(self.style.SUCCESS(f"Exportación escrita en {archivo} ({escritos} bytes)."))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from ventas.resumenes import reconstruir_ventas_diarias
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el resumen diario de ventas (VentaDiaria) a partir de la tabla de ventas."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help="Fecha inicial (AAAA-MM-DD). Por defecto, todo el historial.")
+        parser.add_argument('--hasta', help="Fecha final (AAAA-MM-DD). Por defecto, hasta hoy.")
+
+    def handle(self, *args, **options):
+        desde = self._fecha(options['desde'])
+        hasta = self._fecha(options['hasta'])
+        if desde and hasta and desde > hasta:
+            raise CommandError("--desde no puede ser posterior a --hasta.")
+
+        filas = reconstruir_ventas_diarias(desde, hasta)
+        self.stdout.write(self.style.SUCCESS(f"Resumen reconstruido: {filas} filas."))
+
+    def _fecha(self, valor):
+        if not valor:
+            return None
+        try:
+            fecha = parse_date(valor)
+        except ValueError:
+            fecha = None
+        if fecha is None:
+            raise CommandError(f"Fecha inválida: {valor}")
+        return fecha
@@ -0,0 +1,46 @@
+from django.db import migrations, models
+
+SERIE_VENTAS = 'V'
+SECUENCIA_VENTAS = 'ventas_venta_codigo_seq'
+
+
+def inicializar_contador(apps, schema_editor):
+    """Arranca la numeración después del mayor código V-#### existente."""
+    Venta = apps.get_model('ventas', 'Venta')
+    ContadorCodigo = apps.get_model('ventas', 'ContadorCodigo')
+
+    ultimo = 0
+    for codigo in Venta.objects.filter(codigo__startswith=f'{SERIE_VENTAS}-').values_list('codigo', flat=True).iterator():
+        numero = codigo.split('-', 1)[1]
+        if numero.isdigit():
+            ultimo = max(ultimo, int(numero))
+
+    ContadorCodigo.objects.update_or_create(serie=SERIE_VENTAS, defaults={'ultimo': ultimo})
+
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f"CREATE SEQUENCE IF NOT EXISTS {SECUENCIA_VENTAS} AS bigint MINVALUE 1")
+        if ultimo:
+            schema_editor.execute("SELECT setval(%s, %s)", [SECUENCIA_VENTAS, ultimo])
+
+
+def eliminar_secuencia(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f"DROP SEQUENCE IF EXISTS {SECUENCIA_VENTAS}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventas', '0004_alter_itemventa_precio_unitario_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadorCodigo',
+            fields=[
+                ('serie', models.CharField(max_length=10, primary_key=True, serialize=False)),
+                ('ultimo', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(inicializar_contador, eliminar_secuencia),
+    ]
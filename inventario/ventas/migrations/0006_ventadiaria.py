@@ -0,0 +1,43 @@
+# Generated by Django 4.2.11 on 2026-10-18 19:09
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def poblar_ventas_diarias(apps, schema_editor):
+    Venta = apps.get_model('ventas', 'Venta')
+    VentaDiaria = apps.get_model('ventas', 'VentaDiaria')
+    filas = (
+        Venta.objects.values('fecha', 'medio_pago')
+        .annotate(cantidad=Count('id'), total=Sum('total'))
+        .order_by()
+    )
+    VentaDiaria.objects.bulk_create(
+        [VentaDiaria(**fila) for fila in filas.iterator()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventas', '0005_contadorcodigo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VentaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('medio_pago', models.CharField(choices=[('efectivo', 'Efectivo'), ('credito', 'Tarjeta de Crédito'), ('debito', 'Tarjeta de Débito'), ('qr', 'QR')], max_length=20)),
+                ('cantidad', models.PositiveIntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('fecha', 'medio_pago'), name='ventadiaria_fecha_medio_pago_uniq')],
+            },
+        ),
+        migrations.RunPython(poblar_ventas_diarias, migrations.RunPython.noop),
+    ]
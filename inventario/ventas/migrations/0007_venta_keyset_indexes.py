@@ -0,0 +1,26 @@
+# Generated by Django 4.2.11 on 2026-10-18 19:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0001_initial'),
+        ('ventas', '0006_ventadiaria'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(fields=['fecha', 'id'], name='venta_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(fields=['cliente', 'fecha', 'id'], name='venta_cliente_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(fields=['medio_pago', 'fecha', 'id'], name='venta_medio_pago_fecha_id_idx'),
+        ),
+    ]
@@ -3,6 +3,14 @@ from datetime import date
 from clientes.models import Cliente
 from productos.models import Producto
 
+MEDIO_PAGO_CHOICES = [
+    ('efectivo', 'Efectivo'),
+    ('credito', 'Tarjeta de Crédito'),
+    ('debito', 'Tarjeta de Débito'),
+    ('qr', 'QR'),
+]
+
+
 class Venta(models.Model):
     codigo = models.CharField(max_length=20, unique=True)
     cliente = models.ForeignKey(Cliente, on_delete=models.PROTECT)
@@ -10,15 +18,17 @@ class Venta(models.Model):
     total = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     medio_pago = models.CharField(
         max_length=20,
-        choices=[
-            ('efectivo', 'Efectivo'),
-            ('credito', 'Tarjeta de Crédito'),
-            ('debito', 'Tarjeta de Débito'),
-            ('qr', 'QR'),
-        ],
+        choices=MEDIO_PAGO_CHOICES,
         default='efectivo',
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['fecha', 'id'], name='venta_fecha_id_idx'),
+            models.Index(fields=['cliente', 'fecha', 'id'], name='venta_cliente_fecha_id_idx'),
+            models.Index(fields=['medio_pago', 'fecha', 'id'], name='venta_medio_pago_fecha_id_idx'),
+        ]
+
     def __str__(self):
         return f"{self.codigo} - {self.cliente}"
 
@@ -31,3 +41,36 @@ class ItemVenta(models.Model):
 
     def __str__(self):
         return f"{self.producto.nombre} x {self.cantidad}"
+
+
+class ContadorCodigo(models.Model):
+    """
+    Último número reservado para cada serie de códigos (ej: 'V' para ventas).
+    Se usa como respaldo cuando la base no tiene secuencias (SQLite).
+    """
+    serie = models.CharField(max_length=10, primary_key=True)
+    ultimo = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.serie}: {self.ultimo}"
+
+
+class VentaDiaria(models.Model):
+    """
+    Resumen de ventas por día y medio de pago. Se actualiza en la misma
+    transacción que registra cada venta (ver ventas.services) y se puede
+    reconstruir con `manage.py rebuild_ventas_diarias`.
+    """
+    fecha = models.DateField()
+    medio_pago = models.CharField(max_length=20, choices=MEDIO_PAGO_CHOICES)
+    cantidad = models.PositiveIntegerField(default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['fecha', 'medio_pago'], name='ventadiaria_fecha_medio_pago_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} {self.medio_pago}: {self.total}"
@@ -0,0 +1,92 @@
+"""
+Mantenimiento y consulta del resumen diario de ventas (VentaDiaria).
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+
+from inventario.cache import invalidar_al_confirmar
+from .models import Venta, VentaDiaria
+
+GRANULARIDADES = {
+    'dia': None,
+    'semana': TruncWeek,
+    'mes': TruncMonth,
+}
+
+
+def acumular_venta(venta):
+    """Suma la venta al resumen de su día y medio de pago (llamar dentro de la transacción de la venta)."""
+    filtro = VentaDiaria.objects.filter(fecha=venta.fecha, medio_pago=venta.medio_pago)
+    cambios = {
+        'cantidad': F('cantidad') + 1,
+        'total': F('total') + venta.total,
+        'actualizado': timezone.now(),
+    }
+    if filtro.update(**cambios):
+        return
+    try:
+        with transaction.atomic():
+            VentaDiaria.objects.create(
+                fecha=venta.fecha,
+                medio_pago=venta.medio_pago,
+                cantidad=1,
+                total=venta.total,
+            )
+    except IntegrityError:
+        # Otra caja creó la fila del día al mismo tiempo
+        filtro.update(**cambios)
+
+
+def reconstruir_ventas_diarias(desde=None, hasta=None):
+    """Recalcula el resumen desde la tabla de ventas, opcionalmente para un rango de fechas."""
+    ventas = Venta.objects.all()
+    resumen = VentaDiaria.objects.all()
+    if desde:
+        ventas = ventas.filter(fecha__gte=desde)
+        resumen = resumen.filter(fecha__gte=desde)
+    if hasta:
+        ventas = ventas.filter(fecha__lte=hasta)
+        resumen = resumen.filter(fecha__lte=hasta)
+
+    filas = (
+        ventas.values('fecha', 'medio_pago')
+        .annotate(cantidad=Count('id'), total=Sum('total'))
+        .order_by()
+    )
+    with transaction.atomic():
+        resumen.delete()
+        creadas = VentaDiaria.objects.bulk_create(
+            [VentaDiaria(**fila) for fila in filas.iterator()],
+            batch_size=1000,
+        )
+        invalidar_al_confirmar('ventas')
+    return len(creadas)
+
+
+def resumen_en_rango(desde, hasta):
+    return VentaDiaria.objects.filter(fecha__gte=desde, fecha__lte=hasta)
+
+
+def serie_ventas(desde, hasta, granularidad='dia'):
+    """Devuelve [(periodo, total)] agrupado por día, semana o mes."""
+    truncar = GRANULARIDADES[granularidad]
+    periodo = truncar('fecha') if truncar else F('fecha')
+    return [
+        (fila['periodo'], fila['total_periodo'])
+        for fila in resumen_en_rango(desde, hasta)
+        .annotate(periodo=periodo)
+        .values('periodo')
+        .annotate(total_periodo=Sum('total'))
+        .order_by('periodo')
+    ]
+
+
+def version_resumen(desde, hasta):
+    """Firma barata del rango: cambia cada vez que se suma o reconstruye algún día."""
+    datos = resumen_en_rango(desde, hasta).aggregate(
+        ultimo=Max('actualizado'), filas=Count('id'), ventas=Sum('cantidad'),
+    )
+    ultimo = datos['ultimo'].timestamp() if datos['ultimo'] else 0
+    return f"{ultimo}-{datos['filas']}-{datos['ventas'] or 0}"
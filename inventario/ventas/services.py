@@ -0,0 +1,136 @@
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import OperationalError, connection, transaction
+
+from inventario.metricas import seccion
+from productos.models import Producto, MovimientoStock
+from productos.stock import StockInsuficiente, registrar_movimientos
+from reportes.agregados import acumular_items
+from .models import ItemVenta
+from .codigos import codigos_venta
+from .facturas import programar_factura
+from .resumenes import acumular_venta
+
+
+def agrupar_lineas(lineas):
+    """
+    Suma las cantidades de las líneas que repiten producto.
+    Devuelve un OrderedDict {producto_id: cantidad} respetando el orden del ticket.
+    """
+    agrupadas = OrderedDict()
+    for producto_id, cantidad in lineas:
+        agrupadas[producto_id] = agrupadas.get(producto_id, 0) + cantidad
+    return agrupadas
+
+
+# SQLSTATE lock_not_available: venció lock_timeout
+LOCK_NOT_AVAILABLE = '55P03'
+
+
+def _limitar_espera_de_bloqueo():
+    """
+    Acota cuánto espera el SELECT ... FOR UPDATE. Con PgBouncer en modo
+    transacción, una caja esperando un bloqueo retiene una conexión del pool;
+    set_config(..., true) vale sólo para esta transacción y no deja estado en
+    la conexión compartida.
+    """
+    if connection.vendor != 'postgresql':
+        return
+    espera = getattr(settings, 'VENTAS_ESPERA_BLOQUEO_MS', 5000)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT set_config('lock_timeout', %s, true)", [f"{espera}ms"])
+
+
+def _es_espera_vencida(error):
+    causa = error.__cause__
+    return getattr(causa, 'sqlstate', None) == LOCK_NOT_AVAILABLE or getattr(causa, 'pgcode', None) == LOCK_NOT_AVAILABLE
+
+
+@seccion('checkout')
+def registrar_venta(venta, lineas, usuario):
+    """
+    Registra una venta completa con un número constante de consultas.
+
+    `venta` es una instancia sin guardar (cliente, fecha, medio_pago ya asignados)
+    y `lineas` una lista de tuplas (producto_id, cantidad).
+
+    Bloquea todos los productos del ticket en una sola consulta y siempre en el
+    mismo orden (por id) para que dos cajas no puedan bloquearse mutuamente,
+    valida el stock en memoria y escribe ítems, movimientos y descuentos de
+    stock con sentencias masivas.
+    """
+    cantidades = agrupar_lineas(lineas)
+    if not cantidades:
+        raise ValidationError("La venta debe tener al menos un producto.")
+
+    # El código se reserva antes de abrir la transacción para que la reserva
+    # de bloques no quede atada a un posible rollback de la venta.
+    if not venta.codigo:
+        venta.codigo = codigos_venta.siguiente()
+
+    with transaction.atomic():
+        _limitar_espera_de_bloqueo()
+        try:
+            bloqueados = {
+                p.id: p
+                for p in Producto.objects.select_for_update()
+                .filter(id__in=cantidades.keys())
+                .order_by('id')
+                .only('id', 'nombre', 'precio', 'stock')
+            }
+        except OperationalError as e:
+            if _es_espera_vencida(e):
+                raise ValidationError("Los productos están ocupados por otra venta. Intentá nuevamente.") from e
+            raise
+
+        faltantes = [
+            bloqueados[pid].nombre if pid in bloqueados else str(pid)
+            for pid, cantidad in cantidades.items()
+            if pid not in bloqueados or bloqueados[pid].stock < cantidad
+        ]
+        if faltantes:
+            raise StockInsuficiente(f"Stock insuficiente para {', '.join(faltantes)}")
+
+        items = []
+        total = 0
+        for producto_id, cantidad in lineas:
+            precio = bloqueados[producto_id].precio
+            subtotal = precio * cantidad
+            total += subtotal
+            items.append(ItemVenta(
+                producto_id=producto_id,
+                cantidad=cantidad,
+                precio_unitario=precio,
+                subtotal=subtotal,
+            ))
+
+        venta.total = total
+        venta.save()
+
+        for item in items:
+            item.venta = venta
+        ItemVenta.objects.bulk_create(items)
+
+        # Movimientos de salida y descuento de stock en bloque, a través del
+        # libro de stock y reutilizando el bloqueo ya tomado.
+        registrar_movimientos(
+            [
+                MovimientoStock(
+                    producto_id=producto_id,
+                    tipo='salida',
+                    cantidad=cantidad,
+                    motivo=f"Venta {venta.codigo}",
+                    usuario=usuario,
+                )
+                for producto_id, cantidad in cantidades.items()
+            ],
+            bloqueados={pid: producto.stock for pid, producto in bloqueados.items()},
+        )
+
+        acumular_venta(venta)
+        acumular_items(venta.fecha, items)
+        programar_factura(venta)
+
+    return venta
@@ -1,3 +1,266 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import shutil
+import tempfile
+from datetime import date
+from decimal import Decimal
+from importlib import import_module
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from clientes.models import Cliente
+from productos.models import MovimientoStock, Producto
+from .codigos import AsignadorCodigos
+from .facturas import calcular_huella
+from .models import ContadorCodigo, Venta, VentaDiaria
+from .resumenes import serie_ventas
+from .services import StockInsuficiente, registrar_venta
+
+
+class VentaTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_superuser('admin', 'admin@example.com', 'clave')
+        cls.cliente = Cliente.objects.create(
+            nombre='Ana', apellido='Pérez', documento='30111222', email='ana@example.com',
+            telefono='1', direccion='Calle 1',
+        )
+        cls.productos = [
+            Producto.objects.create(
+                nombre=f'Vino {i}', descripcion='-', precio=Decimal('10.50') + i, stock=10, sku=f'V{i:03d}',
+            )
+            for i in range(25)
+        ]
+
+    def nueva_venta(self):
+        return Venta(cliente=self.cliente, medio_pago='efectivo')
+
+
+class RegistrarVentaTests(VentaTestCase):
+    def test_consultas_constantes(self):
+        registrar_venta(self.nueva_venta(), [(self.productos[24].id, 1)], 'caja')
+        with CaptureQueriesContext(connection) as dos:
+            registrar_venta(self.nueva_venta(), [(p.id, 1) for p in self.productos[:2]], 'caja')
+        with CaptureQueriesContext(connection) as veinte:
+            registrar_venta(self.nueva_venta(), [(p.id, 1) for p in self.productos[:20]], 'caja')
+        self.assertEqual(len(dos), len(veinte))
+        self.assertEqual(Producto.objects.get(pk=self.productos[0].pk).stock, 8)
+        self.assertEqual(MovimientoStock.objects.filter(tipo='salida').count(), 23)
+
+    def test_stock_insuficiente_revierte_todo(self):
+        # Dos líneas del mismo producto que juntas superan el stock
+        with self.assertRaises(StockInsuficiente):
+            registrar_venta(
+                self.nueva_venta(),
+                [(self.productos[0].id, 6), (self.productos[1].id, 1), (self.productos[0].id, 5)],
+                'caja',
+            )
+        self.assertFalse(Venta.objects.exists())
+        self.assertFalse(MovimientoStock.objects.exists())
+        self.assertEqual(Producto.objects.get(pk=self.productos[1].pk).stock, 10)
+
+
+class VentaCreateViewTests(VentaTestCase):
+    def setUp(self):
+        self.client.force_login(self.usuario)
+
+    def datos(self, lineas):
+        datos = {
+            'cliente': self.cliente.id, 'fecha': '2025-01-01', 'medio_pago': 'efectivo',
+            'form-TOTAL_FORMS': str(len(lineas)), 'form-INITIAL_FORMS': '0',
+            'form-MIN_NUM_FORMS': '0', 'form-MAX_NUM_FORMS': '1000',
+        }
+        for i, (producto, cantidad) in enumerate(lineas):
+            datos[f'form-{i}-producto'] = producto.id
+            datos[f'form-{i}-cantidad'] = str(cantidad)
+        return datos
+
+    def test_registra_la_venta(self):
+        p0, p1 = self.productos[:2]
+        respuesta = self.client.post(reverse('ventas:venta_create'), self.datos([(p0, 3), (p1, 2)]))
+        venta = Venta.objects.get()
+        self.assertRedirects(respuesta, reverse('ventas:venta_detail', args=[venta.pk]))
+        self.assertEqual(venta.total, p0.precio * 3 + p1.precio * 2)
+
+    def test_consultas_no_crecen_con_las_lineas(self):
+        self.client.post(reverse('ventas:venta_create'), self.datos([(self.productos[24], 1)]))
+        with CaptureQueriesContext(connection) as dos:
+            self.client.post(reverse('ventas:venta_create'), self.datos([(p, 1) for p in self.productos[:2]]))
+        with CaptureQueriesContext(connection) as veinte:
+            self.client.post(reverse('ventas:venta_create'), self.datos([(p, 1) for p in self.productos[:20]]))
+        self.assertEqual(Venta.objects.count(), 3)
+        self.assertEqual(len(dos), len(veinte))
+
+    def test_producto_inexistente(self):
+        datos = self.datos([(self.productos[0], 1)])
+        datos['form-0-producto'] = '999999'
+        respuesta = self.client.post(reverse('ventas:venta_create'), datos)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertFalse(Venta.objects.exists())
+
+
+class FacturaTests(VentaTestCase):
+    def setUp(self):
+        self.client.force_login(self.usuario)
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        ajustes = override_settings(FACTURAS_ROOT=directorio, TAREAS_WORKERS=0)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.venta = registrar_venta(self.nueva_venta(), [(self.productos[0].id, 2)], 'caja')
+
+    def test_304_no_renderiza(self):
+        url = reverse('ventas:generar_factura_pdf', args=[self.venta.pk])
+        respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        etag = respuesta['ETag']
+        with mock.patch('ventas.facturas.renderizar_html') as renderizar, \
+                CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 304)
+        renderizar.assert_not_called()
+        self.assertFalse(any('ventas_itemventa' in c['sql'] for c in consultas.captured_queries))
+
+    def test_if_none_match_compara_etags_completos(self):
+        url = reverse('ventas:generar_factura_pdf', args=[self.venta.pk])
+        etag = self.client.get(url)['ETag']
+        for encabezado, estado in (
+            (f'"otra", W/{etag}', 304),
+            ('*', 304),
+            (etag[:-2] + '"', 200),
+            (f'"x{etag[1:-1]}"', 200),
+        ):
+            with self.subTest(encabezado=encabezado):
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=encabezado).status_code, estado)
+
+    def test_huella_cambia_con_los_datos(self):
+        huella = calcular_huella(self.venta)
+        self.venta.cliente.nombre = 'Otra'
+        self.assertNotEqual(calcular_huella(self.venta), huella)
+
+
+class CodigosTests(TransactionTestCase):
+    def test_unicos_y_crecientes_entre_bloques_y_transacciones(self):
+        caja, otra_caja = AsignadorCodigos('T', 'secuencia_t', bloque=5), AsignadorCodigos('T', 'secuencia_t', bloque=5)
+        # Fuera de una transacción cada asignador reserva de a 5
+        numeros = [caja.siguiente_numero() for _ in range(3)] + [otra_caja.siguiente_numero() for _ in range(3)]
+        self.assertEqual(numeros, [1, 2, 3, 6, 7, 8])
+        self.assertEqual(ContadorCodigo.objects.get(serie='T').ultimo, 10)
+        # Adentro primero usa lo que le sobró del bloque y después reserva de a uno
+        with transaction.atomic():
+            numeros += [caja.siguiente_numero() for _ in range(4)]
+        self.assertEqual(numeros[6:], [4, 5, 11, 12])
+        self.assertEqual(ContadorCodigo.objects.get(serie='T').ultimo, 12)
+        numeros.append(otra_caja.siguiente_numero())
+        self.assertEqual(len(set(numeros)), len(numeros))
+        self.assertEqual(caja.siguiente(), 'T-0013')
+
+    def test_reserva_revertida_no_deja_sobrantes(self):
+        caja = AsignadorCodigos('T', 'secuencia_t', bloque=5)
+        with self.assertRaises(ValueError), transaction.atomic():
+            self.assertEqual(caja.siguiente_numero(), 1)
+            raise ValueError
+        # El contador volvió atrás y el asignador no guardó nada de esa reserva
+        self.assertEqual(caja.siguiente_numero(), 1)
+
+
+class MigracionContadorTests(VentaTestCase):
+    def test_arranca_despues_del_mayor_codigo(self):
+        for codigo in ('V-0007', 'V-0042', 'V-9x', 'R-0100'):
+            Venta.objects.create(codigo=codigo, cliente=self.cliente)
+        migracion = import_module('ventas.migrations.0005_contadorcodigo')
+        # En PostgreSQL además crea la secuencia
+        editor = SimpleNamespace(connection=connection, execute=lambda sql, params=(): connection.cursor().execute(sql, params))
+        migracion.inicializar_contador(apps, editor)
+        self.assertEqual(ContadorCodigo.objects.get(serie='V').ultimo, 42)
+
+
+class ResumenDiarioTests(VentaTestCase):
+    def resumen(self):
+        return sorted(VentaDiaria.objects.values_list('fecha', 'medio_pago', 'cantidad', 'total'))
+
+    def test_cada_venta_suma_en_su_transaccion(self):
+        registrar_venta(self.nueva_venta(), [(self.productos[0].id, 2)], 'caja')
+        registrar_venta(self.nueva_venta(), [(self.productos[1].id, 1)], 'caja')
+        registrar_venta(Venta(cliente=self.cliente, medio_pago='qr'), [(self.productos[0].id, 1)], 'caja')
+        with self.assertRaises(StockInsuficiente):
+            registrar_venta(self.nueva_venta(), [(self.productos[2].id, 11)], 'caja')
+
+        hoy = date.today()
+        self.assertEqual(self.resumen(), [
+            (hoy, 'efectivo', 2, Decimal('32.50')),
+            (hoy, 'qr', 1, Decimal('10.50')),
+        ])
+
+    def test_reconstruir_con_el_comando(self):
+        registrar_venta(self.nueva_venta(), [(self.productos[0].id, 2)], 'caja')
+        registrar_venta(Venta(cliente=self.cliente, medio_pago='qr'), [(self.productos[1].id, 1)], 'caja')
+        esperado = self.resumen()
+        VentaDiaria.objects.filter(medio_pago='qr').delete()
+        VentaDiaria.objects.update(cantidad=7, total=0)
+
+        salida = io.StringIO()
+        call_command('rebuild_ventas_diarias', stdout=salida)
+        self.assertIn("Resumen reconstruido: 2 filas.", salida.getvalue())
+        self.assertEqual(self.resumen(), esperado)
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_ventas_diarias', desde='2026-02-01', hasta='2026-01-01')
+
+    def test_serie_por_dia_semana_y_mes(self):
+        # Lunes 2 y miércoles 4 de marzo caen en la misma semana; el 9 en la siguiente
+        for dia, total in ((date(2026, 3, 2), 10), (date(2026, 3, 4), 20), (date(2026, 3, 9), 5), (date(2026, 4, 1), 1)):
+            VentaDiaria.objects.create(fecha=dia, medio_pago='efectivo', cantidad=1, total=total)
+        VentaDiaria.objects.create(fecha=date(2026, 3, 4), medio_pago='qr', cantidad=1, total=3)
+        desde, hasta = date(2026, 3, 1), date(2026, 4, 30)
+
+        self.assertEqual(serie_ventas(desde, hasta, 'dia'), [
+            (date(2026, 3, 2), 10), (date(2026, 3, 4), 23), (date(2026, 3, 9), 5), (date(2026, 4, 1), 1),
+        ])
+        self.assertEqual(serie_ventas(desde, hasta, 'semana'), [
+            (date(2026, 3, 2), 33), (date(2026, 3, 9), 5), (date(2026, 3, 30), 1),
+        ])
+        self.assertEqual(serie_ventas(desde, hasta, 'mes'), [(date(2026, 3, 1), 38), (date(2026, 4, 1), 1)])
+
+
+class ExportarVentasTests(VentaTestCase):
+    def setUp(self):
+        self.efectivo = registrar_venta(self.nueva_venta(), [(self.productos[0].id, 2), (self.productos[1].id, 1)], 'caja')
+        self.qr = registrar_venta(Venta(cliente=self.cliente, medio_pago='qr'), [(self.productos[2].id, 1)], 'caja')
+
+    def exportar(self, *args, **opciones):
+        salida = io.BytesIO()
+        call_command('exportar_ventas', *args, stdout=salida, **opciones)
+        return salida.getvalue()
+
+    def test_csv(self):
+        filas = list(csv.reader(io.StringIO(self.exportar().decode('utf-8'))))
+        self.assertEqual(filas[0][:3], ['id', 'codigo', 'fecha'])
+        self.assertEqual([(fila[1], fila[6], fila[7]) for fila in filas[1:]], [
+            (self.efectivo.codigo, 'efectivo', '32.50'), (self.qr.codigo, 'qr', '12.50'),
+        ])
+
+    def test_jsonl_de_items_filtrado(self):
+        lineas = self.exportar(items=True, formato='jsonl', medio_pago='efectivo').decode('utf-8').splitlines()
+        items = [json.loads(linea) for linea in lineas]
+        self.assertEqual([(i['producto_sku'], i['cantidad'], i['subtotal']) for i in items], [
+            ('V000', 2, '21.00'), ('V001', 1, '11.50'),
+        ])
+
+    def test_gzip_sobre_salida_de_texto(self):
+        # Como sys.stdout: los bytes van al flujo binario debajo del de texto
+        binario = io.BytesIO()
+        texto = io.TextIOWrapper(binario, encoding='utf-8')
+        call_command('exportar_ventas', gzip=True, stdout=texto)
+        self.assertEqual(gzip.decompress(binario.getvalue()), self.exportar())
@@ -6,6 +6,8 @@ from .views import (
     generar_factura_pdf,
     ventas_por_dia_json,
     ventas_por_dia,
+    exportar_ventas,
+    exportar_items,
 )
 
 app_name = 'ventas'
@@ -17,4 +19,6 @@ urlpatterns = [
     path('factura/<int:venta_id>/pdf/', generar_factura_pdf, name='generar_factura_pdf'),
     path('grafico/ventas_por_dia/', ventas_por_dia_json, name='ventas_por_dia_json'),
     path('estadisticas/ventas_por_dia/', ventas_por_dia, name='ventas_por_dia'),
+    path('exportar/', exportar_ventas, name='exportar_ventas'),
+    path('exportar/items/', exportar_items, name='exportar_items'),
 ]
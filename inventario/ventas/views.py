@@ -1,20 +1,28 @@
-from django.views.generic import CreateView, ListView, DetailView
+from django.views.generic import CreateView, DetailView
+from django_filters.views import FilterView
 from django.shortcuts import render, redirect, get_object_or_404
-from django.db import transaction
+from django.core.exceptions import ValidationError
 from django.contrib import messages
-from django.core.serializers.json import DjangoJSONEncoder
-from django.http import HttpResponse, JsonResponse
-from django.template.loader import get_template
-from xhtml2pdf import pisa
-from django.db.models import Sum, F
-import json
+from django.http import FileResponse, HttpResponseBadRequest, JsonResponse
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import condition
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib.auth import logout
 
 from .models import Venta, ItemVenta
 from .forms import VentaForm, ItemVentaFormSet
-from productos.models import Producto, MovimientoStock
+from .filters import VentaFilter
+from inventario import cache, exportacion
+from inventario.paginacion import KeysetPaginationMixin
+from .services import registrar_venta
+from .facturas import calcular_huella, obtener_factura
+from .resumenes import GRANULARIDADES, serie_ventas, version_resumen
+from .exportacion import COLUMNAS_ITEMS, COLUMNAS_VENTAS, items_de, ventas_filtradas
 
 
 class VentaCreateView(LoginRequiredMixin, PermissionRequiredMixin, CreateView):
@@ -24,14 +32,11 @@ class VentaCreateView(LoginRequiredMixin, PermissionRequiredMixin, CreateView):
     permission_required = 'ventas.add_venta'
 
     def get_context_data_custom(self, form, formset):
-        productos = Producto.objects.filter(stock__gt=0)
-        precios = {str(p.id): float(p.precio) for p in productos}
-        stocks = {str(p.id): p.stock for p in productos}
+        # Precios y stocks no se incrustan en la página: el navegador los pide
+        # a productos:catalogo_snapshot y sólo descarga lo que cambió.
         return {
             'form': form,
             'formset': formset,
-            'precios_json': json.dumps(precios, cls=DjangoJSONEncoder),
-            'stocks_json': json.dumps(stocks, cls=DjangoJSONEncoder),
         }
 
     def get(self, request, *args, **kwargs):
@@ -59,61 +64,28 @@ class VentaCreateView(LoginRequiredMixin, PermissionRequiredMixin, CreateView):
                     context = self.get_context_data_custom(form, formset)
                     return render(request, self.template_name, context)
 
-            with transaction.atomic():
-                venta = form.save(commit=False)
-                venta.codigo = f"V-{Venta.objects.count() + 1:04d}"
-                venta.total = 0
-                venta.save()
+            # ► Armar las líneas del ticket
+            lineas = []
+            for item_form in formset.forms:
 
-                # ► Procesar ítems correctamente
-                for item_form in formset.forms:
+                if not item_form.cleaned_data or item_form.cleaned_data.get("DELETE"):
+                    continue
 
-                    if not item_form.cleaned_data:
-                        continue
+                producto = item_form.cleaned_data.get("producto")
+                cantidad = item_form.cleaned_data.get("cantidad")
 
-                    producto = item_form.cleaned_data.get("producto")
-                    cantidad = item_form.cleaned_data.get("cantidad")
+                if not producto or not cantidad:
+                    continue
 
-                    if not producto or not cantidad:
-                        continue
-
-                    # Bloquear el producto para evitar condiciones de carrera
-                    producto_bloqueado = Producto.objects.select_for_update().get(id=producto.id)
-
-                    # Validación de stock
-                    if producto_bloqueado.stock < cantidad:
-                        messages.error(request, f"Stock insuficiente para {producto_bloqueado.nombre}")
-                        raise transaction.TransactionManagementError()
-
-                    precio = producto_bloqueado.precio
-                    subtotal = precio * cantidad
-
-                    # Crear item
-                    ItemVenta.objects.create(
-                        venta=venta,
-                        producto=producto_bloqueado,
-                        cantidad=cantidad,
-                        precio_unitario=precio,
-                        subtotal=subtotal
-                    )
-
-                    # Actualizar stock seguro con F()
-                    Producto.objects.filter(id=producto_bloqueado.id).update(stock=F('stock') - cantidad)
-
-                    # Registrar movimiento de salida
-                    MovimientoStock.objects.create(
-                        producto=producto_bloqueado,
-                        tipo='salida',
-                        cantidad=cantidad,
-                        motivo=f"Venta {venta.codigo}",
-                        usuario=request.user.username
-                    )
-
-                    # Sumar al total
-                    venta.total += subtotal
-
-                venta.save()
+                lineas.append((producto.id, cantidad))
 
+            # ► Registrar la venta en bloque (bloqueo, ítems, movimientos y stock)
+            try:
+                venta = registrar_venta(form.save(commit=False), lineas, request.user.username)
+            except ValidationError as e:
+                for mensaje in e.messages:
+                    messages.error(request, mensaje)
+            else:
                 messages.success(request, "Venta registrada correctamente.")
                 return redirect('ventas:venta_detail', pk=venta.pk)
 
@@ -122,11 +94,17 @@ class VentaCreateView(LoginRequiredMixin, PermissionRequiredMixin, CreateView):
         return render(request, self.template_name, context)
 
 
-class VentaListView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
+class VentaListView(LoginRequiredMixin, PermissionRequiredMixin, KeysetPaginationMixin, FilterView):
     model = Venta
+    filterset_class = VentaFilter
     template_name = 'venta/venta_list.html'
     context_object_name = 'ventas'
     permission_required = 'ventas.view_venta'
+    orden_keyset = ['-fecha', '-id']
+    por_pagina_keyset = 25
+
+    def get_queryset(self):
+        return Venta.objects.select_related('cliente')
 
 
 class VentaDetailView(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
@@ -135,33 +113,77 @@ class VentaDetailView(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
     context_object_name = 'venta'
     permission_required = 'ventas.view_venta'
 
+    def get_queryset(self):
+        return super().get_queryset().select_related('cliente')
+
 
 @login_required
 @permission_required('ventas.view_venta', raise_exception=True)
 def generar_factura_pdf(request, venta_id):
-    venta = get_object_or_404(Venta, id=venta_id)
-    items = venta.items.all()
-
-    template = get_template('venta/factura_pdf.html')
-    html = template.render({'venta': venta, 'items': items})
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="factura_{venta.codigo}.pdf"'
-    pisa.CreatePDF(html, dest=response)
+    venta = get_object_or_404(Venta.objects.select_related('cliente'), id=venta_id)
+    huella = calcular_huella(venta)
+    etag = f'"{huella}"'
+
+    # El ETag sale de la huella, que no incluye los ítems porque no cambian
+    # después de registrada la venta: un 304 no renderiza ni los lee
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        ruta, _ = obtener_factura(venta, huella)
+        response = FileResponse(
+            open(ruta, 'rb'),
+            as_attachment=True,
+            filename=f"factura_{venta.codigo}.pdf",
+            content_type='application/pdf',
+        )
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, max-age=0, must-revalidate'
     return response
 
 
+def _parametros_grafico(request):
+    """Rango (desde, hasta) y granularidad pedidos al gráfico, con valores por defecto acotados."""
+    def _fecha(nombre):
+        try:
+            return parse_date(request.GET.get(nombre) or '')
+        except ValueError:
+            return None
+
+    hasta = _fecha('hasta') or timezone.localdate()
+    desde = _fecha('desde') or hasta - timedelta(days=settings.VENTAS_GRAFICO_DIAS - 1)
+    if desde > hasta:
+        desde, hasta = hasta, desde
+    granularidad = request.GET.get('granularidad', 'dia')
+    if granularidad not in GRANULARIDADES:
+        granularidad = 'dia'
+    return desde, hasta, granularidad
+
+
+def _etag_grafico(request):
+    desde, hasta, granularidad = _parametros_grafico(request)
+    return f"{desde}:{hasta}:{granularidad}:{version_resumen(desde, hasta)}"
+
+
+def _clave_grafico(request):
+    desde, hasta, granularidad = _parametros_grafico(request)
+    return {'desde': desde, 'hasta': hasta, 'granularidad': granularidad}
+
+
 @login_required
 @permission_required('ventas.view_venta', raise_exception=True)
+@condition(etag_func=_etag_grafico)
+@cache.cachear_vista('ventas:por_dia', ('ventas',), parametros=_clave_grafico)
 def ventas_por_dia_json(request):
-    datos = (
-        Venta.objects
-        .values('fecha')
-        .annotate(total_dia=Sum('total'))
-        .order_by('fecha')
-    )
-    fechas = [str(d['fecha']) for d in datos]
-    totales = [float(d['total_dia']) for d in datos]
-    return JsonResponse({'labels': fechas, 'data': totales})
+    desde, hasta, granularidad = _parametros_grafico(request)
+    datos = serie_ventas(desde, hasta, granularidad)
+    fechas = [str(periodo) for periodo, _ in datos]
+    totales = [float(total) for _, total in datos]
+    return JsonResponse({
+        'labels': fechas,
+        'data': totales,
+        'desde': str(desde),
+        'hasta': str(hasta),
+        'granularidad': granularidad,
+    })
 
 
 @login_required
@@ -170,6 +192,31 @@ def ventas_por_dia(request):
     return render(request, 'venta/ventas_por_dia.html')
 
 
+def _exportar(request, base, columnas, filas):
+    formato = request.GET.get('formato', 'csv')
+    if formato not in exportacion.FORMATOS:
+        return HttpResponseBadRequest("Formato no soportado.")
+    try:
+        ventas = ventas_filtradas(request.GET)
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+    return exportacion.respuesta(
+        base, columnas, filas(ventas), formato, comprimir=request.GET.get('gzip') == '1',
+    )
+
+
+@login_required
+@permission_required('ventas.view_venta', raise_exception=True)
+def exportar_ventas(request):
+    return _exportar(request, 'ventas', COLUMNAS_VENTAS, lambda ventas: ventas)
+
+
+@login_required
+@permission_required('ventas.view_venta', raise_exception=True)
+def exportar_items(request):
+    return _exportar(request, 'ventas-items', COLUMNAS_ITEMS, items_de)
+
+
 @login_required
 def logout_view(request):
     logout(request)